@@ -15,6 +15,10 @@ from app.routers import (
     voice,
 )
 from app.services.arize.arize import ArizeClient
+from app.services.backend.backend_client import BackendClient
+from app.services.openai.openai_agents_stream_mcp import hhai_mcp_pool
+from app.services.openai.session_store import create_session_store
+from app.services.speech.azure_token import AzureTokenManager
 from app.services.speech.speech_to_text import SpeechToText
 from app.services.speech.text_to_speech import TextToSpeech
 
@@ -25,11 +29,33 @@ def create_agent_app():
     
     @asynccontextmanager
     async def agent_lifespan(app: FastAPI):
+        # initialize shared, pooled HTTP client used by all agent tools
+        backend_client = BackendClient()
+        app.state.backend_client = backend_client
+
+        # initialize server-side conversation sessions, keyed by session_id
+        session_store = create_session_store()
+        await session_store.initialize()
+        app.state.session_store = session_store
+
+        # open the warm HealthHub MCP connections used by the MCP agent graph in the background, the rest of the
+        # app does not wait for or depend on the MCP server
+        hhai_mcp_pool.start()
+
+        # one Azure token for both speech services, refreshed in the background before it expires
+        token_manager = AzureTokenManager()
+        await token_manager.start()
+
         # initialize Text-to-Speech service
-        tts_service = TextToSpeech()
+        tts_service = TextToSpeech(token_manager)
         await tts_service.initialize()
         app.state.text_to_speech_service = tts_service
 
+        # initialize Speech-to-Text service, used by the live voice endpoint
+        stt_service = SpeechToText(token_manager)
+        await stt_service.initialize()
+        app.state.speech_to_text_service = stt_service
+
         # Add Phoenix API Key for tracing
         PHOENIX_API_KEY = os.environ.get("PHOENIX_API_KEY")
         os.environ["PHOENIX_CLIENT_HEADERS"] = f"api_key={PHOENIX_API_KEY}"
@@ -48,6 +74,14 @@ def create_agent_app():
 
         yield
 
+        # close pooled backend connections on shutdown
+        await backend_client.close()
+        await session_store.close()
+        await hhai_mcp_pool.cleanup()
+        await tts_service.close()
+        await stt_service.close()
+        await token_manager.close()
+
     app = FastAPI(lifespan=agent_lifespan)
 
     # origins = [
@@ -1,22 +1,35 @@
 from typing import AsyncGenerator
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 from openinference.instrumentation import using_attributes
 
-from app.schemas.chat import ChatRequest
+from app.schemas.chat import (
+    STREAM_MODE_HEADER,
+    ChatRequest,
+    negotiate_stream_mode,
+)
 from app.services.openai import (
     openai_agents_stream,
     openai_agents_stream_mcp,
 )
+from app.services.openai.event_encoder import encode_event
+from app.services.openai.session_store import load_session
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
 @router.post("/stream", response_class=StreamingResponse)
-async def send_chat_stream(chat_request: ChatRequest):
+async def send_chat_stream(chat_request: ChatRequest, request: Request):
     print("Received chat request:", chat_request.message)
 
+    stream_mode = negotiate_stream_mode(
+        chat_request.stream_mode, request.headers.get(STREAM_MODE_HEADER)
+    )
+
+    session_store = request.app.state.session_store
+    session = await load_session(session_store, chat_request.session_id)
+
     async def response_generator() -> AsyncGenerator[bytes, None]:
         with using_attributes(session_id=chat_request.session_id):
             async for chunk in openai_agents_stream.main(
@@ -26,17 +39,37 @@ async def send_chat_stream(chat_request: ChatRequest):
                 current_agent=chat_request.agent_name,
                 auth_token=chat_request.auth_token,
                 speech_client=None,
+                backend_client=request.app.state.backend_client,
+                stream_mode=stream_mode,
+                session=session,
+                user_info=chat_request.user_info,
             ):
                 # Convert ChatResponse to JSON bytes
-                yield chunk.model_dump_json() + "\n"
+                yield encode_event(chunk)
+
+            if session is not None:
+                await session_store.save(session)
 
-    return StreamingResponse(response_generator(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        response_generator(),
+        media_type="application/x-ndjson",
+        headers={STREAM_MODE_HEADER: stream_mode},
+    )
 
 
 @router.post("/stream_mcp", response_class=StreamingResponse)
-async def send_chat_stream_general(chat_request: ChatRequest):
+async def send_chat_stream_general(chat_request: ChatRequest, request: Request):
     print("Received chat request:", chat_request.message)
 
+    stream_mode = negotiate_stream_mode(
+        chat_request.stream_mode, request.headers.get(STREAM_MODE_HEADER)
+    )
+
+    session_store = request.app.state.session_store
+    session = await load_session(
+        session_store, chat_request.session_id, namespace="mcp"
+    )
+
     async def response_generator() -> AsyncGenerator[bytes, None]:
         with using_attributes(session_id=chat_request.session_id):
             async for chunk in openai_agents_stream_mcp.main_mcp(
@@ -46,8 +79,19 @@ async def send_chat_stream_general(chat_request: ChatRequest):
                 current_agent=chat_request.agent_name,
                 auth_token=chat_request.auth_token,
                 speech_client=None,
+                backend_client=request.app.state.backend_client,
+                stream_mode=stream_mode,
+                session=session,
+                user_info=chat_request.user_info,
             ):
                 # Convert ChatResponse to JSON bytes
-                yield chunk.model_dump_json() + "\n"
+                yield encode_event(chunk)
+
+            if session is not None:
+                await session_store.save(session)
 
-    return StreamingResponse(response_generator(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        response_generator(),
+        media_type="application/x-ndjson",
+        headers={STREAM_MODE_HEADER: stream_mode},
+    )
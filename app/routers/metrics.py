@@ -3,6 +3,10 @@ from fastapi.responses import JSONResponse
 
 from app.schemas.metrics import MetricRequest
 from app.services.arize.arize import ArizeClient
+from app.services.openai.backend_cache import backend_cache
+from app.services.openai.compiled_prompts import prompt_cache_stats
+from app.services.openai.history_compaction import compaction_metrics
+from app.services.openai.openai_agents_stream_mcp import hhai_mcp_pool
 
 router = APIRouter(prefix="/metrics", tags=["Metrics"])
 
@@ -25,3 +29,38 @@ async def metrics_endpoint(request: Request, metric_request: MetricRequest):
     except Exception as e:
         error_response = {"error": str(e)}
         return JSONResponse(content=error_response, status_code=500)
+
+
+@router.get("/cache")
+async def cache_metrics_endpoint():
+    return JSONResponse(content=backend_cache.stats(), status_code=200)
+
+
+@router.get("/prompts")
+async def prompt_metrics_endpoint():
+    return JSONResponse(content=prompt_cache_stats(), status_code=200)
+
+
+@router.get("/sessions")
+async def session_metrics_endpoint(request: Request):
+    return JSONResponse(
+        content=request.app.state.session_store.stats(), status_code=200
+    )
+
+
+@router.get("/history")
+async def history_metrics_endpoint():
+    return JSONResponse(content=compaction_metrics.stats(), status_code=200)
+
+
+@router.get("/mcp")
+async def mcp_metrics_endpoint():
+    return JSONResponse(content=hhai_mcp_pool.stats(), status_code=200)
+
+
+@router.get("/tts")
+async def tts_metrics_endpoint(request: Request):
+    return JSONResponse(
+        content=request.app.state.text_to_speech_service.audio_cache.stats(),
+        status_code=200,
+    )
@@ -1,15 +1,28 @@
-from typing import AsyncGenerator
+import asyncio
+from contextlib import aclosing
+from typing import AsyncGenerator, Optional, TypeVar
 
-from fastapi import APIRouter, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from openinference.instrumentation import using_attributes
+from pydantic import BaseModel, ValidationError
 
-from app.schemas.voice import VoiceRequest
+from app.schemas.chat import STREAM_MODE_HEADER, EventType, negotiate_stream_mode
+from app.schemas.voice import LiveVoiceRequest, VoiceRequest, VoiceResponse
 from app.services.openai import openai_agents_stream
+from app.services.openai.event_encoder import (
+    build_event,
+    encode_audio_frame,
+    encode_event,
+)
+from app.services.openai.session_store import load_session
+from app.services.speech.speech_to_text import SpeechToText
 from app.services.speech.text_to_speech import TextToSpeech
 
 router = APIRouter(prefix="/voice", tags=["Voice"])
 
+RequestModel = TypeVar("RequestModel", bound=BaseModel)
+
 
 @router.post("/stream", response_class=StreamingResponse)
 async def send_chat_stream(voice_request: VoiceRequest, request: Request):
@@ -17,17 +30,256 @@ async def send_chat_stream(voice_request: VoiceRequest, request: Request):
 
     print("Received voice request:", voice_request.message)
 
+    stream_mode = negotiate_stream_mode(
+        voice_request.stream_mode, request.headers.get(STREAM_MODE_HEADER)
+    )
+
+    session_store = request.app.state.session_store
+    session = await load_session(session_store, voice_request.session_id)
+
     async def response_generator() -> AsyncGenerator[bytes, None]:
+        # Closed right away when the client disconnects, which stops the synthesis of the rest of the answer
+        stream = openai_agents_stream.main(
+            request_type=voice_request.request_type,
+            user_msg=voice_request.message,
+            history=voice_request.history,
+            current_agent=voice_request.agent_name,
+            auth_token=voice_request.auth_token,
+            speech_client=tts,
+            backend_client=request.app.state.backend_client,
+            stream_mode=stream_mode,
+            session=session,
+            user_info=voice_request.user_info,
+        )
         with using_attributes(session_id=voice_request.session_id):
-            async for chunk in openai_agents_stream.main(
-                request_type=voice_request.request_type,
-                user_msg=voice_request.message,
-                history=voice_request.history,
-                current_agent=voice_request.agent_name,
-                auth_token=voice_request.auth_token,
-                speech_client=tts,
-            ):
-                # Convert ChatResponse to JSON bytes
-                yield chunk.model_dump_json() + "\n"
-
-    return StreamingResponse(response_generator(), media_type="application/x-ndjson")
+            async with aclosing(stream):
+                async for chunk in stream:
+                    # Convert ChatResponse to JSON bytes
+                    yield encode_event(chunk)
+
+            if session is not None:
+                await session_store.save(session)
+
+    return StreamingResponse(
+        response_generator(),
+        media_type="application/x-ndjson",
+        headers={STREAM_MODE_HEADER: stream_mode},
+    )
+
+
+@router.post("/transcribe")
+async def transcribe(request: Request):
+    """Transcribe the request body, 16 kHz 16-bit mono PCM audio, streamed to the recognizer as it is uploaded."""
+    stt: SpeechToText = request.app.state.speech_to_text_service
+    response, status_code = await stt.transcribe(request.stream())
+    return JSONResponse(content=response, status_code=status_code)
+
+
+async def send_voice_turn(
+    websocket: WebSocket, voice_request: VoiceRequest, audio_sequence: int
+) -> tuple[int, VoiceResponse]:
+    """
+    Answer a voice request over a WebSocket, with binary audio messages as described on /voice/ws.
+    Returns the last audio sequence number used and the terminating event, None if the stream ended without one.
+    """
+    tts: TextToSpeech = websocket.app.state.text_to_speech_service
+    session_store = websocket.app.state.session_store
+
+    stream_mode = negotiate_stream_mode(
+        voice_request.stream_mode, websocket.headers.get(STREAM_MODE_HEADER)
+    )
+    session = await load_session(session_store, voice_request.session_id)
+
+    # Closed right away when sending fails because the client left, which stops the synthesis of the rest of the answer
+    stream = openai_agents_stream.main(
+        request_type=voice_request.request_type,
+        user_msg=voice_request.message,
+        history=voice_request.history,
+        current_agent=voice_request.agent_name,
+        auth_token=voice_request.auth_token,
+        speech_client=tts,
+        backend_client=websocket.app.state.backend_client,
+        stream_mode=stream_mode,
+        session=session,
+        binary_audio=True,
+        user_info=voice_request.user_info,
+    )
+    terminating_event = None
+    with using_attributes(session_id=voice_request.session_id):
+        async with aclosing(stream):
+            async for chunk in stream:
+                if chunk.audio_bytes:
+                    audio_sequence += 1
+                    await websocket.send_bytes(
+                        encode_audio_frame(audio_sequence, chunk.audio_bytes)
+                    )
+                    chunk.audio_sequence = audio_sequence
+                await websocket.send_text(encode_event(chunk))
+                if chunk.event_type == EventType.TERMINATING_EVENT:
+                    terminating_event = chunk
+
+    if session is not None:
+        await session_store.save(session)
+    return audio_sequence, terminating_event
+
+
+async def receive_request(
+    websocket: WebSocket, model: type[RequestModel]
+) -> RequestModel | None:
+    """
+    The next message of the client as a `model` request. None if it is not one, after closing the connection with
+    1003 (unsupported data) for a binary message or 1008 (policy violation) for an invalid request.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("text") is None:
+        await websocket.close(
+            code=status.WS_1003_UNSUPPORTED_DATA,
+            reason=f"Expected a {model.__name__} text message",
+        )
+        return None
+    try:
+        return model.model_validate_json(message["text"])
+    except ValidationError as e:
+        print(f"Error validating {model.__name__}: {e}")
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason=f"Invalid {model.__name__}"
+        )
+        return None
+
+
+@router.websocket("/ws")
+async def voice_websocket(websocket: WebSocket):
+    """
+    Voice stream over a WebSocket, with the audio sent as raw bytes rather than base64 inside the JSON events.
+    - The client sends a VoiceRequest as a text message per turn, several turns can share the connection.
+    - Events are sent as JSON text messages, as on /voice/stream, but without audio_data.
+    - An event with audio is preceded by a binary message of the 4 byte big-endian sequence number and the MP3
+      bytes, and carries that sequence number in audio_sequence. Sequence numbers increase over the connection.
+    - A binary or invalid request closes the connection, see receive_request.
+    """
+    await websocket.accept()
+    audio_sequence = 0
+
+    try:
+        while True:
+            voice_request = await receive_request(websocket, VoiceRequest)
+            if voice_request is None:
+                return
+            print("Received voice request:", voice_request.message)
+            audio_sequence, _ = await send_voice_turn(
+                websocket, voice_request, audio_sequence
+            )
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/live")
+async def live_voice_websocket(websocket: WebSocket):
+    """
+    Full-duplex voice: the microphone audio is recognized while it is being sent, and each phrase is answered as
+    soon as it is recognized, while the user may keep talking.
+    - The client sends a LiveVoiceRequest as the first text message, then the audio as binary messages of 16 kHz
+      16-bit mono PCM, and the text message "end" once the user is done.
+    - Recognized speech is sent back as partial_transcript_event and final_transcript_event events.
+    - Each final transcript is answered as on /voice/ws, one after another. After "end", the connection is closed
+      once the last phrase is answered.
+    - An invalid first message closes the connection before the recognition starts, see receive_request.
+    """
+    await websocket.accept()
+    stt: SpeechToText = websocket.app.state.speech_to_text_service
+    recognition = None
+    tasks: list[asyncio.Task] = []
+    # Carried over from one phrase to the next for clients without a session, set from the LiveVoiceRequest
+    history = agent_name = user_info = None
+    phrases: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    async def receive_audio():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                recognition.write(message["bytes"])
+            elif message.get("text") == "end":
+                recognition.end_audio()
+                return
+
+    async def send_transcripts():
+        try:
+            async for kind, text in recognition:
+                if kind == "error":
+                    print(f"Error recognizing speech: {text}")
+                    continue
+                event_type = (
+                    EventType.FINAL_TRANSCRIPT_EVENT
+                    if kind == "final"
+                    else EventType.PARTIAL_TRANSCRIPT_EVENT
+                )
+                response_dict = {
+                    "event_type": event_type,
+                    "message": text,
+                    "agent_name": agent_name or "triage_agent",
+                }
+                await websocket.send_text(
+                    encode_event(build_event(VoiceResponse, response_dict))
+                )
+                if kind == "final":
+                    phrases.put_nowait(text)
+        except Exception as e:
+            print(f"Error sending transcripts: {e}")
+        finally:
+            # Lets answer_phrases finish the phrases already recognized, even if the recognition failed
+            phrases.put_nowait(None)
+
+    async def answer_phrases():
+        nonlocal history, agent_name, user_info
+        audio_sequence = 0
+        while (text := await phrases.get()) is not None:
+            print("Received voice request:", text)
+            voice_request = VoiceRequest(
+                **live_request.model_dump(
+                    exclude={"history", "agent_name", "user_info"}, exclude_none=True
+                ),
+                message=text,
+                history=history,
+                agent_name=agent_name,
+                user_info=user_info,
+            )
+            audio_sequence, terminating_event = await send_voice_turn(
+                websocket, voice_request, audio_sequence
+            )
+            # Without a terminating event, the next phrase carries on from the same state
+            if terminating_event is not None:
+                history = terminating_event.history
+                agent_name = terminating_event.agent_name
+                user_info = terminating_event.user_info
+
+    try:
+        live_request = await receive_request(websocket, LiveVoiceRequest)
+        if live_request is None:
+            return
+        history = live_request.history
+        agent_name = live_request.agent_name
+        user_info = live_request.user_info
+        recognition = await stt.start_recognition()
+
+        receive_task = asyncio.create_task(receive_audio())
+        answer_task = asyncio.create_task(answer_phrases())
+        tasks = [receive_task, asyncio.create_task(send_transcripts()), answer_task]
+        # Until the client leaves, or the recognition stops (after "end", or on an error) and its phrases are answered
+        await asyncio.wait(
+            {receive_task, answer_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if receive_task.done():
+            receive_task.result()
+        await answer_task
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        if recognition is not None:
+            await recognition.stop()
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import StrEnum
-from typing import Any, Optional
+from typing import Any, ClassVar, Optional
 
 from pydantic import BaseModel
 
@@ -11,6 +11,17 @@ class RequestType(StrEnum):
     VOICE_REQUEST = "voice_request"
 
 
+class StreamMode(StrEnum):
+    # Every delta event carries the full accumulated message as well as the delta
+    FULL = "full"
+    # Delta events carry only the new text, the full message is sent once at the completed text event
+    DELTA = "delta"
+
+
+# Request header overriding the `stream_mode` field, echoed back on the streaming response
+STREAM_MODE_HEADER = "X-Stream-Mode"
+
+
 class RequestBase(BaseModel):
     request_type: RequestType
     message: str
@@ -18,12 +29,27 @@ class RequestBase(BaseModel):
     agent_name: Optional[str] = None
     auth_token: str
     session_id: str = None
+    stream_mode: StreamMode = StreamMode.FULL
+    # user_info of the previous terminating event, sent back by clients without a session
+    user_info: Optional[dict] = None
 
 
 class ChatRequest(RequestBase):
     request_type: RequestType = RequestType.CHAT_REQUEST
 
 
+def negotiate_stream_mode(
+    requested_mode: StreamMode, header_value: Optional[str]
+) -> StreamMode:
+    """The header wins over the request field, unknown header values fall back to the field."""
+    if header_value:
+        try:
+            return StreamMode(header_value.strip().lower())
+        except ValueError:
+            pass
+    return requested_mode
+
+
 class EventType(StrEnum):
     DELTA_TEXT_EVENT = "delta_text_event"
     COMPLETED_TEXT_EVENT = "completed_text_event"
@@ -31,6 +57,10 @@ class EventType(StrEnum):
     TOOL_CALL_EVENT = "tool_call_event"
     TOOL_CALL_OUTPUT_EVENT = "tool_call_output_event"
     TERMINATING_EVENT = "terminating_event"
+    # Speech recognized so far on /voice/live, replaced by the next partial or final transcript
+    PARTIAL_TRANSCRIPT_EVENT = "partial_transcript_event"
+    # A recognized phrase on /voice/live, answered as the user's message
+    FINAL_TRANSCRIPT_EVENT = "final_transcript_event"
 
 
 class DataType(StrEnum):
@@ -47,7 +77,8 @@ class ResponseBase(BaseModel):
     delta_message: Optional[str] = None
     data_type: Optional[DataType] = None
     data: Optional[Any] = None
-    user_info: dict
+    # Only set when the context changed since the previous event, and always on the terminating event
+    user_info: Optional[dict] = None
     response_language: Optional[str] = None
 
 
@@ -64,6 +95,33 @@ class UserInfo:
     current_agent: Optional[str] = None
     interrupted_agent: Optional[str] = None
     user_input_language: Optional[str] = None
+    # Canonical vaccine name of the booking in progress, resolved by vaccine_names.match_vaccine_name or the LLM
+    standardised_vaccine_name: Optional[str] = None
+    # Shared app-scoped BackendClient, never serialised into stream events
+    backend_client: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    # Set whenever a serialised field changes value, new instances start dirty so the first event carries user_info
+    _dirty: ClassVar[bool] = True
+
+    def __setattr__(self, name: str, value: Any):
+        if name != "backend_client" and getattr(self, name, None) != value:
+            object.__setattr__(self, "_dirty", True)
+        object.__setattr__(self, name, value)
+
+    def to_dict(self) -> dict:
+        """Serialisable view of the context for the `user_info` field of stream events."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "backend_client"
+        }
+
+    def pop_changes(self) -> Optional[dict]:
+        """to_dict() if the context changed since the last call, else None."""
+        if not self._dirty:
+            return None
+        object.__setattr__(self, "_dirty", False)
+        return self.to_dict()
 
 
 class BookingDetails(BaseModel):
@@ -1,8 +1,8 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.schemas.chat import RequestBase, RequestType, ResponseBase
+from app.schemas.chat import RequestBase, RequestType, ResponseBase, StreamMode
 
 
 class TranscriptionResponse(BaseModel):
@@ -13,5 +13,20 @@ class VoiceRequest(RequestBase):
     request_type: RequestType = RequestType.VOICE_REQUEST
 
 
+class LiveVoiceRequest(BaseModel):
+    """First message on /voice/live, the user's messages then come from the recognized speech."""
+
+    history: Optional[list] = None
+    agent_name: Optional[str] = None
+    auth_token: str
+    session_id: Optional[str] = None
+    stream_mode: StreamMode = StreamMode.FULL
+    user_info: Optional[dict] = None
+
+
 class VoiceResponse(ResponseBase):
     audio_data: Optional[str] = None
+    # Binary audio transport: the event's audio goes out in a binary frame tagged with this sequence number
+    audio_sequence: Optional[int] = None
+    # Raw audio handed to the binary transport, never serialised
+    audio_bytes: Optional[bytes] = Field(default=None, exclude=True)
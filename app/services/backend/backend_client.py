@@ -0,0 +1,87 @@
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+BACKEND_HTTP_TIMEOUT = float(os.getenv("BACKEND_HTTP_TIMEOUT", "10.0"))
+BACKEND_HTTP2 = os.getenv("BACKEND_HTTP2", "false").lower() == "true"
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "100"))
+BACKEND_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("BACKEND_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+BACKEND_KEEPALIVE_EXPIRY = float(os.getenv("BACKEND_KEEPALIVE_EXPIRY", "30.0"))
+
+
+class BackendClient:
+    """
+    Application-scoped HTTP client shared by all agent tools.
+    It is created once in the app lifespan so that connections to the backend are pooled and kept alive across requests.
+    """
+
+    def __init__(
+        self,
+        timeout: float = BACKEND_HTTP_TIMEOUT,
+        http2: bool = BACKEND_HTTP2,
+        max_connections: int = BACKEND_MAX_CONNECTIONS,
+        max_keepalive_connections: int = BACKEND_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = BACKEND_KEEPALIVE_EXPIRY,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(
+                    "BACKEND_HTTP2 is enabled but the 'h2' package is not installed, falling back to HTTP/1.1."
+                )
+                http2 = False
+
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2,
+            limits=self.limits,
+            transport=transport,
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self.client.is_closed
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.client.get(url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.client.post(url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs):
+        return self.client.stream(method, url, **kwargs)
+
+    async def close(self):
+        """Close all pooled connections, called once when the app shuts down."""
+        if not self.client.is_closed:
+            await self.client.aclose()
+
+
+_default_backend_client: BackendClient | None = None
+
+
+def get_default_backend_client() -> BackendClient:
+    """
+    Lazily created client for code running outside the FastAPI app (e.g. simulate_stream).
+    The app itself always passes the lifespan client through the run context.
+    """
+    global _default_backend_client
+    if _default_backend_client is None or _default_backend_client.is_closed:
+        _default_backend_client = BackendClient()
+    return _default_backend_client
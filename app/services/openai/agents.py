@@ -1,16 +1,20 @@
+import json
 import os
 
 from dotenv import load_dotenv
 
 from agents import (
     Agent,
+    Handoff,
     ModelSettings,
     RunContextWrapper,
     handoff,
     set_default_openai_key,
     set_tracing_disabled,
 )
+from agents.strict_schema import ensure_strict_json_schema
 from app.schemas.chat import UserInfo
+from app.services.openai.compiled_prompts import compiled_prompt
 from app.services.openai.tools import (
     cancel_appointment_tool,
     change_appointment_tool,
@@ -27,6 +31,7 @@ from app.services.openai.tools import (
     recommend_vaccines_tool,
     standardised_vaccine_name_tool,
 )
+from app.services.openai.vaccine_names import match_vaccine_name
 
 # --------------------------
 # Load environment variables
@@ -38,40 +43,22 @@ set_tracing_disabled(True)
 set_default_openai_key(f"{OPENAI_API_KEY}")
 
 
-POLYCLINIC_NAMES = """
-List of Polyclinic Names in English, Chinese, Malay and Tamil:
-1. Ang Mo Kio Polyclinic | 宏茂桥综合诊疗所 | Poliklinik Ang Mo Kio | ஆங் மோ கியோ பல்நோக்கு மருத்துவமனை
-2. Geylang Polyclinic | 芽笼综合诊疗所 | Poliklinik Geylang | கேலாங் பல்நோக்கு மருத்துவமனை
-3. Hougang Polyclinic | 后港综合诊疗所 | Poliklinik Hougang | ஹவ்காங் பல்நோக்கு மருத்துவமனை
-4. Kallang Polyclinic | 加冷综合诊疗所 | Poliklinik Kallang | காலாங் பல்நோக்கு மருத்துவமனை
-5. Khatib Polyclinic | 卡迪综合诊疗所 | Poliklinik Khatib | காடிப் பல்நோக்கு மருத்துவமனை
-6. Toa Payoh Polyclinic | 大巴窑综合诊疗所 | Poliklinik Toa Payoh | தோவா பயோ பல்நோக்கு மருத்துவமனை
-7. Sembawang Polyclinic | 三巴旺综合诊疗所 | Poliklinik Sembawang | செம்பவாங் பல்நோக்கு மருத்துவமனை
-8. Woodlands Polyclinic | 兀兰综合诊疗所 | Poliklinik Woodlands | வுட்லண்ட்ஸ் பல்நோக்கு மருத்துவமனை
-9. Yishun Polyclinic | 义顺综合诊疗所 | Poliklinik Yishun | யிஷூன் பல்நோக்கு மருத்துவமனை
-10. Bukit Batok Polyclinic | 武吉巴督综合诊疗所 | Poliklinik Bukit Batok | புக்கிட் பாட்டோக் பல்நோக்கு மருத்துவமனை
-11. Jurong Polyclinic | 裕廊综合诊疗所 | Poliklinik Jurong | ஜூரோங் பல்நோக்கு மருத்துவமனை
-12. Pioneer Polyclinic | 先驱综合诊疗所 | Poliklinik Pioneer | பைனியர் பல்நோக்கு மருத்துவமனை
-13. Choa Chu Kang Polyclinic | 蔡厝港综合诊疗所 | Poliklinik Choa Chu Kang | சோவா சூ காங் பல்நோக்கு மருத்துவமனை
-14. Clementi Polyclinic | 金文泰综合诊疗所 | Poliklinik Clementi | கிளிமெண்டி பல்நோக்கு மருத்துவமனை
-15. Queenstown Polyclinic | 女皇镇综合诊疗所 | Poliklinik Queenstown | குவீன்ஸ்டவுன் பல்நோக்கு மருத்துவமனை
-16. Bukit Panjang Polyclinic | 武吉班让综合诊疗所 | Poliklinik Bukit Panjang | புக்கிட் பாஞ்சாங் பல்நோக்கு மருத்துவமனை
-17. Bedok Polyclinic | 勿洛综合诊疗所 | Poliklinik Bedok | பெடோக் பல்நோக்கு மருத்துவமனை
-18. Bukit Merah Polyclinic | 红山综合诊疗所 | Poliklinik Bukit Merah | புக்கிட் மேரா பல்நோக்கு மருத்துவமனை
-19. Marine Parade Polyclinic | 海军部综合诊疗所 | Poliklinik Marine Parade | மரின் பரேட் பல்நோக்கு மருத்துவமனை
-20. Outram Polyclinic | 欧南综合诊疗所 | Poliklinik Outram | அவுட்ராம் பல்நோக்கு மருத்துவமனை
-21. Pasir Ris Polyclinic | 白沙综合诊疗所 | Poliklinik Pasir Ris | பாசிர் ரிஸ் பல்நோக்கு மருத்துவமனை
-22. Sengkang Polyclinic | 盛港综合诊疗所 | Poliklinik Sengkang | செங்காங் பல்நோக்கு மருத்துவமனை
-23. Tampines Polyclinic | 淡滨尼综合诊疗所 | Poliklinik Tampines | டாம்பின்ஸ் பல்நோக்கு மருத்துவமனை
-24. Punggol Polyclinic | 榜鹅综合诊疗所 | Poliklinik Punggol | புங்கோல் பல்நோக்கு மருத்துவமனை
-25. Eunos Polyclinic | 友诺士综合诊疗所 | Poliklinik Eunos | யூனோஸ் பல்நோக்கு மருத்துவமனை
-26. Tampines North Polyclinic | 淡滨尼北综合诊疗所 | Poliklinik Tampines North | டாம்பின்ஸ் நார்த் பல்நோக்கு மருத்துவமனை
+POLYCLINIC_NAME_INSTRUCTIONS = """
+Users may name a polyclinic in English, Chinese, Malay or Tamil. Pass the name as the user wrote it to your tools; the tools resolve it to the official English name.
+When replying in another language, include the English name of the polyclinic returned by the tools, e.g. 欧南综合诊疗所 (Outram Polyclinic).
 """
 
 
+def requested_vaccine_prompt(context: UserInfo) -> str:
+    if context.standardised_vaccine_name:
+        return f"The standardised english name of the vaccine requested by the user is: {context.standardised_vaccine_name}."
+    return "Look at the output from the standardised_vaccine_name_tool for the vaccine type requested by user."
+
+
 # --------------------------
 # Agents Definition
 # --------------------------
+@compiled_prompt("user_input_language")
 def general_questions_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -92,6 +79,7 @@ general_questions_agent = Agent(
 )
 
 
+@compiled_prompt("user_input_language")
 def vaccination_records_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -114,6 +102,7 @@ vaccination_records_agent = Agent[UserInfo](
 )
 
 
+@compiled_prompt("date", "user_input_language")
 def recommender_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -128,9 +117,7 @@ def recommender_agent_prompt(
     4. Use the information from the tools and today's date, to help recommend the user which vaccines they should take soon.
     5. Skip this step if the previous agent if you are called by the triage_agent. Tell the user to specify clearly one of the vaccines from recommended list for booking.
 
-    You should understand the location of polyclinic in English, Chinese, or Tamil, and pass the argument as English to your tools.
-    You should also include the English of the polyclinic when it is asked in other Languages, e.g. 欧南综合诊疗所(Outram), 兀兰 (Woodlands) etc.
-    {POLYCLINIC_NAMES}
+    {POLYCLINIC_NAME_INSTRUCTIONS}
     You should reply in the language the user requested; if there is no requested language, follow the detected langauge: {context.user_input_language}.
     """
 
@@ -147,6 +134,7 @@ recommender_agent = Agent[UserInfo](
 )
 
 
+@compiled_prompt("date", "user_input_language", "standardised_vaccine_name")
 def check_available_slots_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -158,6 +146,7 @@ def check_available_slots_agent_prompt(
 
         Else, follow the steps in order:
         1. **Gathering inputs for get_available_slots_tool**: Look at function call result from previous agent and use that as the polyclinic input.
+        Use the standardised english vaccine name as the vaccine_name input. {requested_vaccine_prompt(context)}
         Look at chat history. If the user specified a date or date range (e.g. find slots next week), use that as inputs for the start_date and end_date parameters to return slots. Else, leave those parameters blank.
         2. **Get slots from polyclinic**: Use the get_available_slots_tool to find available slots at the polyclinic.
         3. If the tool output returns any available slots, immediately reply the user: "I found some available slots for you. Here are the details: ___ . Please choose one of the slots or let me know if you would like to check for other dates."
@@ -168,9 +157,7 @@ def check_available_slots_agent_prompt(
         Do not reply queries unrelated to appointment slots, immediately handoff to the interrupt_handler_agent to handle such queries instead.
         If the user chooses a slot in their reply, handoff to the manage_appointment_agent.
 
-        You should understand the location of polyclinic in English, Chinese, or Tamil, and pass the argument as English to your tools.
-        You should also include the English of the polyclinic when it is asked in other Languages, e.g. 欧南综合诊疗所(Outram), 兀兰 (Woodlands) etc.
-        {POLYCLINIC_NAMES}
+        {POLYCLINIC_NAME_INSTRUCTIONS}
         You should reply in the language the user requested; if there is no requested language, follow the detected langauge: {context.user_input_language}.
         """
 
@@ -184,6 +171,7 @@ check_available_slots_agent = Agent(
 
 
 # TODO: Add validity check for polyclinic name
+@compiled_prompt("user_input_language")
 def identify_clinic_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -198,16 +186,14 @@ def identify_clinic_agent_prompt(
         Follow the steps in order:
         1. Look at the chat history:
             - If you cannot find any location or polyclinic name (in all English or other languages) in previous user inputs, use the get_clinics_near_home_tool, respond "Here are some clinics near your home: <tool output> . Please choose one of the clinics or let me know if you would like to check for other locations." and stop.
-            - If you found a polyclinic name (in all English or other languages) mentioned in previous user inputs, give the **english version** of the clinic name you found as input to the get_clinic_name_response_helper_tool and handoff to the check_available_slots_agent.
+            - If you found a polyclinic name (in all English or other languages) mentioned in previous user inputs, give the clinic name you found as input to the get_clinic_name_response_helper_tool and handoff to the check_available_slots_agent.
             - If you found a location name that is not part of the polyclinic name (in all English or other languages) mentioned in previous user inputs, give the **english version** location name you found as input to the get_clinics_near_location_tool and respond "Here are some clinics near <location selected>: <tool output> . Please choose one of the clinics or let me know if you would like to check for other locations." and stop.
 
         Handling user replies:
         If the user selects a polyclinic (either by selecting an option you provided or stating a polyclinic name), handoff to the check_available_slots_agent.
         If the user's reply is unrelated to the question you asked, immediately handoff to the interrupt_handler_agent.
 
-        You should understand the location of polyclinic in English, Chinese, or Tamil, and when you are using any of the tools, you **must** pass the arguments of locations and vaccine names as its **standard English name as stated below**.
-        When you are using other language for polyclinic, you should also include the English of the polyclinic when it is asked in other Languages, e.g. 欧南综合诊疗所(Outram), 兀兰 (Woodlands) etc.
-        {POLYCLINIC_NAMES}
+        {POLYCLINIC_NAME_INSTRUCTIONS}
 
         You should reply in the language the user requested in the query; if there is no requested language, follow the detected langauge: {context.user_input_language}.
         """
@@ -227,6 +213,7 @@ identify_clinic_agent = Agent(
 )
 
 
+@compiled_prompt("date", "user_input_language", "standardised_vaccine_name")
 def vaccination_history_check_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -238,7 +225,7 @@ def vaccination_history_check_agent_prompt(
         Follow the steps in order:
         1. Skip this step if you are being called by the recommended_vaccine_check_agent. See if the user is giving a reply to a question asked by you previously.
           - If the reply is affirmative, handoff to identify_clinic_agent. If the reply is not affirmative, then handoff to triage_agent.
-        2. Use the get_latest_vaccination_tool with the standardised english vaccine name from the standardised_vaccine_name_tool as input.
+        2. Use the get_latest_vaccination_tool with the standardised english vaccine name as input. {requested_vaccine_prompt(context)}
           - If the tool returns a past record, use the record date, today's date and the recommended frequencies of the vaccine inform the user whether or not it is advised for them to proceed with their current new booking. Ask them to decide if they would like to continue the booking.
           - If the tool returns an empty list, then handoff to identify_clinic_agent.
 
@@ -256,6 +243,7 @@ vaccination_history_check_agent = Agent(
 )
 
 
+@compiled_prompt("user_input_language", "standardised_vaccine_name")
 def recommended_vaccine_check_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -264,7 +252,7 @@ def recommended_vaccine_check_agent_prompt(
         You are part of a team of agents handling vaccination booking.
         Your task in this team is to check if the user is eligible for the vaccine they would like to get.
         Follow the steps in order:
-        1. Look at the output from the handle_vaccine_names_agent for the vaccine type requested by user.
+        1. {requested_vaccine_prompt(context)}
         2. Use the recommend_vaccines_tool to get the vaccines that the user should be taking.
           - If the vaccine requested by the user is not within the list of recommended vaccines, tell the user to choose a vaccine from the list instead.
           - If it is, then continue to handoff to the vaccination_history_check_agent.
@@ -283,6 +271,7 @@ recommended_vaccine_check_agent = Agent(
 )
 
 
+@compiled_prompt("user_input_language", "standardised_vaccine_name")
 def double_booking_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -292,7 +281,7 @@ def double_booking_agent_prompt(
         Your task in this team is to check if the the user is trying to get a vaccine that they already have an existing upcoming appointment for.
         You only have logic about upcoming appointments.
         Follow the steps in order:
-        1. Look at the output from the standardised_vaccine_name_tool for the vaccine type requested by user.
+        1. {requested_vaccine_prompt(context)}
         2. Use the get_upcoming_appointments_tool to see the appointments the user has previously booked.
           - If the vaccine types of upcoming appointments do not match the requested type, handoff to recommended_vaccine_check_agent.
           - If the vaccine types of those appointments match the requested vaccine type, tell the user about the existing appointment they have for the requested vaccine.
@@ -300,9 +289,7 @@ def double_booking_agent_prompt(
             - If the user wants to cancel the existing appointment, handoff to manage_appointment_agent.
             - If the user wants to keep the existing appointment, handoff to triage_agent.
 
-        You should understand the location of polyclinic in English, Chinese, or Tamil, and when you are using any of the tools, you **must** pass the arguments of locations and vaccine names as its **standard English name as stated below**.
-        When you are using other language for polyclinic, you should also include the English of the polyclinic when it is asked in other Languages, e.g. 欧南综合诊疗所(Outram), 兀兰 (Woodlands) etc.
-        {POLYCLINIC_NAMES}
+        {POLYCLINIC_NAME_INSTRUCTIONS}
 
         If the user's reply is unrelated to the question you asked, immediately handoff to the interrupt_handler_agent.
         You should reply in the language the user requested in the query; if there is no requested language, follow the detected langauge: {context.user_input_language}.
@@ -348,6 +335,52 @@ handle_vaccine_names_agent = Agent(
 )
 
 
+def book_vaccine_handoff(
+    double_booking_agent: Agent[UserInfo], vaccine_names_agent: Agent[UserInfo]
+) -> Handoff:
+    """
+    Handoff to book a new appointment, which resolves the requested vaccine locally and goes straight to
+    `double_booking_agent` when the match is confident. Low confidence matches fall back to the `vaccine_names_agent` LLM.
+    """
+
+    async def on_book_vaccine_handoff(
+        context_wrapper: RunContextWrapper[UserInfo], input_json: str
+    ) -> Agent[UserInfo]:
+        context: UserInfo = context_wrapper.context.context
+        try:
+            requested_vaccine = json.loads(input_json or "{}").get(
+                "requested_vaccine", ""
+            )
+        except json.JSONDecodeError:
+            requested_vaccine = ""
+
+        match = match_vaccine_name(requested_vaccine)
+        if match.is_confident:
+            context.standardised_vaccine_name = match.name
+            return double_booking_agent
+        context.standardised_vaccine_name = None
+        return vaccine_names_agent
+
+    return Handoff(
+        tool_name=Handoff.default_tool_name(vaccine_names_agent),
+        tool_description="Handoff to book a new vaccination appointment.",
+        input_json_schema={
+            "type": "object",
+            "properties": {
+                "requested_vaccine": {
+                    "type": "string",
+                    "description": "The vaccine the user wants to book, as written by the user, e.g. flu vaccine, 水痘疫苗.",
+                }
+            },
+            "required": ["requested_vaccine"],
+            "additionalProperties": False,
+        },
+        on_invoke_handoff=on_book_vaccine_handoff,
+        agent_name=vaccine_names_agent.name,
+    )
+
+
+@compiled_prompt("user_input_language")
 def manage_appointment_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -381,6 +414,7 @@ manage_appointment_agent = Agent(
 )
 
 
+@compiled_prompt("user_input_language")
 def modify_existing_appointment_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -398,9 +432,7 @@ def modify_existing_appointment_agent_prompt(
 
         If the user's reply is unrelated to the question you asked, immediately handoff to the interrupt_handler_agent.
 
-        You should understand the location of polyclinic in English, Chinese, or Tamil, and when you are using any of the tools, you **must** pass the arguments of locations and vaccine names as its **standard English name as stated below**.
-        When you are using other language for polyclinic, you should also include the English of the polyclinic when it is asked in other Languages, e.g. 欧南综合诊疗所(Outram), 兀兰 (Woodlands) etc.
-        {POLYCLINIC_NAMES}
+        {POLYCLINIC_NAME_INSTRUCTIONS}
 
         You should reply in the language the user requested in the query; if there is no requested language, follow the detected langauge: {context.user_input_language}.
         """
@@ -416,6 +448,7 @@ modify_existing_appointment_agent = Agent(
 )
 
 
+@compiled_prompt("user_input_language")
 def appointments_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -424,7 +457,7 @@ def appointments_agent_prompt(
         # System context\nYou are part of a multi-agent system called the Agents SDK, designed to make agent coordination and execution easy. Agents uses two primary abstraction: **Agents** and **Handoffs**. An agent encompasses instructions and tools and can hand off a conversation to another agent when appropriate. Handoffs are achieved by calling a handoff function, generally named `transfer_to_<agent_name>`. Transfers between agents are handled seamlessly in the background; do not mention or draw attention to these transfers in your conversation with the user.\n
 
         Your task is to decide which agent to handoff to, do not ask user anything.
-        If the user wants to book a new slot, handoff to handle_vaccine_names_agent.
+        If the user wants to book a new slot, handoff to handle_vaccine_names_agent with the vaccine requested by the user.
         If the user is asking about rescheduling or cancelling an existing booking, handoff to modify_existing_appointment_agent.
 
         You should reply in the language the user requested in the query; if there is no requested language, follow the detected langauge: {context.user_input_language}.
@@ -435,13 +468,16 @@ appointments_agent = Agent[UserInfo](
     name="appointments_agent",
     instructions=appointments_agent_prompt,
     handoffs=[
-        handle_vaccine_names_agent,  # starts flow to get location and vaccine name.
+        book_vaccine_handoff(
+            double_booking_check_agent, handle_vaccine_names_agent
+        ),  # starts flow to get location and vaccine name.
         modify_existing_appointment_agent,
     ],
     model="gpt-4o-mini",
 )
 
 
+@compiled_prompt("user_input_language")
 def triage_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
@@ -471,14 +507,20 @@ triage_agent = Agent(
 )
 
 
+@compiled_prompt("interrupted_agent", "user_input_language")
 def interrupt_handler_agent_prompt(
     context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
 ) -> str:
     context: UserInfo = context_wrapper.context.context
+    interrupted_agent = (
+        f"the {context.interrupted_agent}"
+        if context.interrupted_agent
+        else "the agent that asked the last question in the chat history"
+    )
     return f"""
         You are a helpful healthcare agent responsible for handling interruptions during the vaccination booking process.
         Review the chat history and recognize that the user did not respond to the previous agent's question, and instead gave an unrelated reply (an interruption).
-        The previous agent who was handling the user before the interruption is **{context.interrupted_agent}**.
+        The previous agent who was handling the user before the interruption is **{interrupted_agent}**.
         Your task is to address this interruption.
 
         Follow the steps carefully:
@@ -493,7 +535,7 @@ def interrupt_handler_agent_prompt(
             - Do not attempt to process their response — just ask.
 
         Handling user replies:
-            - If the user gives an affirmative response to continue, **handoff to the {context.interrupted_agent}** to let it pickup from where it left off.
+            - If the user gives an affirmative response to continue, **handoff back to {interrupted_agent}** with the transfer_back_to_interrupted_agent tool, to let it pickup from where it left off.
             - If the user gives a negative response or an irrelevant reply, handoff to the triage_agent.
 
         You should reply in the language the user requested in the query; if there is no requested language, follow the detected langauge: {context.user_input_language}.
@@ -545,19 +587,50 @@ current_agent_mapping = {
     "modify_existing_appointment_agent": modify_existing_appointment_agent,
 }
 
+# Agents the local intent router can start a conversation at, instead of triage_agent
+intent_agent_mapping = {
+    "double_booking_check_agent": double_booking_check_agent,
+    "modify_existing_appointment_agent": modify_existing_appointment_agent,
+    "recommender_agent": recommender_agent,
+    "vaccination_records_agent": vaccination_records_agent,
+}
+
 
 # -----------------------------------------
 # Handle handoff to interrupt_handler_agent
 # -----------------------------------------
 async def on_interrupt_handoff(wrapper: RunContextWrapper[UserInfo]):
-    # Set the current agent that is being interrupted as the interrupted agent
-    interrupted_agent_name = wrapper.context.context.current_agent
-    wrapper.context.context.interrupted_agent = interrupted_agent_name
-    # Reset the handoffs for interrupt_handler_agent to handle for specific interruption
-    interrupt_handler_agent.handoffs = [
-        triage_agent,
-        current_agent_mapping.get(interrupted_agent_name),
-    ]
+    # Set the current agent that is being interrupted as the interrupted agent, in this run's own context
+    wrapper.context.context.interrupted_agent = wrapper.context.context.current_agent
+
+
+def interrupted_agent_handoff(
+    agent_mapping: dict[str, Agent[UserInfo]], fallback_agent: Agent[UserInfo]
+) -> Handoff:
+    """
+    Handoff from the interrupt handler back to the interrupted agent, resolved per run from `UserInfo.interrupted_agent`,
+    so concurrent conversations never share a return target. Falls back to `fallback_agent` if it is unknown.
+    """
+
+    async def on_return_handoff(
+        context_wrapper: RunContextWrapper[UserInfo], input_json: str
+    ) -> Agent[UserInfo]:
+        context: UserInfo = context_wrapper.context.context
+        return agent_mapping.get(context.interrupted_agent, fallback_agent)
+
+    return Handoff(
+        tool_name="transfer_back_to_interrupted_agent",
+        tool_description="Handoff back to the agent that was handling the user before the interruption.",
+        input_json_schema=ensure_strict_json_schema({}),
+        on_invoke_handoff=on_return_handoff,
+        agent_name="interrupted_agent",
+    )
+
+
+# The interrupt handler can go back to triage or to the interrupted agent of its own run
+interrupt_handler_agent.handoffs.extend(
+    [triage_agent, interrupted_agent_handoff(current_agent_mapping, triage_agent)]
+)
 
 
 # Add handoff to interrupt_handler_agent
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+
+# --------------------------
+# Load environment variables
+# --------------------------
+BACKEND_CACHE_LONG_TTL = float(os.getenv("BACKEND_CACHE_LONG_TTL", "3600"))
+BACKEND_CACHE_SHORT_TTL = float(os.getenv("BACKEND_CACHE_SHORT_TTL", "30"))
+BACKEND_CACHE_MAX_ENTRIES = int(os.getenv("BACKEND_CACHE_MAX_ENTRIES", "10000"))
+
+# TTL tier (in seconds) per cached resource type, None means the resource never changes
+RESOURCE_TTLS: dict[str, Optional[float]] = {
+    "recommendations": BACKEND_CACHE_LONG_TTL,  # /vaccines/recommendations
+    "user_profile": BACKEND_CACHE_LONG_TTL,  # /users
+    "records": BACKEND_CACHE_SHORT_TTL,  # /records and /records/{id}
+    "booking_slot": None,  # /bookings/{id}
+}
+
+
+class BackendResponseCache:
+    """
+    Per-user cache of raw backend response bodies, keyed by a hash of the auth token plus the requested resource.
+    Entries expire according to the TTL tier of their resource type and the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, Optional[float]] = RESOURCE_TTLS,
+        max_entries: int = BACKEND_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttls = ttls
+        self.max_entries = max_entries
+        # (user_key, resource_type, resource) -> (expires_at, response_text)
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, str]] = (
+            OrderedDict()
+        )
+        # user_key -> resource types to drop at the user's next turn, see expect_change
+        self._expected_changes: OrderedDict[str, set[str]] = OrderedDict()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    @staticmethod
+    def user_key(auth_header: dict | None) -> str:
+        token = (auth_header or {}).get("Authorization", "")
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(
+        self, auth_header: dict | None, resource_type: str, resource: str
+    ) -> str | None:
+        key = (self.user_key(auth_header), resource_type, resource)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses[resource_type] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits[resource_type] += 1
+        return entry[1]
+
+    def set(
+        self, auth_header: dict | None, resource_type: str, resource: str, text: str
+    ) -> None:
+        ttl = self.ttls[resource_type]
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+        key = (self.user_key(auth_header), resource_type, resource)
+        self._entries[key] = (expires_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, auth_header: dict | None, *resource_types: str) -> int:
+        """
+        Drop the user's cached entries of the given resource types (all types if none given).
+        Returns the number of entries removed.
+        """
+        user_key = self.user_key(auth_header)
+        stale_keys = [
+            key
+            for key in self._entries
+            if key[0] == user_key and (not resource_types or key[1] in resource_types)
+        ]
+        for key in stale_keys:
+            del self._entries[key]
+        return len(stale_keys)
+
+    def expect_change(self, auth_header: dict | None, *resource_types: str) -> None:
+        """
+        Mark the user's resources of the given types as about to change outside this service, e.g. an appointment
+        prepared by a tool and confirmed by the client after the turn. They are dropped by apply_expected_changes.
+        """
+        user_key = self.user_key(auth_header)
+        self._expected_changes.setdefault(user_key, set()).update(resource_types)
+        self._expected_changes.move_to_end(user_key)
+        # Marks of users who never came back are dropped, their entries have expired by then
+        while len(self._expected_changes) > self.max_entries:
+            self._expected_changes.popitem(last=False)
+
+    def apply_expected_changes(self, auth_header: dict | None) -> int:
+        """
+        Drop the entries marked by expect_change, called at the start of each turn of the user.
+        Returns the number of entries removed.
+        """
+        resource_types = self._expected_changes.pop(self.user_key(auth_header), None)
+        if not resource_types:
+            return 0
+        return self.invalidate(auth_header, *resource_types)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expected_changes.clear()
+        self.hits.clear()
+        self.misses.clear()
+
+    def stats(self) -> dict:
+        resource_types = sorted(set(self.hits) | set(self.misses))
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "by_resource": {
+                resource_type: {
+                    "hits": self.hits[resource_type],
+                    "misses": self.misses[resource_type],
+                }
+                for resource_type in resource_types
+            },
+        }
+
+
+backend_cache = BackendResponseCache()
@@ -0,0 +1,261 @@
+import asyncio
+import heapq
+import json
+import math
+import os
+import time
+from typing import Optional
+
+from app.services.backend.backend_client import BackendClient
+
+# --------------------------
+# Load environment variables
+# --------------------------
+BACKEND_MAIN_API_URL = os.getenv("BACKEND_MAIN_API_URL")
+CLINIC_INDEX_REFRESH_SECONDS = float(os.getenv("CLINIC_INDEX_REFRESH_SECONDS", "3600"))
+# Number of clinics pulled per clinic type when (re)building the index
+CLINIC_INDEX_FETCH_LIMIT = int(os.getenv("CLINIC_INDEX_FETCH_LIMIT", "5000"))
+CLINIC_INDEX_RETRY_SECONDS = float(os.getenv("CLINIC_INDEX_RETRY_SECONDS", "60"))
+
+EARTH_RADIUS_KM = 6371.0088
+# Centre of Singapore, the origin used to pull every clinic from /clinics/nearest-by-location
+SINGAPORE_CENTROID = (1.3521, 103.8198)
+# Far ends of Singapore (Tuas, Changi, Woodlands, Sentosa): an index pulled from the centroid but cut short by the
+# backend misses the clinics nearest to them
+SINGAPORE_EDGE_POINTS = [
+    (1.3200, 103.6400),
+    (1.3600, 103.9900),
+    (1.4400, 103.7860),
+    (1.2500, 103.8250),
+]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    """
+    Points on the unit sphere: the straight-line (chord) distance between them grows with the haversine distance,
+    so a plain euclidean KD-tree returns the same nearest neighbours.
+    """
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
+def clinic_coordinates(clinic: dict) -> tuple[float, float] | None:
+    location = clinic.get("address") or clinic
+    try:
+        return float(location["latitude"]), float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class KDTree:
+    """
+    Minimal 3-d KD-tree over unit vectors, supporting k-nearest neighbour queries.
+    Each node is (point, item_index, left, right).
+    """
+
+    def __init__(self, points: list[tuple[float, float, float]]) -> None:
+        self.size = len(points)
+        self.root = self._build(list(enumerate(points)), depth=0)
+
+    def _build(self, indexed_points: list, depth: int):
+        if not indexed_points:
+            return None
+        axis = depth % 3
+        indexed_points.sort(key=lambda indexed_point: indexed_point[1][axis])
+        median = len(indexed_points) // 2
+        item_index, point = indexed_points[median]
+        return (
+            point,
+            item_index,
+            self._build(indexed_points[:median], depth + 1),
+            self._build(indexed_points[median + 1 :], depth + 1),
+        )
+
+    def query(self, target: tuple[float, float, float], k: int) -> list[int]:
+        """Returns the item indices of the k nearest points, closest first."""
+        # Max-heap of (-squared distance, item_index) holding the best k so far
+        best: list[tuple[float, int]] = []
+
+        def search(node, depth: int):
+            if node is None:
+                return
+            point, item_index, left, right = node
+            distance = (
+                (point[0] - target[0]) ** 2
+                + (point[1] - target[1]) ** 2
+                + (point[2] - target[2]) ** 2
+            )
+            if len(best) < k:
+                heapq.heappush(best, (-distance, item_index))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, item_index))
+
+            axis = depth % 3
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near, depth + 1)
+            if len(best) < k or diff * diff < -best[0][0]:
+                search(far, depth + 1)
+
+        search(self.root, 0)
+        return [item_index for _, item_index in sorted(best, reverse=True)]
+
+
+class ClinicSpatialIndex:
+    """
+    In-process nearest clinic lookup, one KD-tree per clinic type ("polyclinic", "gp").
+    The index is refreshed from the backend in the background once it is older than CLINIC_INDEX_REFRESH_SECONDS.
+    Queries return None when the clinic type has not been indexed yet, so callers can fall back to the backend.
+    A refresh that may have been cut short by the backend is refused, see `refresh`.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float = CLINIC_INDEX_REFRESH_SECONDS,
+        fetch_limit: int = CLINIC_INDEX_FETCH_LIMIT,
+    ) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.fetch_limit = fetch_limit
+        self.clinics: dict[str, list[dict]] = {}
+        self.trees: dict[str, KDTree] = {}
+        self.next_refresh_at: dict[str, float] = {}
+        self._refresh_tasks: dict[str, asyncio.Task] = {}
+
+    def load(self, clinic_type: str, clinics: list[dict]):
+        """(Re)build the KD-tree of a clinic type from a list of backend clinic objects."""
+        indexed_clinics, points = [], []
+        for clinic in clinics:
+            coordinates = clinic_coordinates(clinic)
+            if coordinates is None:
+                continue
+            indexed_clinics.append(clinic)
+            points.append(to_unit_vector(*coordinates))
+
+        self.clinics[clinic_type] = indexed_clinics
+        self.trees[clinic_type] = KDTree(points)
+        self.next_refresh_at[clinic_type] = time.monotonic() + self.refresh_seconds
+
+    def nearest(
+        self, clinic_type: str, latitude: float, longitude: float, limit: int
+    ) -> list[dict] | None:
+        tree = self.trees.get(clinic_type)
+        if tree is None or tree.size == 0:
+            return None
+
+        nearest_clinics = []
+        for item_index in tree.query(to_unit_vector(latitude, longitude), limit):
+            clinic = self.clinics[clinic_type][item_index]
+            if "distance" in clinic:
+                # Distance from the query point, not from the point the index was pulled from
+                clinic = {
+                    **clinic,
+                    "distance": round(
+                        haversine_km(latitude, longitude, *clinic_coordinates(clinic)),
+                        3,
+                    ),
+                }
+            nearest_clinics.append(clinic)
+        return nearest_clinics
+
+    def is_stale(self, clinic_type: str) -> bool:
+        return time.monotonic() >= self.next_refresh_at.get(clinic_type, 0.0)
+
+    @staticmethod
+    async def fetch_nearest(
+        clinic_type: str,
+        backend_client: BackendClient,
+        auth_header: Optional[dict],
+        coordinates: tuple[float, float],
+        clinic_limit: int,
+    ) -> list[dict]:
+        response = await backend_client.get(
+            f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-location",
+            headers=auth_header,
+            params={
+                "latitude": coordinates[0],
+                "longitude": coordinates[1],
+                "clinic_type": clinic_type,
+                "clinic_limit": clinic_limit,
+            },
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error: {response.status_code} - {response.text}")
+        return json.loads(response.text)
+
+    async def refresh(
+        self,
+        clinic_type: str,
+        backend_client: BackendClient,
+        auth_header: Optional[dict],
+    ):
+        """
+        Pull every clinic of the type, the nearest `fetch_limit` to the centroid, and rebuild its KD-tree.
+        The clinics are only indexed if they are complete, otherwise the previous index (or the backend) keeps
+        answering: there must be fewer than `fetch_limit` of them, and the clinic the backend finds nearest to each
+        of SINGAPORE_EDGE_POINTS must be among them, which fails if the backend caps clinic_limit.
+        """
+        clinics = await self.fetch_nearest(
+            clinic_type,
+            backend_client,
+            auth_header,
+            SINGAPORE_CENTROID,
+            self.fetch_limit,
+        )
+        if len(clinics) >= self.fetch_limit:
+            raise Exception(
+                f"Got the limit of {self.fetch_limit} {clinic_type} clinics, there may be more"
+            )
+
+        indexed_coordinates = set(map(clinic_coordinates, clinics))
+        edge_clinics = await asyncio.gather(
+            *(
+                self.fetch_nearest(clinic_type, backend_client, auth_header, point, 1)
+                for point in SINGAPORE_EDGE_POINTS
+            )
+        )
+        for point, nearest_clinics in zip(SINGAPORE_EDGE_POINTS, edge_clinics):
+            if nearest_clinics and (
+                clinic_coordinates(nearest_clinics[0]) not in indexed_coordinates
+            ):
+                raise Exception(
+                    f"Got {len(clinics)} {clinic_type} clinics, missing the one nearest to {point}"
+                )
+        self.load(clinic_type, clinics)
+
+    def maybe_refresh(
+        self,
+        clinic_type: str,
+        backend_client: BackendClient,
+        auth_header: Optional[dict],
+    ):
+        """Schedule a background refresh of a stale clinic type, at most one in flight per type."""
+        task = self._refresh_tasks.get(clinic_type)
+        if not self.is_stale(clinic_type) or (task and not task.done()):
+            return
+
+        async def refresh_in_background():
+            try:
+                await self.refresh(clinic_type, backend_client, auth_header)
+            except Exception as e:
+                print(f"Error refreshing {clinic_type} clinic index: {e}")
+                self.next_refresh_at[clinic_type] = (
+                    time.monotonic() + CLINIC_INDEX_RETRY_SECONDS
+                )
+
+        self._refresh_tasks[clinic_type] = asyncio.create_task(refresh_in_background())
+
+
+clinic_index = ClinicSpatialIndex()
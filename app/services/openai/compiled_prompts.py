@@ -0,0 +1,59 @@
+import os
+from functools import lru_cache, wraps
+from operator import attrgetter
+from typing import Callable
+
+from agents import Agent, RunContextWrapper
+from app.schemas.chat import UserInfo
+
+# --------------------------
+# Load environment variables
+# --------------------------
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "256"))
+
+InstructionsFunction = Callable[[RunContextWrapper[UserInfo], Agent[UserInfo]], str]
+
+# Compiled instructions functions by name, for the prompt report and cache stats
+compiled_prompts: dict[str, InstructionsFunction] = {}
+
+
+def compiled_prompt(*context_fields: str):
+    """
+    Memoize a dynamic instructions function on the UserInfo fields it reads, e.g. ("date", "user_input_language").
+    On a cache miss the prompt is built from a UserInfo holding only those fields, so a field read by the prompt
+    but missing from `context_fields` renders as its default instead of silently varying between cache hits.
+    The `agent` argument is not passed through, none of the prompts read it.
+    """
+
+    def decorator(build_prompt: InstructionsFunction) -> InstructionsFunction:
+        # Returns a single value for one field and a tuple for several, either is a valid cache key
+        get_key = attrgetter(*context_fields)
+
+        @lru_cache(maxsize=PROMPT_CACHE_SIZE)
+        def compile_prompt(key) -> str:
+            values = key if len(context_fields) > 1 else (key,)
+            context = UserInfo(**dict(zip(context_fields, values)))
+            return build_prompt(
+                RunContextWrapper(context=RunContextWrapper(context=context)), None
+            )
+
+        @wraps(build_prompt)
+        def instructions(
+            context_wrapper: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
+        ) -> str:
+            return compile_prompt(get_key(context_wrapper.context.context))
+
+        instructions.context_fields = context_fields
+        instructions.cache_info = compile_prompt.cache_info
+        instructions.cache_clear = compile_prompt.cache_clear
+        compiled_prompts[build_prompt.__name__] = instructions
+        return instructions
+
+    return decorator
+
+
+def prompt_cache_stats() -> dict:
+    return {
+        name: instructions.cache_info()._asdict()
+        for name, instructions in compiled_prompts.items()
+    }
@@ -0,0 +1,82 @@
+from json.encoder import encode_basestring
+from typing import TypeVar
+
+from pydantic import BaseModel
+from pydantic_core import PydanticSerializationError, to_json
+
+from app.schemas.chat import ChatResponse, ResponseBase
+from app.schemas.voice import VoiceResponse
+
+EventModel = TypeVar("EventModel", bound=ResponseBase)
+
+_set_slot = object.__setattr__
+
+
+def _build_template(model: type[BaseModel]) -> list[tuple[str, str]]:
+    """(json key prefix, field name) pairs in field declaration order, e.g. ('{"agent_name":', 'agent_name')."""
+    names = [name for name, field in model.model_fields.items() if not field.exclude]
+    return [
+        (("{" if index == 0 else ",") + encode_basestring(name) + ":", name)
+        for index, name in enumerate(names)
+    ]
+
+
+EVENT_MODELS = (ChatResponse, VoiceResponse)
+TEMPLATES = {model: _build_template(model) for model in EVENT_MODELS}
+# Field defaults in declaration order, copied into every event so its __dict__ matches the template order
+DEFAULTS = {
+    model: {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+    }
+    for model in EVENT_MODELS
+}
+
+
+def build_event(model: type[EventModel], response_dict: dict) -> EventModel:
+    """
+    Build a stream event model from an internally generated response_dict, without validation.
+    Does what `model.model_construct(**response_dict)` does for these flat models, at a fraction of the cost.
+    """
+    values = DEFAULTS[model].copy()
+    values.update(response_dict)
+    event = model.__new__(model)
+    _set_slot(event, "__dict__", values)
+    _set_slot(event, "__pydantic_fields_set__", set(response_dict))
+    _set_slot(event, "__pydantic_extra__", None)
+    _set_slot(event, "__pydantic_private__", None)
+    return event
+
+
+def encode_audio_frame(sequence: int, audio: bytes) -> bytes:
+    """Binary frame of the binary audio transport: the sequence number as 4 bytes big-endian, then the MP3 bytes."""
+    return sequence.to_bytes(4, "big") + audio
+
+
+def encode_event(event: ResponseBase) -> str:
+    """
+    NDJSON line for a stream event, byte for byte the same as `event.model_dump_json() + "\\n"`.
+    Keys come from a pre-built template, strings go through the C string encoder and everything else through
+    pydantic-core, so values are serialised exactly as pydantic would but without walking the model schema.
+    """
+    template = TEMPLATES.get(type(event))
+    if template is None:
+        return event.model_dump_json() + "\n"
+
+    values = event.__dict__
+    parts = []
+    try:
+        for prefix, name in template:
+            value = values[name]
+            parts.append(prefix)
+            if value is None:
+                parts.append("null")
+            elif isinstance(value, str):
+                parts.append(encode_basestring(value))
+            else:
+                # pydantic writes NaN and infinities as null (ser_json_inf_nan), to_json would write invalid JSON
+                parts.append(to_json(value, inf_nan_mode="null").decode())
+    except PydanticSerializationError:
+        return event.model_dump_json() + "\n"
+    parts.append("}\n")
+    return "".join(parts)
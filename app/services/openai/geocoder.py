@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+from app.services.backend.backend_client import (
+    BackendClient,
+    get_default_backend_client,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Comma separated backends tried in order, e.g. "gazetteer,onemap" to resolve known places offline first
+GEOCODER_BACKENDS = os.getenv("GEOCODER_BACKENDS", "onemap")
+GEOCODER_GAZETTEER_PATH = os.getenv(
+    "GEOCODER_GAZETTEER_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "sg_gazetteer.json"),
+)
+GEOCODER_CACHE_SIZE = int(os.getenv("GEOCODER_CACHE_SIZE", "1024"))
+# Optional JSON file persisting resolved locations across restarts, holding the GEOCODER_CACHE_SIZE most recent
+GEOCODER_DISK_CACHE_PATH = os.getenv("GEOCODER_DISK_CACHE_PATH")
+
+ONEMAP_SEARCH_URL = "https://www.onemap.gov.sg/api/common/elastic/search"
+
+
+def normalize_location_query(location_name: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace, so "Jurong  East!" and "jurong east" share a cache entry."""
+    location_name = re.sub(r"[^\w\s]", " ", location_name.casefold())
+    return " ".join(location_name.split())
+
+
+class GeocoderBackend(Protocol):
+    name: str
+
+    async def geocode(
+        self, location_name: str, backend_client: BackendClient
+    ) -> dict | None: ...
+
+
+class OneMapGeocoderBackend:
+    """
+    OneMap Search API to get the postal code, address, latitude, and longitude of a location.
+    """
+
+    name = "onemap"
+
+    async def geocode(
+        self, location_name: str, backend_client: BackendClient
+    ) -> dict | None:
+        response = await backend_client.get(
+            ONEMAP_SEARCH_URL,
+            params={
+                "searchVal": location_name,
+                "returnGeom": "Y",
+                "getAddrDetails": "Y",
+                "pageNum": 1,
+            },
+        )
+
+        if response.status_code == 200:
+            data = response.json()
+            if data["found"] > 0:
+                result = data["results"][0]
+                return {
+                    "postal_code": result["POSTAL"],
+                    "address": result["ADDRESS"],
+                    "latitude": result["LATITUDE"],
+                    "longitude": result["LONGITUDE"],
+                }
+        return None
+
+
+class GazetteerGeocoderBackend:
+    """
+    Offline geocoder over a local JSON gazetteer of Singapore places, for tests and deployments without network access.
+    Each entry has a "name", optional "aliases" and the same fields returned by OneMap.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, path: str = GEOCODER_GAZETTEER_PATH) -> None:
+        with open(path, encoding="utf-8") as f:
+            places = json.load(f)
+
+        self.places: dict[str, dict] = {}
+        for place in places:
+            location = {
+                "postal_code": place["postal_code"],
+                "address": place["address"],
+                "latitude": place["latitude"],
+                "longitude": place["longitude"],
+            }
+            for name in [place["name"], *place.get("aliases", [])]:
+                self.places[normalize_location_query(name)] = location
+        # Longest names first, so the most specific place mentioned wins
+        self.names_by_length = sorted(self.places, key=len, reverse=True)
+
+    async def geocode(
+        self, location_name: str, backend_client: BackendClient
+    ) -> dict | None:
+        query = normalize_location_query(location_name)
+        if query in self.places:
+            return self.places[query]
+
+        # Fall back to a known place mentioned within the query, e.g. "Tampines MRT"
+        padded_query = f" {query} "
+        for name in self.names_by_length:
+            if f" {name} " in padded_query or (not name.isascii() and name in query):
+                return self.places[name]
+        return None
+
+
+class Geocoder:
+    """
+    Non-blocking geocoder with a normalised-query LRU cache and an optional on-disk cache, both of `cache_size` entries.
+    Backends are tried in order until one resolves the location.
+    """
+
+    def __init__(
+        self,
+        backends: list[GeocoderBackend],
+        cache_size: int = GEOCODER_CACHE_SIZE,
+        disk_cache_path: Optional[str] = GEOCODER_DISK_CACHE_PATH,
+    ) -> None:
+        self.backends = backends
+        self.cache_size = cache_size
+        self.disk_cache_path = disk_cache_path
+        self.cache: OrderedDict[str, dict] = OrderedDict()
+        self.disk_cache: OrderedDict[str, dict] = self._load_disk_cache()
+        self.hits = 0
+        self.misses = 0
+        self._disk_cache_lock = asyncio.Lock()
+
+    def _load_disk_cache(self) -> OrderedDict[str, dict]:
+        if not self.disk_cache_path or not os.path.exists(self.disk_cache_path):
+            return OrderedDict()
+        try:
+            with open(self.disk_cache_path, encoding="utf-8") as f:
+                disk_cache = OrderedDict(json.load(f))
+        except (OSError, json.JSONDecodeError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable geocoder disk cache: {e}")
+            return OrderedDict()
+        # Entries are written least recently used first, a smaller GEOCODER_CACHE_SIZE keeps the most recent
+        while len(disk_cache) > self.cache_size:
+            disk_cache.popitem(last=False)
+        return disk_cache
+
+    def _write_disk_cache(self, disk_cache: dict[str, dict]):
+        tmp_path = f"{self.disk_cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(disk_cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.disk_cache_path)
+
+    def _remember(self, query: str, location: dict):
+        self.cache[query] = location
+        self.cache.move_to_end(query)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def geocode(
+        self, location_name: str, backend_client: Optional[BackendClient] = None
+    ) -> dict | None:
+        query = normalize_location_query(location_name)
+
+        if query in self.cache:
+            self.cache.move_to_end(query)
+            if query in self.disk_cache:
+                # The disk cache evicts the least recently used location too, saved with the next write
+                self.disk_cache.move_to_end(query)
+            self.hits += 1
+            return self.cache[query]
+        if query in self.disk_cache:
+            self.disk_cache.move_to_end(query)
+            self._remember(query, self.disk_cache[query])
+            self.hits += 1
+            return self.disk_cache[query]
+
+        self.misses += 1
+        backend_client = backend_client or get_default_backend_client()
+        for backend in self.backends:
+            try:
+                location = await backend.geocode(location_name, backend_client)
+            except Exception as e:
+                print(f"Error geocoding with {backend.name}: {e}")
+                continue
+            if location is not None:
+                self._remember(query, location)
+                if self.disk_cache_path:
+                    self.disk_cache[query] = location
+                    self.disk_cache.move_to_end(query)
+                    while len(self.disk_cache) > self.cache_size:
+                        self.disk_cache.popitem(last=False)
+                    async with self._disk_cache_lock:
+                        await asyncio.to_thread(
+                            self._write_disk_cache, dict(self.disk_cache)
+                        )
+                return location
+        return None
+
+
+def create_geocoder(backend_names: str = GEOCODER_BACKENDS) -> Geocoder:
+    available_backends = {
+        "onemap": OneMapGeocoderBackend,
+        "gazetteer": GazetteerGeocoderBackend,
+    }
+    backends = [
+        available_backends[name.strip()]()
+        for name in backend_names.split(",")
+        if name.strip()
+    ]
+    return Geocoder(backends)
+
+
+geocoder = create_geocoder()
@@ -0,0 +1,288 @@
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from openai_messages_token_helper import count_tokens_for_message
+from pydantic_core import to_json
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Token budget for the history passed to Runner.run_streamed, 0 disables compaction
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+# Most recent exchanges (a user message and everything after it) that are never compacted
+HISTORY_KEEP_EXCHANGES = int(os.getenv("HISTORY_KEEP_EXCHANGES", "3"))
+# Characters of an old tool output kept as its summary
+HISTORY_TOOL_OUTPUT_PREVIEW_CHARS = int(
+    os.getenv("HISTORY_TOOL_OUTPUT_PREVIEW_CHARS", "200")
+)
+# Model whose tokenizer is used for counting
+HISTORY_TOKEN_MODEL = os.getenv("HISTORY_TOKEN_MODEL", "gpt-4o-mini")
+HISTORY_TOKEN_CACHE_SIZE = int(os.getenv("HISTORY_TOKEN_CACHE_SIZE", "20000"))
+
+# Tokens a chat message costs on top of its content (role, separators, name), rounded up
+MESSAGE_OVERHEAD_TOKENS = 8
+# Estimate used when the tokenizer is unavailable, e.g. its encoding cannot be downloaded
+CHARACTERS_PER_TOKEN = 4
+
+
+@dataclass
+class CompactionResult:
+    history: list
+    # Both 0 when the history was not tokenized, as it could not exceed the budget
+    tokens_before: int
+    tokens_after: int
+    summarized_outputs: int = 0
+    dropped_items: int = 0
+    counted: bool = True
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def estimate_tokens(message: dict) -> int:
+    """Token count of a chat message from its length, for when the tokenizer cannot be loaded."""
+    text = message.get("content", "") + message.get("name", "")
+    return len(text) // CHARACTERS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def max_tokens(item: dict) -> int:
+    """
+    Upper bound of the item's token count without tokenizing it: a token covers at least one byte, and the JSON
+    serialisation holds all of the message's text.
+    """
+    return len(to_json(item)) + MESSAGE_OVERHEAD_TOKENS
+
+
+class HistoryTokenCounter:
+    """
+    Token counts of Responses API input items, cached per item so each item is only tokenized once per process.
+    Items are keyed by their JSON serialisation, which is much cheaper than tokenizing them.
+    If the tokenizer fails to load (tiktoken downloads encodings on first use), counts fall back to estimate_tokens
+    for the rest of the process instead of failing the turn.
+    """
+
+    def __init__(
+        self,
+        model: str = HISTORY_TOKEN_MODEL,
+        max_entries: int = HISTORY_TOKEN_CACHE_SIZE,
+        count_message: Optional[Callable[[dict], int]] = None,
+    ) -> None:
+        self.model = model
+        self.max_entries = max_entries
+        self.count_message = count_message or self.count_message_tokens
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.estimating = False
+
+    def count_message_tokens(self, message: dict) -> int:
+        if not self.estimating:
+            try:
+                return count_tokens_for_message(
+                    self.model, message, default_to_cl100k=True
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Tokenizer for {self.model} unavailable, estimating history tokens from its length: {e}"
+                )
+                self.estimating = True
+        return estimate_tokens(message)
+
+    @staticmethod
+    def as_chat_message(item: dict) -> dict:
+        """Flatten an input item into the chat message shape understood by openai-messages-token-helper."""
+        item_type = item.get("type", "message")
+        if item_type == "message":
+            content = item.get("content", "")
+            if isinstance(content, list):
+                content = "".join(part.get("text", "") for part in content)
+            return {"role": item.get("role", "assistant"), "content": content}
+        if item_type == "function_call":
+            return {
+                "role": "assistant",
+                "name": item.get("name", ""),
+                "content": item.get("arguments", ""),
+            }
+        if item_type == "function_call_output":
+            output = item.get("output", "")
+            if not isinstance(output, str):
+                output = to_json(output).decode()
+            return {"role": "tool", "content": output}
+        return {"role": "assistant", "content": to_json(item).decode()}
+
+    def count(self, item: dict) -> int:
+        key = to_json(item)
+        tokens = self._counts.get(key)
+        if tokens is not None:
+            self._counts.move_to_end(key)
+            self.hits += 1
+            return tokens
+
+        self.misses += 1
+        tokens = self.count_message(self.as_chat_message(item))
+        self._counts[key] = tokens
+        while len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+        return tokens
+
+
+class CompactionMetrics:
+    def __init__(self) -> None:
+        self.clear()
+
+    def record(self, result: CompactionResult) -> None:
+        self.turns += 1
+        self.counted_turns += result.counted
+        self.compacted_turns += result.tokens_saved > 0
+        self.tokens_before += result.tokens_before
+        self.tokens_after += result.tokens_after
+        self.summarized_outputs += result.summarized_outputs
+        self.dropped_items += result.dropped_items
+
+    def clear(self) -> None:
+        self.turns = 0
+        self.counted_turns = 0
+        self.compacted_turns = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.summarized_outputs = 0
+        self.dropped_items = 0
+
+    def stats(self) -> dict:
+        tokens_saved = self.tokens_before - self.tokens_after
+        return {
+            "turns": self.turns,
+            "counted_turns": self.counted_turns,
+            "compacted_turns": self.compacted_turns,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": tokens_saved,
+            "tokens_saved_per_turn": tokens_saved / self.turns if self.turns else 0.0,
+            "summarized_outputs": self.summarized_outputs,
+            "dropped_items": self.dropped_items,
+            "token_cache": {
+                "entries": len(token_counter._counts),
+                "hits": token_counter.hits,
+                "misses": token_counter.misses,
+            },
+        }
+
+
+token_counter = HistoryTokenCounter()
+compaction_metrics = CompactionMetrics()
+
+
+SUMMARY_PREFIX = "[Earlier tool output, shortened from"
+
+
+def summarize_tool_output(item: dict) -> dict | None:
+    """
+    Copy of a function_call_output item with its output cut down to a short preview, the call_id is kept.
+    None if the output is already short or already summarized.
+    """
+    output = item.get("output", "")
+    if not isinstance(output, str):
+        output = to_json(output).decode()
+    if len(output) <= HISTORY_TOOL_OUTPUT_PREVIEW_CHARS or output.startswith(
+        SUMMARY_PREFIX
+    ):
+        return None
+    preview = output[:HISTORY_TOOL_OUTPUT_PREVIEW_CHARS]
+    return {
+        **item,
+        "output": f"{SUMMARY_PREFIX} {len(output)} characters] {preview}",
+    }
+
+
+def recent_exchanges_start(history: list, keep_exchanges: int) -> int:
+    """Index of the user message opening the oldest of the last `keep_exchanges` exchanges."""
+    user_indices = [
+        index
+        for index, item in enumerate(history)
+        if item.get("role") == "user" and item.get("type", "message") == "message"
+    ]
+    if keep_exchanges <= 0 or not user_indices:
+        return len(history)
+    if len(user_indices) <= keep_exchanges:
+        return user_indices[0]
+    return user_indices[-keep_exchanges]
+
+
+def compact_history(
+    history: list,
+    budget: int = HISTORY_TOKEN_BUDGET,
+    keep_exchanges: int = HISTORY_KEEP_EXCHANGES,
+    counter: HistoryTokenCounter = token_counter,
+) -> CompactionResult:
+    """
+    Fit the history into `budget` tokens before it is sent to the model, keeping the last `keep_exchanges`
+    exchanges verbatim. Older items are compacted in two steps until the history fits:
+    1. Old tool outputs (slot lists, clinic JSON, ...) are replaced by a short preview.
+    2. The oldest exchanges are dropped whole, so function calls and their outputs are never separated.
+    The recent exchanges are kept even when they alone exceed the budget.
+    """
+    # Most turns are far below the budget, e.g. an opening message: no need to tokenize anything
+    if budget <= 0 or sum(map(max_tokens, history)) <= budget:
+        return CompactionResult(history, 0, 0, counted=False)
+
+    counts = [counter.count(item) for item in history]
+    tokens_before = sum(counts)
+    if tokens_before <= budget:
+        return CompactionResult(history, tokens_before, tokens_before)
+
+    recent_start = recent_exchanges_start(history, keep_exchanges)
+    history = list(history)
+    total = tokens_before
+    summarized_outputs = 0
+
+    for index in range(recent_start):
+        if total <= budget:
+            break
+        item = history[index]
+        if item.get("type") != "function_call_output":
+            continue
+        summary = summarize_tool_output(item)
+        if summary is not None:
+            history[index] = summary
+            tokens = counter.count(summary)
+            total -= counts[index] - tokens
+            counts[index] = tokens
+            summarized_outputs += 1
+
+    # Drop whole exchanges from the front, i.e. up to the next user message
+    dropped_items = 0
+    while total > budget and dropped_items < recent_start:
+        end = dropped_items + 1
+        while end < recent_start and history[end].get("role") != "user":
+            end += 1
+        total -= sum(counts[dropped_items:end])
+        dropped_items = end
+
+    return CompactionResult(
+        history[dropped_items:],
+        tokens_before,
+        total,
+        summarized_outputs,
+        dropped_items,
+    )
+
+
+def compact_history_for_run(history: list) -> list:
+    """compact_history with the configured budget, recorded in the metrics and logged."""
+    result = compact_history(
+        history, HISTORY_TOKEN_BUDGET, HISTORY_KEEP_EXCHANGES, token_counter
+    )
+    compaction_metrics.record(result)
+    if result.tokens_saved:
+        logger.info(
+            f"History compaction: {result.tokens_before} -> {result.tokens_after} tokens "
+            f"(saved {result.tokens_saved}, summarized {result.summarized_outputs} tool outputs, "
+            f"dropped {result.dropped_items} items)"
+        )
+    return result.history
@@ -0,0 +1,225 @@
+import logging
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.services.openai.vaccine_names import match_vaccine_name, mentions_vaccine
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Decisions below this confidence are left to the triage LLM
+INTENT_ROUTER_CONFIDENCE_THRESHOLD = float(
+    os.getenv("INTENT_ROUTER_CONFIDENCE_THRESHOLD", "0.75")
+)
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+
+# Keywords and phrases per intent, in English, Chinese, Malay and Tamil.
+# Multi-word phrases count more than single words, as they are less ambiguous.
+INTENT_KEYWORDS = {
+    "book": [
+        "book",
+        "make a booking",
+        "new booking",
+        "make an appointment",
+        "new appointment",
+        "schedule an appointment",
+        "get vaccinated",
+        "get a vaccine",
+        "get the vaccine",
+        "take the vaccine",
+        "预约",
+        "预订",
+        "打疫苗",
+        "tempah",
+        "buat temujanji",
+        "temujanji baru",
+        "முன்பதிவு",
+    ],
+    "modify": [
+        "reschedule",
+        "cancel",
+        "postpone",
+        "change my appointment",
+        "change the appointment",
+        "change my booking",
+        "取消",
+        "改期",
+        "取消预约",
+        "更改预约",
+        "batal",
+        "batalkan",
+        "tukar temujanji",
+        "jadual semula",
+        "ரத்து",
+        "மாற்று",
+    ],
+    "records": [
+        "records",
+        "record",
+        "vaccination history",
+        "past vaccinations",
+        "vaccinated before",
+        "vaccines have i taken",
+        "vaccines did i take",
+        "记录",
+        "接种记录",
+        "接种历史",
+        "rekod",
+        "sejarah vaksinasi",
+        "பதிவுகள்",
+        "பதிவு",
+        "வரலாறு",
+    ],
+    "recommend": [
+        "recommend",
+        "recommended",
+        "recommendation",
+        "recommendations",
+        "which vaccine",
+        "which vaccines",
+        "what vaccines should",
+        "should i take",
+        "should i get",
+        "due for",
+        "推荐",
+        "建议",
+        "应该打",
+        "cadangan",
+        "syorkan",
+        "vaksin apa",
+        "பரிந்துரை",
+    ],
+    # Health questions go to general_questions_agent via the LLM, they only compete here to lower confidence
+    "general": [
+        "side effect",
+        "side effects",
+        "what is",
+        "why",
+        "how does",
+        "how long",
+        "is it safe",
+        "symptoms",
+        "副作用",
+        "什么是",
+        "为什么",
+        "安全吗",
+        "kesan sampingan",
+        "apakah",
+        "kenapa",
+        "பக்க விளைவுகள்",
+        "ஏன்",
+    ],
+}
+
+PHRASE_WEIGHT = 1.5
+KEYWORD_WEIGHT = 1.0
+
+
+@dataclass
+class IntentDecision:
+    intent: Optional[str]
+    agent_name: Optional[str]
+    confidence: float
+    scores: dict[str, float] = field(default_factory=dict)
+    # Canonical vaccine name when booking a confidently matched vaccine
+    vaccine_name: Optional[str] = None
+
+    @property
+    def is_confident(self) -> bool:
+        return (
+            self.agent_name is not None
+            and self.confidence >= INTENT_ROUTER_CONFIDENCE_THRESHOLD
+        )
+
+
+def normalize_message(text: str) -> str:
+    text = "".join(
+        " " if unicodedata.category(char)[0] in "PS" else char
+        for char in text.casefold()
+    )
+    return " ".join(text.split())
+
+
+def keyword_weight(keyword: str) -> float:
+    # Chinese has no spaces, so a keyword of 3 or more characters is treated like a phrase
+    if " " in keyword or (not keyword.isascii() and len(keyword) >= 3):
+        return PHRASE_WEIGHT
+    return KEYWORD_WEIGHT
+
+
+# Longest keywords first: a matched phrase is removed from the message, so "取消预约" (cancel) does not also count "预约" (book)
+KEYWORDS_BY_LENGTH = sorted(
+    (
+        (keyword, intent)
+        for intent, keywords in INTENT_KEYWORDS.items()
+        for keyword in keywords
+    ),
+    key=lambda item: len(item[0]),
+    reverse=True,
+)
+
+
+def score_intents(message: str) -> dict[str, float]:
+    message = f" {message} "
+    scores = {}
+    for keyword, intent in KEYWORDS_BY_LENGTH:
+        # Whole words for ascii keywords, anywhere for Chinese and Tamil
+        pattern = f" {keyword} " if keyword.isascii() else keyword
+        if pattern in message:
+            message = message.replace(pattern, "  ")
+            scores[intent] = scores.get(intent, 0.0) + keyword_weight(keyword)
+    return scores
+
+
+def classify_intent(user_msg: str) -> IntentDecision:
+    """
+    Keyword and phrase based intent classifier for the opening message of a conversation.
+    Confidence is the top intent's share of all matched weight, so messages mixing several intents fall back to the LLM.
+    """
+    message = normalize_message(user_msg)
+    scores = score_intents(message)
+    if not scores:
+        return IntentDecision(None, None, 0.0, scores)
+
+    intent, top_score = max(scores.items(), key=lambda item: item[1])
+    confidence = top_score / sum(scores.values())
+
+    vaccine_name = None
+    if intent == "book":
+        vaccine_match = match_vaccine_name(user_msg)
+        if vaccine_match.is_confident:
+            # Vaccine already known: skip both triage and the appointments_agent hop
+            vaccine_name = vaccine_match.name
+            agent_name = "double_booking_check_agent"
+        elif mentions_vaccine(user_msg):
+            # A vaccine the matcher cannot resolve, e.g. "tetanus": handle_vaccine_names_agent asks which one
+            agent_name = None
+        else:
+            # Booking without a vaccine goes to recommendations first, as in triage_agent
+            agent_name = "recommender_agent"
+    else:
+        agent_name = {
+            "modify": "modify_existing_appointment_agent",
+            "records": "vaccination_records_agent",
+            "recommend": "recommender_agent",
+        }.get(intent)
+
+    return IntentDecision(intent, agent_name, confidence, scores, vaccine_name)
+
+
+def route_intent(user_msg: str) -> IntentDecision:
+    """Classify the message and log the decision, so the keywords and threshold can be tuned from the logs."""
+    if not INTENT_ROUTER_ENABLED:
+        return IntentDecision(None, None, 0.0)
+
+    decision = classify_intent(user_msg)
+    logger.info(
+        f"Intent router: intent={decision.intent} agent={decision.agent_name} "
+        f"confidence={decision.confidence:.2f} routed={decision.is_confident} "
+        f"scores={decision.scores} vaccine={decision.vaccine_name}"
+    )
+    return decision
@@ -0,0 +1,231 @@
+import json
+import math
+import os
+import unicodedata
+from collections import Counter
+from typing import Optional, Protocol
+
+from app.services.backend.backend_client import (
+    BackendClient,
+    get_default_backend_client,
+)
+
+# --------------------------
+# Load environment variables
+# --------------------------
+BACKEND_MAIN_API_URL = os.getenv("BACKEND_MAIN_API_URL")
+# Comma separated detectors tried in order, e.g. "local" to never call the translate endpoint
+LANGUAGE_DETECTORS = os.getenv("LANGUAGE_DETECTORS", "local,remote")
+# A detector's guess below this confidence is passed on to the next detector
+LANGUAGE_DETECTOR_CONFIDENCE_THRESHOLD = float(
+    os.getenv("LANGUAGE_DETECTOR_CONFIDENCE_THRESHOLD", "0.9")
+)
+LANGUAGE_CORPUS_PATH = os.getenv(
+    "LANGUAGE_CORPUS_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "language_corpus.json"),
+)
+DEFAULT_LANGUAGE = "English"
+
+# Languages written in each script, for the languages supported by the agents
+SCRIPT_LANGUAGES = {
+    "han": {"Chinese"},
+    "tamil": {"Tamil"},
+    "latin": {"English", "Malay"},
+}
+
+
+def char_script(char: str) -> Optional[str]:
+    """Script of a letter, one of the SCRIPT_LANGUAGES keys, or None for digits, punctuation, emoji and other scripts."""
+    # CJK Unified Ideographs and Extension A
+    if "\u4e00" <= char <= "\u9fff" or "\u3400" <= char <= "\u4dbf":
+        return "han"
+    if "\u0b80" <= char <= "\u0bff":
+        return "tamil"
+    if char.isascii():
+        return "latin" if char.isalpha() else None
+    if unicodedata.category(char)[0] == "L" and "LATIN" in unicodedata.name(char, ""):
+        return "latin"
+    return None
+
+
+def message_scripts(text: str) -> set[str]:
+    return {script for script in map(char_script, text) if script is not None}
+
+
+def language_matches_script(language: Optional[str], text: str) -> bool:
+    """
+    Whether a previously detected language can be reused for a new message of the same conversation:
+    the message has no letters at all (e.g. "1", "👍"), or some of its letters are in the language's script.
+    A Chinese conversation continuing in Latin letters only, say, is detected again.
+    """
+    if not language:
+        return False
+    scripts = message_scripts(text)
+    if not scripts:
+        return True
+    return any(language in SCRIPT_LANGUAGES[script] for script in scripts)
+
+
+class LanguageDetectorEngine(Protocol):
+    name: str
+
+    async def detect(
+        self, text: str, backend_client: BackendClient
+    ) -> tuple[str, float] | None: ...
+
+
+class LocalLanguageDetector:
+    """
+    Offline detector, in microseconds and without a network call.
+    - Chinese and Tamil are told apart from the rest by their Unicode script. Han characters count three times,
+      as a Chinese word is one or two characters where an English word mixed into the message is several letters.
+    - Latin text is English or Malay, scored by a character trigram model trained on LANGUAGE_CORPUS_PATH.
+    Returns None for messages without letters or in other scripts.
+    """
+
+    name = "local"
+    script_weights = {"han": 3, "tamil": 1, "latin": 1}
+
+    def __init__(self, path: str = LANGUAGE_CORPUS_PATH) -> None:
+        with open(path, encoding="utf-8") as f:
+            corpus: dict[str, list[str]] = json.load(f)
+
+        self.trigram_counts: dict[str, Counter] = {}
+        for language, sentences in corpus.items():
+            counts = Counter()
+            for sentence in sentences:
+                counts.update(self.trigrams(sentence))
+            self.trigram_counts[language] = counts
+        vocabulary_size = len(set().union(*self.trigram_counts.values()))
+        # Add-one smoothing: log probability of each seen trigram, and of any unseen one
+        self.log_probabilities: dict[str, dict[str, float]] = {}
+        self.unseen_log_probability: dict[str, float] = {}
+        for language, counts in self.trigram_counts.items():
+            total = sum(counts.values()) + vocabulary_size
+            self.log_probabilities[language] = {
+                trigram: math.log((count + 1) / total)
+                for trigram, count in counts.items()
+            }
+            self.unseen_log_probability[language] = math.log(1 / total)
+
+    @staticmethod
+    def trigrams(text: str) -> list[str]:
+        words = "".join(
+            char if char_script(char) == "latin" else " " for char in text.casefold()
+        ).split()
+        return [
+            padded[index : index + 3]
+            for padded in (f" {word} " for word in words)
+            for index in range(len(padded) - 2)
+        ]
+
+    def latin_language(self, text: str) -> tuple[str, float] | None:
+        trigrams = self.trigrams(text)
+        if not trigrams:
+            return None
+        scores = {
+            language: sum(
+                log_probabilities.get(trigram, self.unseen_log_probability[language])
+                for trigram in trigrams
+            )
+            for language, log_probabilities in self.log_probabilities.items()
+        }
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        # Probability of the best language against the runner-up, from their likelihood ratio
+        margin = scores[ranked[0]] - scores[ranked[1]]
+        return ranked[0], 1 / (1 + math.exp(-margin))
+
+    async def detect(
+        self, text: str, backend_client: Optional[BackendClient] = None
+    ) -> tuple[str, float] | None:
+        return self.detect_sync(text)
+
+    def detect_sync(self, text: str) -> tuple[str, float] | None:
+        letters = Counter(script for script in map(char_script, text) if script)
+        if not letters:
+            return None
+        weighted = {
+            script: count * self.script_weights[script]
+            for script, count in letters.items()
+        }
+        script = max(weighted, key=weighted.get)
+        share = weighted[script] / sum(weighted.values())
+        if script == "latin":
+            guess = self.latin_language(text)
+            return guess and (guess[0], guess[1] * share)
+        (language,) = SCRIPT_LANGUAGES[script]
+        return language, share
+
+
+class RemoteLanguageDetector:
+    """
+    The backend's /translate/get_language endpoint, which knows every language but costs a round trip.
+    """
+
+    name = "remote"
+
+    async def detect(
+        self, text: str, backend_client: BackendClient
+    ) -> tuple[str, float] | None:
+        url = f"{BACKEND_MAIN_API_URL}/translate/get_language"
+        headers = {"Content-Type": "application/json"}
+        payload = {"text": text}
+
+        response = await backend_client.post(
+            url, json=payload, headers=headers, timeout=10
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error: {response.status_code} - {response.text}")
+        return response.json(), 1.0
+
+
+class LanguageDetector:
+    """
+    Detectors are tried in order until one is confident enough. If none is, the most confident guess is used,
+    and DEFAULT_LANGUAGE if there is no guess at all (e.g. "👍" with the remote detector down).
+    """
+
+    def __init__(
+        self,
+        detectors: list[LanguageDetectorEngine],
+        confidence_threshold: float = LANGUAGE_DETECTOR_CONFIDENCE_THRESHOLD,
+    ) -> None:
+        self.detectors = detectors
+        self.confidence_threshold = confidence_threshold
+
+    async def detect(
+        self, text: str, backend_client: Optional[BackendClient] = None
+    ) -> str:
+        backend_client = backend_client or get_default_backend_client()
+        best_guess = None
+        for detector in self.detectors:
+            try:
+                guess = await detector.detect(text, backend_client)
+            except Exception as e:
+                print(f"Error detecting language with {detector.name}: {e}")
+                continue
+            if guess is None:
+                continue
+            if guess[1] >= self.confidence_threshold:
+                return guess[0]
+            if best_guess is None or guess[1] > best_guess[1]:
+                best_guess = guess
+        return best_guess[0] if best_guess else DEFAULT_LANGUAGE
+
+
+def create_language_detector(
+    detector_names: str = LANGUAGE_DETECTORS,
+) -> LanguageDetector:
+    available_detectors = {
+        "local": LocalLanguageDetector,
+        "remote": RemoteLanguageDetector,
+    }
+    detectors = [
+        available_detectors[name.strip()]()
+        for name in detector_names.split(",")
+        if name.strip()
+    ]
+    return LanguageDetector(detectors)
+
+
+language_detector = create_language_detector()
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional
+
+from mcp import Tool as MCPTool
+from mcp.types import CallToolResult
+
+from agents.mcp import MCPServer
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "10"))
+MCP_RECONNECT_MAX_DELAY = float(os.getenv("MCP_RECONNECT_MAX_DELAY", "30"))
+
+
+class PooledMCPConnection:
+    """
+    One MCP server connection, opened and closed by its own task: the SSE transport is built on anyio task groups,
+    which must be exited by the task that entered them. Reconnects with exponential backoff until closed.
+    """
+
+    def __init__(self, server_factory: Callable[[], MCPServer]) -> None:
+        self.server_factory = server_factory
+        self.server: Optional[MCPServer] = None
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+        self._reconnect = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while not self._closed:
+            server = self.server_factory()
+            try:
+                async with server:
+                    self.server = server
+                    self.connected.set()
+                    delay = 1.0
+                    await self._reconnect.wait()
+            except Exception as e:
+                logger.warning(f"MCP connection to {server.name} failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MCP_RECONNECT_MAX_DELAY)
+            finally:
+                self.server = None
+                self.connected.clear()
+                self._reconnect.clear()
+            if not self._closed:
+                self.reconnects += 1
+
+    def reconnect(self) -> None:
+        """Drop the current connection, the connection task opens a new one."""
+        self._reconnect.set()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is None:
+            return
+        if self.connected.is_set():
+            # Let the connection task leave `async with server` itself
+            self._reconnect.set()
+        else:
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+class MCPServerPool(MCPServer):
+    """
+    Pool of warm connections to one MCP server, usable as a single MCPServer in `Agent(mcp_servers=[...])`,
+    so the agents using it are built once and each tool call borrows a connection for its duration.
+    - The tool list is fetched once and cached for the lifetime of the pool.
+    - Connections are pinged every `health_check_interval` seconds and reconnected if the ping fails.
+    - A tool call failing on a broken connection is retried once on another connection.
+    - A pool that is not `configured` (e.g. no endpoint set) never connects, using it raises instead.
+    """
+
+    def __init__(
+        self,
+        server_factory: Callable[[], MCPServer],
+        name: str,
+        size: int = MCP_POOL_SIZE,
+        health_check_interval: float = MCP_HEALTH_CHECK_INTERVAL,
+        configured: bool = True,
+    ) -> None:
+        self.server_factory = server_factory
+        self._name = name
+        self.configured = configured
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self._connections: list[PooledMCPConnection] = []
+        self._idle: Optional[asyncio.Queue[PooledMCPConnection]] = None
+        self._health_check_task: Optional[asyncio.Task] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._tools_list: Optional[list[MCPTool]] = None
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def start(self) -> None:
+        """
+        Open the pool's connections and fetch the tool list in the background, without waiting for them.
+        Safe to call more than once.
+        """
+        if self._connections or not self.configured:
+            return
+
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            connection = PooledMCPConnection(self.server_factory)
+            connection.start()
+            self._connections.append(connection)
+            self._idle.put_nowait(connection)
+        self._health_check_task = asyncio.create_task(self._health_check_loop())
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def connect(self):
+        """
+        Open the pool's connections and wait up to MCP_CONNECT_TIMEOUT for them and the tool list. Never raises:
+        connections that are not ready keep retrying in the background.
+        """
+        self.start()
+        if self._warm_up_task is not None:
+            await asyncio.shield(self._warm_up_task)
+
+    async def _warm_up(self) -> None:
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *(connection.connected.wait() for connection in self._connections)
+                ),
+                MCP_CONNECT_TIMEOUT,
+            )
+            await self.list_tools()
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"MCP pool {self.name}: not all connections ready after {MCP_CONNECT_TIMEOUT}s, retrying in the background"
+            )
+        except Exception as e:
+            logger.warning(
+                f"MCP pool {self.name}: could not list tools ({e}), retrying on the next request"
+            )
+
+    async def cleanup(self):
+        for task in (self._warm_up_task, self._health_check_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._warm_up_task = None
+        self._health_check_task = None
+        for connection in self._connections:
+            await connection.close()
+        self._connections = []
+        self._idle = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connected connection from the pool, connecting it on first use."""
+        if not self.configured:
+            raise RuntimeError(f"MCP pool {self.name} is not configured")
+        self.start()
+        connection = await self._idle.get()
+        try:
+            await asyncio.wait_for(connection.connected.wait(), MCP_CONNECT_TIMEOUT)
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def list_tools(self) -> list[MCPTool]:
+        if self._tools_list is None:
+            async with self.acquire() as connection:
+                self._tools_list = await connection.server.list_tools()
+        return self._tools_list
+
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any] | None
+    ) -> CallToolResult:
+        self.calls += 1
+        for attempt in range(2):
+            async with self.acquire() as connection:
+                try:
+                    return await connection.server.call_tool(tool_name, arguments)
+                except Exception as e:
+                    self.failures += 1
+                    connection.reconnect()
+                    if attempt == 1:
+                        raise
+                    logger.warning(
+                        f"MCP pool {self.name}: {tool_name} failed ({e}), retrying on another connection"
+                    )
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for connection in list(self._connections):
+                server = connection.server
+                if server is None or getattr(server, "session", None) is None:
+                    continue
+                try:
+                    await asyncio.wait_for(
+                        server.session.send_ping(), MCP_CONNECT_TIMEOUT
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"MCP pool {self.name}: health check failed ({e}), reconnecting"
+                    )
+                    connection.reconnect()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "configured": self.configured,
+            "size": self.size,
+            "connected": sum(
+                connection.connected.is_set() for connection in self._connections
+            ),
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "reconnects": sum(
+                connection.reconnects for connection in self._connections
+            ),
+            "calls": self.calls,
+            "failures": self.failures,
+            "tools_cached": self._tools_list is not None,
+        }
@@ -1,8 +1,6 @@
 import asyncio
 import json
-import os
 import re
-from dataclasses import asdict
 from typing import AsyncGenerator, Optional
 
 import httpx
@@ -20,13 +18,39 @@ from agents import (
     ToolCallOutputItem,
     TResponseInputItem,
 )
-from app.schemas.chat import ChatResponse, EventType, RequestType, UserInfo
+from app.schemas.chat import (
+    ChatResponse,
+    EventType,
+    RequestType,
+    StreamMode,
+    UserInfo,
+)
 from app.schemas.voice import VoiceResponse
-from app.services.openai.agents import current_agent_mapping, triage_agent
+from app.services.backend.backend_client import (
+    BackendClient,
+    get_default_backend_client,
+)
+from app.services.openai.agents import (
+    current_agent_mapping,
+    intent_agent_mapping,
+    triage_agent,
+)
+from app.services.openai.backend_cache import backend_cache
+from app.services.openai.event_encoder import build_event
+from app.services.openai.history_compaction import compact_history_for_run
+from app.services.openai.intent_router import route_intent
+from app.services.openai.language_detection import (
+    language_detector,
+    language_matches_script,
+)
+from app.services.openai.session_store import (
+    ConversationSession,
+    context_fields_from_user_info,
+)
+from app.services.speech.speech_pipeline import SpeechPipeline
 from app.services.speech.text_to_speech import TextToSpeech
 
 
-BACKEND_MAIN_API_URL = os.getenv("BACKEND_MAIN_API_URL")
 # --------------------------
 # Main function
 # --------------------------
@@ -37,10 +61,30 @@ async def main(
     current_agent: str | None,
     auth_token: str,
     speech_client: Optional[TextToSpeech] = None,
+    backend_client: Optional[BackendClient] = None,
+    stream_mode: StreamMode = StreamMode.FULL,
+    session: Optional[ConversationSession] = None,
+    binary_audio: bool = False,
+    user_info: Optional[dict] = None,
 ) -> AsyncGenerator[ChatResponse | VoiceResponse, None]:
 
-    detected_input_language = await get_user_input_language(user_msg)
-    print("Detected language:", detected_input_language)
+    if backend_client is None:
+        backend_client = get_default_backend_client()
+
+    # Clients with a server-side session only send the new message
+    if session is not None:
+        history = history or list(session.history)
+        current_agent = current_agent or session.current_agent
+
+    # Reuse the session's language while the message is in its script, else detect it concurrently with the setup below
+    cached_language = session.user_input_language if session is not None else None
+    language_task = None
+    if not language_matches_script(cached_language, user_msg):
+        language_task = asyncio.create_task(
+            get_user_input_language(user_msg, backend_client)
+        )
+        # Let the task send its request before the setup work runs
+        await asyncio.sleep(0)
 
     # If you want to init wrapper with it
     wrapper = RunContextWrapper(
@@ -49,15 +93,29 @@ async def main(
                 "Authorization": f"Bearer {auth_token}",
                 "Content-Type": "application/json",
             },
-            user_input_language=detected_input_language,
+            **(
+                session.context_fields()
+                if session is not None
+                else context_fields_from_user_info(user_info)
+            ),
+            backend_client=backend_client,
         )
     )
+    # An appointment prepared in the previous turn may have been confirmed by the client since
+    backend_cache.apply_expected_changes(wrapper.context.auth_header)
 
     # Init entry point agent
-    if current_agent:
+    if current_agent and current_agent != "triage_agent":
         agent = current_agent_mapping[current_agent]
     else:
         agent = triage_agent
+        # Skip the triage LLM call when the opening message is unambiguous. Later messages ("book the first one")
+        # depend on the history, which only the LLM reads.
+        if not history:
+            decision = route_intent(user_msg)
+            if decision.is_confident:
+                agent = intent_agent_mapping[decision.agent_name]
+                wrapper.context.standardised_vaccine_name = decision.vaccine_name
 
     # If have exsting history, append new user message to it, else create new
     if history:
@@ -65,6 +123,15 @@ async def main(
     else:
         history: list[TResponseInputItem] = [{"content": user_msg, "role": "user"}]
 
+    # Keep the prompt within the token budget as the conversation grows. Only the model's input is compacted, the
+    # client and the session keep the full history.
+    run_input = compact_history_for_run(history)
+
+    # The prompts read the language, so it must be known before the run starts
+    if language_task is not None:
+        wrapper.context.user_input_language = await language_task
+    print("Detected language:", wrapper.context.user_input_language)
+
     # Always init
     tool_output = None
     final_agents = {
@@ -75,142 +142,180 @@ async def main(
     }
     message = ""
     speech_chunk = ""
+    # Voice answers are synthesized sentence by sentence while the text keeps streaming
+    speech_pipeline = (
+        SpeechPipeline(speech_client, raw_audio=binary_audio)
+        if speech_client and request_type != RequestType.CHAT_REQUEST
+        else None
+    )
 
-    result = Runner.run_streamed(agent, input=history, context=wrapper, max_turns=20)
-
-    # Iterate through runner events
-    async for event in result.stream_events():
-        if isinstance(event, RawResponsesStreamEvent):
-            """
-            Raw response event: raw events directly from the LLM, in OpenAI Response API format
-            For all the events, use `event.type` to retrieve the type of event
-            """
-            data = event.data
-            if isinstance(
-                data, ResponseTextDeltaEvent
-            ):  # streaming text of a single LLM output
-                message += data.delta  # collect the word by word output
-                speech_chunk += data.delta
-                response_dict = {
-                    "event_type": EventType.DELTA_TEXT_EVENT,
-                    "message": message,  # with latest delta message appended
-                    "delta_message": data.delta,  # latest delta message
-                    "data_type": None,
-                    "data": None,
-                    "history": None,
-                    "agent_name": current_agent,
-                    "user_info": asdict(wrapper.context),
-                }
+    try:
+        result = Runner.run_streamed(agent, input=run_input, context=wrapper, max_turns=20)
+
+        # Iterate through runner events
+        async for event in result.stream_events():
+            if isinstance(event, RawResponsesStreamEvent):
+                """
+                Raw response event: raw events directly from the LLM, in OpenAI Response API format
+                For all the events, use `event.type` to retrieve the type of event
+                """
+                data = event.data
+                if isinstance(
+                    data, ResponseTextDeltaEvent
+                ):  # streaming text of a single LLM output
+                    message += data.delta  # collect the word by word output
+                    speech_chunk += data.delta
+                    response_dict = {
+                        "event_type": EventType.DELTA_TEXT_EVENT,
+                        # with latest delta message appended, left out in delta mode
+                        "message": message if stream_mode == StreamMode.FULL else None,
+                        "delta_message": data.delta,  # latest delta message
+                        "data_type": None,
+                        "data": None,
+                        "history": None,
+                        "agent_name": current_agent,
+                        "user_info": wrapper.context.pop_changes(),
+                    }
 
-                # yield "Raw event TextDelta"
-                if request_type == RequestType.CHAT_REQUEST:
-                    yield ChatResponse(**response_dict)
-                else:
-                    # handle voice request
-                    if speech_client and bool(
-                        re.search(r"[.,!?。，！？:\n]\s", data.delta)
-                    ):
-                        audio_data = await speech_client.read_text(speech_chunk)
-                        response_dict["audio_data"] = audio_data
+                    # yield "Raw event TextDelta"
+                    if request_type == RequestType.CHAT_REQUEST:
+                        yield build_event(ChatResponse, response_dict)
+                    else:
+                        # handle voice request
+                        if speech_pipeline:
+                            if bool(re.search(r"[.,!?。，！？:\n]\s", data.delta)):
+                                speech_pipeline.submit(speech_chunk)
+                                speech_chunk = ""
+                            response_dict[speech_pipeline.audio_field] = (
+                                speech_pipeline.ready_audio()
+                            )
+                        yield build_event(VoiceResponse, response_dict)
+
+                elif isinstance(
+                    data, ResponseContentPartDoneEvent
+                ):  # the end of a text output response
+                    # Speak the rest of the answer, earlier sentences on events of their own and the last with the completed text
+                    audio_data = None
+                    if speech_pipeline:
+                        speech_pipeline.submit(speech_chunk)
                         speech_chunk = ""
-                    yield VoiceResponse(**response_dict)
+                        async for next_audio_data in speech_pipeline.drain():
+                            if audio_data is not None:
+                                yield build_event(
+                                    VoiceResponse,
+                                    {
+                                        "event_type": EventType.DELTA_TEXT_EVENT,
+                                        "message": (
+                                            message
+                                            if stream_mode == StreamMode.FULL
+                                            else None
+                                        ),
+                                        "delta_message": "",  # no new text, only audio
+                                        "data_type": None,
+                                        "data": None,
+                                        "history": None,
+                                        "agent_name": current_agent,
+                                        "user_info": wrapper.context.pop_changes(),
+                                        speech_pipeline.audio_field: audio_data,
+                                    },
+                                )
+                            audio_data = next_audio_data
+                    message += "\n"
+                    response_dict = {
+                        "event_type": EventType.COMPLETED_TEXT_EVENT,
+                        "message": message,
+                        "delta_message": None,
+                        "data_type": None,
+                        "data": None,
+                        "history": None,
+                        "agent_name": current_agent,
+                        "user_info": wrapper.context.pop_changes(),
+                    }
 
-            elif isinstance(
-                data, ResponseContentPartDoneEvent
-            ):  # the end of a text output response
-                message += "\n"
-                response_dict = {
-                    "event_type": EventType.COMPLETED_TEXT_EVENT,
-                    "message": message,
-                    "delta_message": None,
-                    "data_type": None,
-                    "data": None,
-                    "history": None,
-                    "agent_name": current_agent,
-                    "user_info": asdict(wrapper.context),
-                }
+                    # yield "Raw event ContentPartDone"
+                    if request_type == RequestType.CHAT_REQUEST:
+                        yield build_event(ChatResponse, response_dict)
+                    else:
+                        # handle voice request
+                        if speech_pipeline:
+                            response_dict[speech_pipeline.audio_field] = audio_data
+                        speech_chunk = ""
+                        yield build_event(VoiceResponse, response_dict)
 
-                # yield "Raw event ContentPartDone"
-                if request_type == RequestType.CHAT_REQUEST:
-                    yield ChatResponse(**response_dict)
-                else:
-                    # handle voice request
-                    if speech_client:
-                        audio_data = await speech_client.read_text(speech_chunk)
-                        response_dict["audio_data"] = audio_data
-                    speech_chunk = ""
-                    yield VoiceResponse(**response_dict)
-
-            else:  # other types of events
-                pass
-
-        elif isinstance(
-            event, AgentUpdatedStreamEvent
-        ):  # agent that is started / handed off to, e.g. triage_agent during init
-            wrapper.context.current_agent = event.new_agent.name  # set in context
-            current_agent = event.new_agent.name
-            response_dict = {
-                "event_type": EventType.NEW_AGENT_EVENT,
-                "message": message,
-                "data_type": None,
-                "data": None,
-                "history": None,
-                "agent_name": current_agent,  # name of the agent that is handed off to
-                "user_info": asdict(wrapper.context),
-            }
-
-            if request_type == RequestType.CHAT_REQUEST:
-                yield ChatResponse(**response_dict)
-            else:
-                yield VoiceResponse(**response_dict)
-
-        elif isinstance(
-            event, RunItemStreamEvent
-        ):  # Higher level event, inform me when an item has been fully generated, tool call
-            """
-            e.g. handoff: after all raw events, handoff_requested -> handoff_occured (include 'source_agent', and target agent 'raw_item.output.assistant')
-            """
-            if isinstance(event.item, ToolCallItem):
+                else:  # other types of events
+                    pass
+
+            elif isinstance(
+                event, AgentUpdatedStreamEvent
+            ):  # agent that is started / handed off to, e.g. triage_agent during init
+                wrapper.context.current_agent = event.new_agent.name  # set in context
+                current_agent = event.new_agent.name
                 response_dict = {
-                    "event_type": EventType.TOOL_CALL_EVENT,
-                    "message": event.item.raw_item.name,
+                    "event_type": EventType.NEW_AGENT_EVENT,
+                    "message": message if stream_mode == StreamMode.FULL else None,
                     "data_type": None,
                     "data": None,
                     "history": None,
-                    "agent_name": event.item.agent.name,  # agent that called the tool
-                    "user_info": asdict(wrapper.context),
+                    "agent_name": current_agent,  # name of the agent that is handed off to
+                    "user_info": wrapper.context.pop_changes(),
                 }
 
                 if request_type == RequestType.CHAT_REQUEST:
-                    yield ChatResponse(**response_dict)
+                    yield build_event(ChatResponse, response_dict)
                 else:
-                    yield VoiceResponse(**response_dict)
-
-            # other type for evemt.item: ToolCallItem, ToolCallOutputItem, MessageOutputItem, HandoffCallItem, HandoffOutputItem
-            elif isinstance(event.item, ToolCallOutputItem):  # tool call output
-                if event.item.agent.name in {
-                    "manage_appointment_agent",
-                }:
-                    tool_output = event.item.output
+                    yield build_event(VoiceResponse, response_dict)
 
+            elif isinstance(
+                event, RunItemStreamEvent
+            ):  # Higher level event, inform me when an item has been fully generated, tool call
+                """
+                e.g. handoff: after all raw events, handoff_requested -> handoff_occured (include 'source_agent', and target agent 'raw_item.output.assistant')
+                """
+                if isinstance(event.item, ToolCallItem):
                     response_dict = {
-                        "event_type": EventType.TOOL_CALL_OUTPUT_EVENT,
-                        "message": None,
-                        "data_type": wrapper.context.data_type,  # set by the individual agent during runtime
-                        "data": tool_output,
+                        "event_type": EventType.TOOL_CALL_EVENT,
+                        "message": event.item.raw_item.name,
+                        "data_type": None,
+                        "data": None,
                         "history": None,
                         "agent_name": event.item.agent.name,  # agent that called the tool
-                        "user_info": asdict(wrapper.context),
+                        "user_info": wrapper.context.pop_changes(),
                     }
 
-                    # yield "Tool call output"
                     if request_type == RequestType.CHAT_REQUEST:
-                        yield ChatResponse(**response_dict)
+                        yield build_event(ChatResponse, response_dict)
                     else:
-                        yield VoiceResponse(**response_dict)
-
-            elif isinstance(event.item, MessageOutputItem):
-                pass
+                        yield build_event(VoiceResponse, response_dict)
+
+                # other type for evemt.item: ToolCallItem, ToolCallOutputItem, MessageOutputItem, HandoffCallItem, HandoffOutputItem
+                elif isinstance(event.item, ToolCallOutputItem):  # tool call output
+                    if event.item.agent.name in {
+                        "manage_appointment_agent",
+                    }:
+                        tool_output = event.item.output
+
+                        response_dict = {
+                            "event_type": EventType.TOOL_CALL_OUTPUT_EVENT,
+                            "message": None,
+                            "data_type": wrapper.context.data_type,  # set by the individual agent during runtime
+                            "data": tool_output,
+                            "history": None,
+                            "agent_name": event.item.agent.name,  # agent that called the tool
+                            "user_info": wrapper.context.pop_changes(),
+                        }
+
+                        # yield "Tool call output"
+                        if request_type == RequestType.CHAT_REQUEST:
+                            yield build_event(ChatResponse, response_dict)
+                        else:
+                            yield build_event(VoiceResponse, response_dict)
+
+                elif isinstance(event.item, MessageOutputItem):
+                    pass
+    finally:
+        # Stop synthesizing the rest of the answer, also when the client disconnects and the generator is closed at a yield
+        if speech_pipeline:
+            speech_pipeline.cancel()
 
     current_agent = result.current_agent.name
     # If current agent is one of the final_agents, or restart flag set to True, change current agent to triage_agent
@@ -219,10 +324,14 @@ async def main(
         wrapper.context.restart = False
 
     # TODO: handle cases where halfmade booking cache should be removed
-    history = result.to_input_list()
+    history = history + [item.to_input_item() for item in result.new_items]
+    if session is not None:
+        session.update(history, current_agent, wrapper.context)
 
     last_message = history[-1]["content"][0]["text"]
-    generated_response_language = await get_user_input_language(last_message)
+    generated_response_language = await get_user_input_language(
+        last_message, backend_client
+    )
 
     response_dict = {
         "event_type": EventType.TERMINATING_EVENT,  # the end of the conversation
@@ -231,33 +340,24 @@ async def main(
         "data": None,
         "history": history,  # the consolidated history of the whole call
         "agent_name": current_agent,
-        "user_info": asdict(wrapper.context),
+        "user_info": wrapper.context.to_dict(),
         "response_language": generated_response_language,
     }
 
     # TODO: detect langauge
 
     if request_type == RequestType.CHAT_REQUEST:
-        response = ChatResponse(**response_dict)
+        response = build_event(ChatResponse, response_dict)
         yield response
     else:
-        response = VoiceResponse(**response_dict)
+        response = build_event(VoiceResponse, response_dict)
         yield response
 
 
-async def get_user_input_language(user_msg: str) -> str:
-    url =  f"{BACKEND_MAIN_API_URL}/translate/get_language"
-    headers = {"Content-Type": "application/json"}
-    payload = {"text": user_msg}
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload, headers=headers, timeout=10)
-
-    data = response.json()
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.status_code} - {response.text}")
-
-    return data
+async def get_user_input_language(
+    user_msg: str, backend_client: Optional[BackendClient] = None
+) -> str:
+    return await language_detector.detect(user_msg, backend_client)
 
 
 async def simulate_stream():
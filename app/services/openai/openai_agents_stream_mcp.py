@@ -1,7 +1,6 @@
 import asyncio
 import os
 import re
-from dataclasses import asdict
 from typing import AsyncGenerator, Optional
 
 from dotenv import load_dotenv
@@ -23,22 +22,44 @@ from agents import (
     set_tracing_disabled,
 )
 from agents.mcp import MCPServerSse
-from app.schemas.chat import ChatResponse, EventType, RequestType, UserInfo
+from app.schemas.chat import (
+    ChatResponse,
+    EventType,
+    RequestType,
+    StreamMode,
+    UserInfo,
+)
 from app.schemas.voice import VoiceResponse
+from app.services.backend.backend_client import (
+    BackendClient,
+)
 from app.services.openai.agents import (
     appointments_agent,
+    book_vaccine_handoff,
     check_available_slots_agent,
     double_booking_check_agent,
     handle_vaccine_names_agent,
     identify_clinic_agent,
     interrupt_handler_agent_prompt,
+    interrupted_agent_handoff,
     manage_appointment_agent,
     modify_existing_appointment_agent,
+    on_interrupt_handoff,
     recommended_vaccine_check_agent,
     recommender_agent,
     vaccination_history_check_agent,
     vaccination_records_agent,
 )
+from app.services.openai.backend_cache import backend_cache
+from app.services.openai.event_encoder import build_event
+from app.services.openai.history_compaction import compact_history_for_run
+from app.services.openai.intent_router import route_intent
+from app.services.openai.mcp_pool import MCPServerPool
+from app.services.openai.session_store import (
+    ConversationSession,
+    context_fields_from_user_info,
+)
+from app.services.speech.speech_pipeline import SpeechPipeline
 from app.services.speech.text_to_speech import TextToSpeech
 
 # --------------------------
@@ -59,6 +80,181 @@ set_tracing_disabled(True)
 set_default_openai_key(f"{OPENAI_API_KEY}")
 
 
+# -----------------------------------------
+# HealthHub MCP connection pool, shared by all requests
+# -----------------------------------------
+def create_hhai_mcp_server() -> MCPServerSse:
+    return MCPServerSse(
+        params={
+            "url": f"{AZURE_MCP_HHAI_ENDPOINT}/sse",
+            "headers": {"x-api-key": AZURE_MCP_HHAI_API_KEY},
+        },
+        cache_tools_list=True,
+    )
+
+
+hhai_mcp_pool = MCPServerPool(
+    create_hhai_mcp_server,
+    name="healthhub_mcp",
+    configured=bool(AZURE_MCP_HHAI_ENDPOINT),
+)
+
+# --------------------------
+# MCP agent graph, built once
+# --------------------------
+general_questions_agent_mcp = Agent(
+    name="general_questions_agent_mcp",
+    instructions=(
+        "You are a proxy for HealthHub AI and must strictly follow these rules: for any health, wellness, or lifestyle query, always call the healthhub_ai_tool and return its response verbatim,"
+        "For any health, wellness, or lifestyle questions, always use the healthhub_ai_tool to obtain the answer. "
+        "Do not answer health or wellness questions using your own knowledge—always call the healthhub_ai_tool for these. "
+        "If the user's question is NOT related to healthcare, health, wellness, or lifestyle, respond with: "
+        "'I'm sorry, I am only able to answer healthcare or health-related queries.' "
+        "When a user sends a short message like 'yes', 'okay', or similar, always check the previous chat history to determine if it is a follow-up to a health-related query. "
+        "If it is, continue the conversation appropriately using the healthhub_ai_tool. "
+    ),
+    model="gpt-4o-mini",
+    mcp_servers=[hhai_mcp_pool],
+)
+
+triage_agent_mcp = Agent(
+    name="triage_agent_mcp",
+    instructions=(
+        "You are a helpful assistant that directs user queries to the appropriate agents. Do not ask or answer any questions yourself, only handoff to other agents."
+        "Take the conversation history as context when deciding who to handoff to next."
+        "If they want to book vaccination appointments, but did not mention which vaccine they want, handoff to the recommender_agent."
+        "If they mentioned their desired vaccine and would like to book an appointment, handoff to appointments_agent."
+        "If they ask for vaccination reccomendations, handoff to recommender_agent."
+        "If they ask about vaccination records, like asking about their past vaccinations, handoff to vaccination_records_agent."
+        "Otherwise, handoff to general_questions_agent_mcp."
+    ),
+    # Handoffs are added below, once the booking agents are cloned
+    model="gpt-4o-mini",
+)
+
+interrupt_handler_agent_mcp = Agent(
+    instructions=interrupt_handler_agent_prompt,
+    name="interrupt_handler_agent_mcp",
+    model="gpt-4o-mini",
+    tools=[
+        recommender_agent.as_tool(
+            tool_name="recommend_vaccines_tool",
+            tool_description="Gets recommended vaccines for user.",
+        ),
+        vaccination_records_agent.as_tool(
+            tool_name="vaccine_records_tool",
+            tool_description="Gets user's vaccination records.",
+        ),
+        general_questions_agent_mcp.as_tool(
+            tool_name="general_questions_tool",
+            tool_description="Answers all general questions.",
+        ),
+    ],
+    handoff_description="Handoff to this agent when the user is not responding to your question.",
+)
+
+# --------------------------
+# Booking agents, cloned from agents.py so that their backlines go to triage_agent_mcp and
+# interrupt_handler_agent_mcp without changing the agents of the other graph. The clones keep their names.
+# --------------------------
+check_available_slots_agent_mcp = check_available_slots_agent.clone(
+    handoffs=[
+        manage_appointment_agent,
+        triage_agent_mcp,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+identify_clinic_agent_mcp = identify_clinic_agent.clone(
+    handoffs=[
+        check_available_slots_agent_mcp,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+vaccination_history_check_agent_mcp = vaccination_history_check_agent.clone(
+    handoffs=[
+        identify_clinic_agent_mcp,
+        triage_agent_mcp,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+recommended_vaccine_check_agent_mcp = recommended_vaccine_check_agent.clone(
+    handoffs=[
+        vaccination_history_check_agent_mcp,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+double_booking_check_agent_mcp = double_booking_check_agent.clone(
+    handoffs=[
+        recommended_vaccine_check_agent_mcp,
+        identify_clinic_agent_mcp,
+        manage_appointment_agent,
+        triage_agent_mcp,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+handle_vaccine_names_agent_mcp = handle_vaccine_names_agent.clone(
+    handoffs=[double_booking_check_agent_mcp, recommender_agent]
+)
+modify_existing_appointment_agent_mcp = modify_existing_appointment_agent.clone(
+    handoffs=[
+        identify_clinic_agent_mcp,
+        manage_appointment_agent,
+        handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff),
+    ]
+)
+appointments_agent_mcp = appointments_agent.clone(
+    handoffs=[
+        book_vaccine_handoff(
+            double_booking_check_agent_mcp, handle_vaccine_names_agent_mcp
+        ),  # starts flow to get location and vaccine name.
+        modify_existing_appointment_agent_mcp,
+    ]
+)
+
+triage_agent_mcp.handoffs.extend(
+    [
+        appointments_agent_mcp,
+        recommender_agent,
+        vaccination_records_agent,
+        general_questions_agent_mcp,
+    ]
+)
+
+# --------------------------
+# Current agent mapping
+# --------------------------
+current_agent_mapping = {
+    "triage_agent_mcp": triage_agent_mcp,
+    "interrupt_handler_agent_mcp": interrupt_handler_agent_mcp,
+    "handle_vaccine_names_agent": handle_vaccine_names_agent_mcp,
+    "double_booking_check_agent": double_booking_check_agent_mcp,
+    "recommended_vaccine_check_agent": recommended_vaccine_check_agent_mcp,
+    "vaccination_history_check_agent": vaccination_history_check_agent_mcp,
+    "identify_clinic_agent": identify_clinic_agent_mcp,
+    "check_available_slots_agent": check_available_slots_agent_mcp,
+    "modify_existing_appointment_agent": modify_existing_appointment_agent_mcp,
+}
+
+# Agents the local intent router can start a conversation at, instead of triage_agent_mcp
+intent_agent_mapping = {
+    "double_booking_check_agent": double_booking_check_agent_mcp,
+    "modify_existing_appointment_agent": modify_existing_appointment_agent_mcp,
+    "recommender_agent": recommender_agent,
+    "vaccination_records_agent": vaccination_records_agent,
+}
+
+# -----------------------------------------
+# Handle handoff to interrupt_handler_agent_mcp
+# -----------------------------------------
+# The interrupt handler can go back to triage or to the interrupted agent of its own run
+interrupt_handler_agent_mcp.handoffs.extend(
+    [
+        triage_agent_mcp,
+        interrupted_agent_handoff(current_agent_mapping, triage_agent_mcp),
+    ]
+)
+
+
 # --------------------------
 # Main MCP function
 # --------------------------
@@ -69,176 +265,78 @@ async def main_mcp(
     current_agent: str | None,
     auth_token: str,
     speech_client: Optional[TextToSpeech] = None,
+    backend_client: Optional[BackendClient] = None,
+    stream_mode: StreamMode = StreamMode.FULL,
+    session: Optional[ConversationSession] = None,
+    binary_audio: bool = False,
+    user_info: Optional[dict] = None,
 ) -> AsyncGenerator[ChatResponse | VoiceResponse, None]:
-    hhai_mcp_server = MCPServerSse(
-        params={
-            "url": f"{AZURE_MCP_HHAI_ENDPOINT}/sse",
-            "headers": {"x-api-key": AZURE_MCP_HHAI_API_KEY},
-        },
-        cache_tools_list=True,
-    )
-
-    async with hhai_mcp_server:
-
-        general_questions_agent_mcp = Agent(
-            name="general_questions_agent_mcp",
-            instructions=(
-                "You are a proxy for HealthHub AI and must strictly follow these rules: for any health, wellness, or lifestyle query, always call the healthhub_ai_tool and return its response verbatim,"
-                "For any health, wellness, or lifestyle questions, always use the healthhub_ai_tool to obtain the answer. "
-                "Do not answer health or wellness questions using your own knowledge—always call the healthhub_ai_tool for these. "
-                "If the user's question is NOT related to healthcare, health, wellness, or lifestyle, respond with: "
-                "'I'm sorry, I am only able to answer healthcare or health-related queries.' "
-                "When a user sends a short message like 'yes', 'okay', or similar, always check the previous chat history to determine if it is a follow-up to a health-related query. "
-                "If it is, continue the conversation appropriately using the healthhub_ai_tool. "
+    # Clients with a server-side session only send the new message
+    if session is not None:
+        history = history or list(session.history)
+        current_agent = current_agent or session.current_agent
+
+    # Init RunContextWrapper with auth token
+    wrapper = RunContextWrapper(
+        context=UserInfo(
+            auth_header={
+                "Authorization": f"Bearer {auth_token}",
+                "Content-Type": "application/json",
+            },
+            **(
+                session.context_fields()
+                if session is not None
+                else context_fields_from_user_info(user_info)
             ),
-            model="gpt-4o-mini",
-            mcp_servers=[hhai_mcp_server],
-        )
-
-        triage_agent_mcp = Agent(
-            name="triage_agent_mcp",
-            instructions=(
-                "You are a helpful assistant that directs user queries to the appropriate agents. Do not ask or answer any questions yourself, only handoff to other agents."
-                "Take the conversation history as context when deciding who to handoff to next."
-                "If they want to book vaccination appointments, but did not mention which vaccine they want, handoff to the recommender_agent."
-                "If they mentioned their desired vaccine and would like to book an appointment, handoff to appointments_agent."
-                "If they ask for vaccination reccomendations, handoff to recommender_agent."
-                "If they ask about vaccination records, like asking about their past vaccinations, handoff to vaccination_records_agent."
-                "Otherwise, handoff to general_questions_agent_mcp."
-            ),
-            handoffs=[
-                appointments_agent,
-                recommender_agent,
-                vaccination_records_agent,
-                general_questions_agent_mcp,
-            ],
-            model="gpt-4o-mini",
-        )
-
-        interrupt_handler_agent_mcp = Agent(
-            instructions=interrupt_handler_agent_prompt,
-            name="interrupt_handler_agent_mcp",
-            model="gpt-4o-mini",
-            tools=[
-                recommender_agent.as_tool(
-                    tool_name="recommend_vaccines_tool",
-                    tool_description="Gets recommended vaccines for user.",
-                ),
-                vaccination_records_agent.as_tool(
-                    tool_name="vaccine_records_tool",
-                    tool_description="Gets user's vaccination records.",
-                ),
-                general_questions_agent_mcp.as_tool(
-                    tool_name="general_questions_tool",
-                    tool_description="Answers all general questions.",
-                ),
-            ],
-            handoff_description="Handoff to this agent when the user is not responding to your question.",
-        )
-
-        # --------------------------
-        # Add backlines
-        # --------------------------
-        check_available_slots_agent.handoffs.append(manage_appointment_agent)
-        double_booking_check_agent.handoffs.append(manage_appointment_agent)
-        double_booking_check_agent.handoffs.append(triage_agent_mcp)
-        vaccination_history_check_agent.handoffs.append(triage_agent_mcp)
-        check_available_slots_agent.handoffs.append(triage_agent_mcp)
-
-        # --------------------------
-        # Current agent mapping
-        # --------------------------
-        current_agent_mapping = {
-            "triage_agent_mcp": triage_agent_mcp,
-            "interrupt_handler_agent_mcp": interrupt_handler_agent_mcp,
-            "double_booking_check_agent": double_booking_check_agent,
-            "recommended_vaccine_check_agent": recommended_vaccine_check_agent,
-            "vaccination_history_check_agent": vaccination_history_check_agent,
-            "identify_clinic_agent": identify_clinic_agent,
-            "check_available_slots_agent": check_available_slots_agent,
-            "modify_existing_appointment_agent": modify_existing_appointment_agent,
-        }
-
-        # -----------------------------------------
-        # Handle handoff to interrupt_handler_agent_mcp
-        # -----------------------------------------
-        async def on_interrupt_handoff(wrapper: RunContextWrapper[UserInfo]):
-            # Set the current agent that is being interrupted as the interrupted agent
-            interrupted_agent_name = wrapper.context.context.current_agent
-            wrapper.context.context.interrupted_agent = interrupted_agent_name
-            # Reset the handoffs for interrupt_handler_agent_mcp to handle for specific interruption
-            interrupt_handler_agent_mcp.handoffs = [
-                triage_agent_mcp,
-                current_agent_mapping.get(interrupted_agent_name),
-            ]
-
-        # Add handoff to interrupt_handler_agent_mcp
-        double_booking_check_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-        check_available_slots_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-        identify_clinic_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-        vaccination_history_check_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-        recommended_vaccine_check_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-        modify_existing_appointment_agent.handoffs.append(
-            handoff(agent=interrupt_handler_agent_mcp, on_handoff=on_interrupt_handoff)
-        )
-
-        # Init RunContextWrapper with auth token
-        wrapper = RunContextWrapper(
-            context=UserInfo(
-                auth_header={
-                    "Authorization": f"Bearer {auth_token}",
-                    "Content-Type": "application/json",
-                }
-            )
+            backend_client=backend_client,
         )
+    )
+    # An appointment prepared in the previous turn may have been confirmed by the client since
+    backend_cache.apply_expected_changes(wrapper.context.auth_header)
+
+    # Init entry point agent
+    if current_agent:
+        agent = current_agent_mapping[current_agent]
+    else:
+        agent = triage_agent_mcp
+
+    # Skip the triage LLM call when the opening message is unambiguous. Later messages ("book the first one")
+    # depend on the history, which only the LLM reads.
+    if agent is triage_agent_mcp and not history:
+        decision = route_intent(user_msg)
+        if decision.is_confident:
+            agent = intent_agent_mapping[decision.agent_name]
+            wrapper.context.standardised_vaccine_name = decision.vaccine_name
+
+    # If have exsting history, append new user message to it, else create new
+    if history:
+        history.append({"content": user_msg, "role": "user"})
+    else:
+        history: list[TResponseInputItem] = [{"content": user_msg, "role": "user"}]
+
+    # Keep the prompt within the token budget as the conversation grows. Only the model's input is compacted, the
+    # client and the session keep the full history.
+    run_input = compact_history_for_run(history)
+
+    # Always init
+    tool_output = None
+    final_agents = {
+        "general_questions_agent_mcp",
+        "vaccination_records_agent",
+        "recommender_agent",
+        "manage_appointment_agent",
+    }
+    message = ""
+    speech_chunk = ""
+    # Voice answers are synthesized sentence by sentence while the text keeps streaming
+    speech_pipeline = (
+        SpeechPipeline(speech_client, raw_audio=binary_audio)
+        if speech_client and request_type != RequestType.CHAT_REQUEST
+        else None
+    )
 
-        # Init entry point agent
-        if current_agent:
-            current_agent_mapping = {
-                "triage_agent_mcp": triage_agent_mcp,
-                "interrupt_handler_agent_mcp": interrupt_handler_agent_mcp,
-                "handle_vaccine_names_agent": handle_vaccine_names_agent,
-                "double_booking_check_agent": double_booking_check_agent,
-                "recommended_vaccine_check_agent": recommended_vaccine_check_agent,
-                "vaccination_history_check_agent": vaccination_history_check_agent,
-                "identify_clinic_agent": identify_clinic_agent,
-                "check_available_slots_agent": check_available_slots_agent,
-                "modify_existing_appointment_agent": modify_existing_appointment_agent,
-            }
-            agent = current_agent_mapping[current_agent]
-        else:
-            agent = triage_agent_mcp
-
-        # If have exsting history, append new user message to it, else create new
-        if history:
-            history.append({"content": user_msg, "role": "user"})
-        else:
-            history: list[TResponseInputItem] = [{"content": user_msg, "role": "user"}]
-
-        # Always init
-        tool_output = None
-        final_agents = {
-            "general_questions_agent_mcp",
-            "vaccination_records_agent",
-            "recommender_agent",
-            "manage_appointment_agent",
-        }
-        message = ""
-        speech_chunk = ""
-
-        result = Runner.run_streamed(
-            agent, input=history, context=wrapper, max_turns=20
-        )
+    try:
+        result = Runner.run_streamed(agent, input=run_input, context=wrapper, max_turns=20)
 
         # Iterate through runner events
         async for event in result.stream_events():
@@ -252,31 +350,62 @@ async def main_mcp(
                     data, ResponseTextDeltaEvent
                 ):  # streaming text of a single LLM output
                     message += data.delta  # collect the word by word output
+                    speech_chunk += data.delta
                     response_dict = {
                         "event_type": EventType.DELTA_TEXT_EVENT,
-                        "message": message,  # with latest delta message appended
+                        # with latest delta message appended, left out in delta mode
+                        "message": message if stream_mode == StreamMode.FULL else None,
                         "delta_message": data.delta,  # latest delta message
                         "data_type": None,
                         "data": None,
                         "history": None,
                         "agent_name": current_agent,
-                        "user_info": asdict(wrapper.context),
+                        "user_info": wrapper.context.pop_changes(),
                     }
 
                     # yield "Raw event TextDelta"
                     if request_type == RequestType.CHAT_REQUEST:
-                        yield ChatResponse(**response_dict)
+                        yield build_event(ChatResponse, response_dict)
                     else:
                         # handle voice request
-                        if bool(re.search(r"[.,!?。，！？]\s", data.delta)):
-                            audio_data = await speech_client.read_text(speech_chunk)
-                            response_dict["audio_data"] = audio_data
-                            speech_chunk = ""
-                        yield VoiceResponse(**response_dict)
+                        if speech_pipeline:
+                            if bool(re.search(r"[.,!?。，！？]\s", data.delta)):
+                                speech_pipeline.submit(speech_chunk)
+                                speech_chunk = ""
+                            response_dict[speech_pipeline.audio_field] = (
+                                speech_pipeline.ready_audio()
+                            )
+                        yield build_event(VoiceResponse, response_dict)
 
                 elif isinstance(
                     data, ResponseContentPartDoneEvent
                 ):  # the end of a text output response
+                    # Speak the rest of the answer, earlier sentences on events of their own and the last with the completed text
+                    audio_data = None
+                    if speech_pipeline:
+                        speech_pipeline.submit(speech_chunk)
+                        speech_chunk = ""
+                        async for next_audio_data in speech_pipeline.drain():
+                            if audio_data is not None:
+                                yield build_event(
+                                    VoiceResponse,
+                                    {
+                                        "event_type": EventType.DELTA_TEXT_EVENT,
+                                        "message": (
+                                            message
+                                            if stream_mode == StreamMode.FULL
+                                            else None
+                                        ),
+                                        "delta_message": "",  # no new text, only audio
+                                        "data_type": None,
+                                        "data": None,
+                                        "history": None,
+                                        "agent_name": current_agent,
+                                        "user_info": wrapper.context.pop_changes(),
+                                        speech_pipeline.audio_field: audio_data,
+                                    },
+                                )
+                            audio_data = next_audio_data
                     message += "\n"
                     response_dict = {
                         "event_type": EventType.COMPLETED_TEXT_EVENT,
@@ -286,19 +415,18 @@ async def main_mcp(
                         "data": None,
                         "history": None,
                         "agent_name": current_agent,
-                        "user_info": asdict(wrapper.context),
+                        "user_info": wrapper.context.pop_changes(),
                     }
 
                     # yield "Raw event ContentPartDone"
                     if request_type == RequestType.CHAT_REQUEST:
-                        yield ChatResponse(**response_dict)
+                        yield build_event(ChatResponse, response_dict)
                     else:
                         # handle voice request
-                        if speech_client:
-                            audio_data = await speech_client.read_text(speech_chunk)
-                            response_dict["audio_data"] = audio_data
+                        if speech_pipeline:
+                            response_dict[speech_pipeline.audio_field] = audio_data
                         speech_chunk = ""
-                        yield VoiceResponse(**response_dict)
+                        yield build_event(VoiceResponse, response_dict)
 
             elif isinstance(
                 event, AgentUpdatedStreamEvent
@@ -307,18 +435,18 @@ async def main_mcp(
                 current_agent = event.new_agent.name
                 response_dict = {
                     "event_type": EventType.NEW_AGENT_EVENT,
-                    "message": message,
+                    "message": message if stream_mode == StreamMode.FULL else None,
                     "data_type": None,
                     "data": None,
                     "history": None,
                     "agent_name": current_agent,  # name of the agent that is handed off to
-                    "user_info": asdict(wrapper.context),
+                    "user_info": wrapper.context.pop_changes(),
                 }
 
                 if request_type == RequestType.CHAT_REQUEST:
-                    yield ChatResponse(**response_dict)
+                    yield build_event(ChatResponse, response_dict)
                 else:
-                    yield VoiceResponse(**response_dict)
+                    yield build_event(VoiceResponse, response_dict)
 
             elif isinstance(
                 event, RunItemStreamEvent
@@ -335,13 +463,13 @@ async def main_mcp(
                         "data": None,
                         "history": None,
                         "agent_name": event.item.agent.name,  # agent that called the tool
-                        "user_info": asdict(wrapper.context),
+                        "user_info": wrapper.context.pop_changes(),
                     }
 
                     if request_type == RequestType.CHAT_REQUEST:
-                        yield ChatResponse(**response_dict)
+                        yield build_event(ChatResponse, response_dict)
                     else:
-                        yield VoiceResponse(**response_dict)
+                        yield build_event(VoiceResponse, response_dict)
 
                 # other type for evemt.item: ToolCallItem, ToolCallOutputItem, MessageOutputItem, HandoffCallItem, HandoffOutputItem
                 elif isinstance(event.item, ToolCallOutputItem):  # tool call output
@@ -357,43 +485,49 @@ async def main_mcp(
                             "data": tool_output,
                             "history": None,
                             "agent_name": event.item.agent.name,  # agent that called the tool
-                            "user_info": asdict(wrapper.context),
+                            "user_info": wrapper.context.pop_changes(),
                         }
 
                         # yield "Tool call output"
                         if request_type == RequestType.CHAT_REQUEST:
-                            yield ChatResponse(**response_dict)
+                            yield build_event(ChatResponse, response_dict)
                         else:
-                            yield VoiceResponse(**response_dict)
+                            yield build_event(VoiceResponse, response_dict)
 
                 elif isinstance(event.item, MessageOutputItem):
                     pass
-
-        current_agent = result.current_agent.name
-        # If current agent is one of the final_agents, or restart flag set to True, change current agent to triage_agent
-        if current_agent in final_agents or wrapper.context.restart:
-            current_agent = "triage_agent_mcp"
-            wrapper.context.restart = False
-
-        # TODO: handle cases where halfmade booking cache should be removed
-        history = result.to_input_list()
-        response_dict = {
-            "event_type": EventType.TERMINATING_EVENT,  # the end of the conversation
-            "message": None,
-            "data_type": None,
-            "data": None,
-            "history": history,  # the consolidated history of the whole call
-            "agent_name": current_agent,
-            "user_info": asdict(wrapper.context),
-        }
-
-        if request_type == RequestType.CHAT_REQUEST:
-            response = ChatResponse(**response_dict)
-            yield response
-        else:
-            pass
-            # response = VoiceResponse(**response_dict)
-            # yield response
+    finally:
+        # Stop synthesizing the rest of the answer, also when the client disconnects and the generator is closed at a yield
+        if speech_pipeline:
+            speech_pipeline.cancel()
+
+    current_agent = result.current_agent.name
+    # If current agent is one of the final_agents, or restart flag set to True, change current agent to triage_agent
+    if current_agent in final_agents or wrapper.context.restart:
+        current_agent = "triage_agent_mcp"
+        wrapper.context.restart = False
+
+    # TODO: handle cases where halfmade booking cache should be removed
+    history = history + [item.to_input_item() for item in result.new_items]
+    if session is not None:
+        session.update(history, current_agent, wrapper.context)
+    response_dict = {
+        "event_type": EventType.TERMINATING_EVENT,  # the end of the conversation
+        "message": None,
+        "data_type": None,
+        "data": None,
+        "history": history,  # the consolidated history of the whole call
+        "agent_name": current_agent,
+        "user_info": wrapper.context.to_dict(),
+    }
+
+    if request_type == RequestType.CHAT_REQUEST:
+        response = build_event(ChatResponse, response_dict)
+        yield response
+    else:
+        pass
+        # response = build_event(VoiceResponse, response_dict)
+        # yield response
 
 
 async def simulate_stream_general():
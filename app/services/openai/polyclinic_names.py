@@ -0,0 +1,220 @@
+import unicodedata
+from typing import Optional
+
+# Polyclinic names in English, Chinese, Malay and Tamil
+POLYCLINICS = [
+    (
+        "Ang Mo Kio Polyclinic",
+        "宏茂桥综合诊疗所",
+        "Poliklinik Ang Mo Kio",
+        "ஆங் மோ கியோ பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Geylang Polyclinic",
+        "芽笼综合诊疗所",
+        "Poliklinik Geylang",
+        "கேலாங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Hougang Polyclinic",
+        "后港综合诊疗所",
+        "Poliklinik Hougang",
+        "ஹவ்காங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Kallang Polyclinic",
+        "加冷综合诊疗所",
+        "Poliklinik Kallang",
+        "காலாங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Khatib Polyclinic",
+        "卡迪综合诊疗所",
+        "Poliklinik Khatib",
+        "காடிப் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Toa Payoh Polyclinic",
+        "大巴窑综合诊疗所",
+        "Poliklinik Toa Payoh",
+        "தோவா பயோ பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Sembawang Polyclinic",
+        "三巴旺综合诊疗所",
+        "Poliklinik Sembawang",
+        "செம்பவாங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Woodlands Polyclinic",
+        "兀兰综合诊疗所",
+        "Poliklinik Woodlands",
+        "வுட்லண்ட்ஸ் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Yishun Polyclinic",
+        "义顺综合诊疗所",
+        "Poliklinik Yishun",
+        "யிஷூன் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Bukit Batok Polyclinic",
+        "武吉巴督综合诊疗所",
+        "Poliklinik Bukit Batok",
+        "புக்கிட் பாட்டோக் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Jurong Polyclinic",
+        "裕廊综合诊疗所",
+        "Poliklinik Jurong",
+        "ஜூரோங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Pioneer Polyclinic",
+        "先驱综合诊疗所",
+        "Poliklinik Pioneer",
+        "பைனியர் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Choa Chu Kang Polyclinic",
+        "蔡厝港综合诊疗所",
+        "Poliklinik Choa Chu Kang",
+        "சோவா சூ காங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Clementi Polyclinic",
+        "金文泰综合诊疗所",
+        "Poliklinik Clementi",
+        "கிளிமெண்டி பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Queenstown Polyclinic",
+        "女皇镇综合诊疗所",
+        "Poliklinik Queenstown",
+        "குவீன்ஸ்டவுன் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Bukit Panjang Polyclinic",
+        "武吉班让综合诊疗所",
+        "Poliklinik Bukit Panjang",
+        "புக்கிட் பாஞ்சாங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Bedok Polyclinic",
+        "勿洛综合诊疗所",
+        "Poliklinik Bedok",
+        "பெடோக் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Bukit Merah Polyclinic",
+        "红山综合诊疗所",
+        "Poliklinik Bukit Merah",
+        "புக்கிட் மேரா பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Marine Parade Polyclinic",
+        "海军部综合诊疗所",
+        "Poliklinik Marine Parade",
+        "மரின் பரேட் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Outram Polyclinic",
+        "欧南综合诊疗所",
+        "Poliklinik Outram",
+        "அவுட்ராம் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Pasir Ris Polyclinic",
+        "白沙综合诊疗所",
+        "Poliklinik Pasir Ris",
+        "பாசிர் ரிஸ் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Sengkang Polyclinic",
+        "盛港综合诊疗所",
+        "Poliklinik Sengkang",
+        "செங்காங் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Tampines Polyclinic",
+        "淡滨尼综合诊疗所",
+        "Poliklinik Tampines",
+        "டாம்பின்ஸ் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Punggol Polyclinic",
+        "榜鹅综合诊疗所",
+        "Poliklinik Punggol",
+        "புங்கோல் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Eunos Polyclinic",
+        "友诺士综合诊疗所",
+        "Poliklinik Eunos",
+        "யூனோஸ் பல்நோக்கு மருத்துவமனை",
+    ),
+    (
+        "Tampines North Polyclinic",
+        "淡滨尼北综合诊疗所",
+        "Poliklinik Tampines North",
+        "டாம்பின்ஸ் நார்த் பல்நோக்கு மருத்துவமனை",
+    ),
+]
+
+# Generic words for "polyclinic" in each language, dropped to also index the bare place names, e.g. "Outram", "兀兰"
+POLYCLINIC_WORDS = ["polyclinic", "综合诊疗所", "poliklinik", "பல்நோக்கு மருத்துவமனை"]
+
+
+def normalize_clinic_query(text: str) -> str:
+    # Only punctuation and symbols are dropped, \W would also drop the Tamil vowel signs
+    text = "".join(
+        " " if unicodedata.category(char)[0] in "PS" else char
+        for char in text.casefold()
+    )
+    return " ".join(text.split())
+
+
+def strip_polyclinic_words(text: str) -> str:
+    for word in POLYCLINIC_WORDS:
+        text = text.replace(word, " ")
+    return " ".join(text.split())
+
+
+def _build_alias_index() -> dict[str, str]:
+    alias_index = {}
+    for names in POLYCLINICS:
+        english_name = names[0]
+        for name in names:
+            name = normalize_clinic_query(name)
+            alias_index[name] = english_name
+            alias_index[strip_polyclinic_words(name)] = english_name
+    return alias_index
+
+
+ALIAS_INDEX = _build_alias_index()
+# Longest aliases first, so "tampines north" wins over "tampines"
+ALIASES_BY_LENGTH = sorted(ALIAS_INDEX, key=len, reverse=True)
+
+
+def resolve_polyclinic_name(text: str) -> Optional[str]:
+    """
+    Map a polyclinic name in English, Chinese, Malay or Tamil (e.g. "兀兰", "Poliklinik Outram") to its official English name.
+    Returns None when no known polyclinic is mentioned.
+    """
+    query = normalize_clinic_query(text)
+    if query in ALIAS_INDEX:
+        return ALIAS_INDEX[query]
+    stripped_query = strip_polyclinic_words(query)
+    if stripped_query in ALIAS_INDEX:
+        return ALIAS_INDEX[stripped_query]
+
+    # Fall back to the most specific polyclinic mentioned within the text
+    padded_query = f" {query} "
+    for alias in ALIASES_BY_LENGTH:
+        if f" {alias} " in padded_query or (not alias.isascii() and alias in query):
+            return ALIAS_INDEX[alias]
+    return None
+
+
+def polyclinic_english_names() -> list[str]:
+    return [names[0] for names in POLYCLINICS]
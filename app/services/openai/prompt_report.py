@@ -0,0 +1,138 @@
+"""
+Per-agent prompt size report.
+
+Renders every agent's instructions with the worst-case (longest) context values and tokenizes them together with
+the JSON schemas of its tools and handoffs, i.e. what is sent to the model on every turn before any chat history.
+
+Usage:
+    python -m app.services.openai.prompt_report
+    python -m app.services.openai.prompt_report --encoding o200k_base --budget 1500
+"""
+
+import argparse
+import itertools
+import json
+import sys
+
+import tiktoken
+
+from agents import Agent, FunctionTool, Handoff, RunContextWrapper, handoff
+from app.schemas.chat import UserInfo
+from app.services.openai import agents as agent_definitions
+from app.services.openai.vaccine_names import VACCINE_NAMES
+
+# Candidate values of each context field a compiled prompt can depend on
+USER_INPUT_LANGUAGES = ["English", "Chinese", "Malay", "Tamil"]
+
+
+def all_agents() -> list[Agent]:
+    return [
+        value for value in vars(agent_definitions).values() if isinstance(value, Agent)
+    ]
+
+
+def candidate_values(field: str) -> list:
+    if field == "user_input_language":
+        return USER_INPUT_LANGUAGES
+    if field == "interrupted_agent":
+        return [agent.name for agent in all_agents()]
+    if field == "standardised_vaccine_name":
+        return [None, *VACCINE_NAMES]
+    return [getattr(UserInfo(), field)]
+
+
+def worst_case_prompt(agent: Agent, encoding: tiktoken.Encoding) -> tuple[int, str]:
+    if isinstance(agent.instructions, str):
+        return len(encoding.encode(agent.instructions)), agent.instructions
+
+    context_fields = getattr(agent.instructions, "context_fields", ())
+    worst = (0, "")
+    for values in itertools.product(*map(candidate_values, context_fields)):
+        context = UserInfo(**dict(zip(context_fields, values)))
+        prompt = agent.instructions(
+            RunContextWrapper(context=RunContextWrapper(context=context)), agent
+        )
+        worst = max(worst, (len(encoding.encode(prompt)), prompt))
+    return worst
+
+
+def tool_schemas(agent: Agent) -> list[dict]:
+    schemas = []
+    for tool in agent.tools:
+        if isinstance(tool, FunctionTool):
+            schemas.append(
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.params_json_schema,
+                }
+            )
+    return schemas
+
+
+def handoff_schemas(agent: Agent) -> list[dict]:
+    schemas = []
+    for agent_handoff in agent.handoffs:
+        if not isinstance(agent_handoff, Handoff):
+            agent_handoff = handoff(agent_handoff)
+        schemas.append(
+            {
+                "name": agent_handoff.tool_name,
+                "description": agent_handoff.tool_description,
+                "parameters": agent_handoff.input_json_schema,
+            }
+        )
+    return schemas
+
+
+def count_schema_tokens(schemas: list[dict], encoding: tiktoken.Encoding) -> int:
+    return sum(
+        len(encoding.encode(json.dumps(schema, ensure_ascii=False)))
+        for schema in schemas
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--encoding", default="o200k_base")
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=None,
+        help="Exit with status 1 if any agent's total exceeds this many tokens",
+    )
+    args = parser.parse_args()
+
+    encoding = tiktoken.get_encoding(args.encoding)
+    rows = []
+    for agent in all_agents():
+        prompt_tokens, _ = worst_case_prompt(agent, encoding)
+        tool_tokens = count_schema_tokens(tool_schemas(agent), encoding)
+        handoff_tokens = count_schema_tokens(handoff_schemas(agent), encoding)
+        rows.append(
+            (
+                agent.name,
+                prompt_tokens,
+                tool_tokens,
+                handoff_tokens,
+                prompt_tokens + tool_tokens + handoff_tokens,
+            )
+        )
+
+    print(f"{'agent':<36} {'prompt':>7} {'tools':>7} {'handoffs':>9} {'total':>7}")
+    for name, prompt_tokens, tool_tokens, handoff_tokens, total in sorted(
+        rows, key=lambda row: row[-1], reverse=True
+    ):
+        print(
+            f"{name:<36} {prompt_tokens:>7} {tool_tokens:>7} {handoff_tokens:>9} {total:>7}"
+        )
+
+    if args.budget is not None:
+        over_budget = [row[0] for row in rows if row[-1] > args.budget]
+        if over_budget:
+            print(f"Over budget of {args.budget} tokens: {', '.join(over_budget)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import aiosqlite
+
+from app.schemas.chat import UserInfo
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# "memory" (default) or "sqlite"
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.sqlite3")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_STORE_MAX_SESSIONS = int(os.getenv("SESSION_STORE_MAX_SESSIONS", "10000"))
+
+# UserInfo fields carried over between the requests of a conversation
+SESSION_CONTEXT_FIELDS = (
+    "interrupted_agent",
+    "data_type",
+    "user_input_language",
+    "standardised_vaccine_name",
+)
+
+
+def context_fields_from_user_info(user_info: Optional[dict]) -> dict:
+    """The SESSION_CONTEXT_FIELDS of a terminating event's user_info, as keyword arguments for UserInfo."""
+    user_info = user_info or {}
+    return {name: user_info.get(name) for name in SESSION_CONTEXT_FIELDS}
+
+
+@dataclass
+class ConversationSession:
+    session_id: str
+    history: list = field(default_factory=list)
+    current_agent: Optional[str] = None
+    interrupted_agent: Optional[str] = None
+    data_type: Optional[str] = None
+    user_input_language: Optional[str] = None
+    standardised_vaccine_name: Optional[str] = None
+
+    def context_fields(self) -> dict:
+        """Stored UserInfo fields, as keyword arguments for UserInfo."""
+        return {name: getattr(self, name) for name in SESSION_CONTEXT_FIELDS}
+
+    def update(self, history: list, current_agent: str, context: UserInfo) -> None:
+        """Record the state at the end of a run, called just before the terminating event."""
+        self.history = history
+        self.current_agent = current_agent
+        for name in SESSION_CONTEXT_FIELDS:
+            setattr(self, name, getattr(context, name))
+
+
+class InMemorySessionStore:
+    """
+    Sessions kept in process memory, lost on restart.
+    Sessions idle for longer than `ttl` seconds expire and the least recently used are evicted beyond `max_sessions`.
+    """
+
+    def __init__(
+        self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_STORE_MAX_SESSIONS
+    ) -> None:
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # session_id -> (expires_at, session)
+        self._sessions: OrderedDict[str, tuple[float, ConversationSession]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self._sessions.clear()
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._sessions[session_id]
+            self.misses += 1
+            return None
+
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        return entry[1]
+
+    async def save(self, session: ConversationSession) -> None:
+        self._sessions[session.session_id] = (time.monotonic() + self.ttl, session)
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SqliteSessionStore:
+    """
+    Sessions persisted in a SQLite database through aiosqlite, so conversations survive restarts.
+    Sessions idle for longer than `ttl` seconds expire, expired rows are purged on startup and on every save.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH, ttl: float = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._db: Optional[aiosqlite.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def initialize(self) -> None:
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """)
+        await self._db.execute(
+            "DELETE FROM sessions WHERE expires_at < ?", (time.time(),)
+        )
+        await self._db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        async with self._db.execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND expires_at >= ?",
+            (session_id, time.time()),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return ConversationSession(**json.loads(row[0]))
+
+    async def save(self, session: ConversationSession) -> None:
+        now = time.time()
+        await self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+            (session.session_id, json.dumps(asdict(session)), now + self.ttl),
+        )
+        await self._db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+        await self._db.commit()
+
+    async def delete(self, session_id: str) -> None:
+        await self._db.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        await self._db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+SessionStore = InMemorySessionStore | SqliteSessionStore
+
+
+def create_session_store(backend: str = SESSION_STORE_BACKEND) -> SessionStore:
+    if backend == "sqlite":
+        return SqliteSessionStore()
+    return InMemorySessionStore()
+
+
+async def load_session(
+    session_store: Optional[SessionStore],
+    session_id: Optional[str],
+    namespace: str = "main",
+) -> Optional[ConversationSession]:
+    """
+    The stored session, a new empty one if there is none yet, or None when sessions are not in use.
+    Each agent graph has its own `namespace`, as the stored current_agent only exists in the graph that saved it.
+    """
+    if session_store is None or not session_id:
+        return None
+    key = f"{namespace}:{session_id}"
+    session = await session_store.get(key)
+    return session or ConversationSession(session_id=key)
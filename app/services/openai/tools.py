@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import json
 import os
@@ -8,7 +9,6 @@ from typing import Dict, List
 
 import httpx
 import pytz
-import requests
 
 from agents import RunContextWrapper, function_tool
 from app.schemas.chat import (
@@ -24,6 +24,17 @@ from app.schemas.healthhubai import (
     PersonaType,
     QueryType,
 )
+from app.services.backend.backend_client import (
+    BackendClient,
+    get_default_backend_client,
+)
+from app.services.openai.backend_cache import backend_cache
+from app.services.openai.clinic_index import clinic_index
+from app.services.openai.geocoder import geocoder
+from app.services.openai.polyclinic_names import (
+    polyclinic_english_names,
+    resolve_polyclinic_name,
+)
 
 # --------------------------
 # Load environment variables
@@ -35,6 +46,7 @@ AZURE_OPENAI_CHATGPT_DEPLOYMENT = os.environ["AZURE_OPENAI_CHATGPT_DEPLOYMENT"]
 AZURE_HHAI_CHAT_ENDPOINT = os.environ["AZURE_HHAI_CHAT_ENDPOINT"]
 AZURE_HHAI_CHAT_SESSION_ID = os.environ["AZURE_HHAI_CHAT_SESSION_ID"]
 BACKEND_MAIN_API_URL = os.environ["BACKEND_MAIN_API_URL"]
+BOOKING_SLOT_CONCURRENCY = int(os.getenv("BOOKING_SLOT_CONCURRENCY", "20"))
 
 SEED = 1234
 RESPONSE_TOKEN_LIMIT = 512
@@ -57,55 +69,132 @@ CHATGPT_TOKEN_LIMIT = 128000
 # --------------------------
 # Tools Definition
 # --------------------------
-async def get_past_records(
-    wrapper: RunContextWrapper[UserInfo], requested_vaccine: str | None = None
-) -> list | str:
+def get_backend_client(wrapper: RunContextWrapper[UserInfo]) -> BackendClient:
     """
-    Helper function for get_vaccination_history_tool and get_latest_vaccination_tool
+    Returns the app-scoped pooled backend client carried in the run context.
+    """
+    return wrapper.context.context.backend_client or get_default_backend_client()
 
-    Args:
-        requested_vaccine: Optional parameter to filter past records by vaccine type in **English**. If none, returns most recent records for all vaccine types.
+
+async def cached_backend_get(
+    wrapper: RunContextWrapper[UserInfo], resource_type: str, path: str
+) -> httpx.Response:
     """
-    # Get the booked slots from user
-    async with httpx.AsyncClient(timeout=10.0) as httpclient:
-        try:
-            vaccination_history_records = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/records",
-                headers=wrapper.context.context.auth_header,
-            )
-            if vaccination_history_records.status_code == 404:
-                return "No records found."
-        except Exception as e:
-            print(f"Error making request: {e}")
+    GET a backend resource through the per-user backend_cache.
+    Only successful responses are cached, using the TTL tier of the resource type.
 
-    vaccination_history_records = json.loads(vaccination_history_records.text)
+    Args:
+        resource_type: One of the resource types in RESOURCE_TTLS (e.g. "records", "booking_slot")
+        path: Backend path of the resource (e.g. "/records")
+    """
+    auth_header = wrapper.context.context.auth_header
+    cached_text = backend_cache.get(auth_header, resource_type, path)
+    if cached_text is not None:
+        return httpx.Response(200, text=cached_text)
+
+    httpclient = get_backend_client(wrapper)
+    response = await httpclient.get(
+        f"{BACKEND_MAIN_API_URL}{path}",
+        headers=auth_header,
+    )
+    if response.status_code == 200:
+        backend_cache.set(auth_header, resource_type, path, response.text)
+    return response
 
-    most_recent_records = {}
 
-    for record in vaccination_history_records:
-        booking_slot_id = record["booking_slot_id"]
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
+async def get_booking_slots(
+    wrapper: RunContextWrapper[UserInfo], booking_slot_ids: List[str]
+) -> Dict[str, dict | None]:
+    """
+    Helper function to fetch booking slots concurrently, capped at BOOKING_SLOT_CONCURRENCY requests in flight.
+    Duplicate IDs are only fetched once. A missing or failed slot maps to None instead of failing the whole batch.
+
+    Args:
+        booking_slot_ids: The 'booking_slot_id' fields of the user's vaccination records
+    """
+    semaphore = asyncio.Semaphore(BOOKING_SLOT_CONCURRENCY)
+
+    async def get_booking_slot(booking_slot_id: str) -> dict | None:
+        async with semaphore:
             try:
-                booking_slot = await httpclient.get(
-                    f"{BACKEND_MAIN_API_URL}/bookings/{booking_slot_id}",
-                    headers=wrapper.context.context.auth_header,
+                booking_slot = await cached_backend_get(
+                    wrapper, "booking_slot", f"/bookings/{booking_slot_id}"
                 )
                 if booking_slot.status_code == 404:
-                    return "Missing booking slot."
+                    print(f"Missing booking slot: {booking_slot_id}")
+                    return None
+                return json.loads(booking_slot.text)
             except Exception as e:
                 print(f"Error making request: {e}")
+                return None
 
-        booking_slot = json.loads(booking_slot.text)
+    unique_booking_slot_ids = list(dict.fromkeys(booking_slot_ids))
+    booking_slots = await asyncio.gather(
+        *(
+            get_booking_slot(booking_slot_id)
+            for booking_slot_id in unique_booking_slot_ids
+        )
+    )
+    return dict(zip(unique_booking_slot_ids, booking_slots))
+
+
+async def get_augmented_records(wrapper: RunContextWrapper[UserInfo]) -> list | str:
+    """
+    Helper function to get the user's vaccination records, augmented with the vaccine name, date and polyclinic of their booking slots.
+    Records whose booking slot cannot be retrieved are left out.
+    """
+    # Get the booked slots from user
+    try:
+        vaccination_history_records = await cached_backend_get(
+            wrapper, "records", "/records"
+        )
+        if vaccination_history_records.status_code == 404:
+            return "No records found."
+    except Exception as e:
+        print(f"Error making request: {e}")
+
+    vaccination_history_records = json.loads(vaccination_history_records.text)
+
+    # Update the slots with respective vaccine names and date taken
+    booking_slots = await get_booking_slots(
+        wrapper, [record["booking_slot_id"] for record in vaccination_history_records]
+    )
+    augmented_records = []
+    for record in vaccination_history_records:
+        booking_slot = booking_slots[record["booking_slot_id"]]
+        if booking_slot is None:
+            continue
         del record["created_at"]
         record["vaccine_name"] = booking_slot["vaccine"]["name"]
         record["slot_date"] = booking_slot["datetime"]
         record["polyclinic"] = booking_slot["polyclinic"]["name"]
+        augmented_records.append(record)
+
+    return augmented_records
+
+
+async def get_past_records(
+    wrapper: RunContextWrapper[UserInfo], requested_vaccine: str | None = None
+) -> list | str:
+    """
+    Helper function for get_vaccination_history_tool and get_latest_vaccination_tool
+
+    Args:
+        requested_vaccine: Optional parameter to filter past records by vaccine type in **English**. If none, returns most recent records for all vaccine types.
+    """
+    augmented_records = await get_augmented_records(wrapper)
+    if isinstance(augmented_records, str):
+        return augmented_records
+
+    most_recent_records = {}
+    current_date = datetime.fromisoformat(f"{wrapper.context.context.date}").replace(
+        tzinfo=pytz.UTC
+    )
+
+    for record in augmented_records:
         record_date = datetime.fromisoformat(record["slot_date"]).replace(
             tzinfo=pytz.UTC
         )
-        current_date = datetime.fromisoformat(
-            f"{wrapper.context.context.date}"
-        ).replace(tzinfo=pytz.UTC)
 
         # Filter for past records
         if record_date < current_date:
@@ -124,9 +213,7 @@ async def get_past_records(
             ):
                 most_recent_records[vaccine_type] = record
 
-    augmented_records = list(most_recent_records.values())
-
-    return augmented_records
+    return list(most_recent_records.values())
 
 
 @function_tool
@@ -167,48 +254,20 @@ async def get_upcoming_appointments_tool(
     Args:
       requested_vaccine: Standardised user input of vaccine type found from chat history, must be in **English**.
     """
-    # Get the booked slots from user
-    async with httpx.AsyncClient(timeout=10.0) as httpclient:
-        try:
-            vaccination_history_records = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/records",
-                headers=wrapper.context.context.auth_header,
-            )
-            if vaccination_history_records.status_code == 404:
-                return "No records found."
-        except Exception as e:
-            print(f"Error making request: {e}")
-    vaccination_history_records = json.loads(vaccination_history_records.text)
-
-    # Update the slots with respective vaccine names and date taken
-    augmented_records = []
-    for record in vaccination_history_records:
-        booking_slot_id = record["booking_slot_id"]
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            try:
-                booking_slot = await httpclient.get(
-                    f"{BACKEND_MAIN_API_URL}/bookings/{booking_slot_id}",
-                    headers=wrapper.context.context.auth_header,
-                )
-                if booking_slot.status_code == 404:
-                    return "Missing booking slot."
-            except Exception as e:
-                print(f"Error making request: {e}")
-        booking_slot = json.loads(booking_slot.text)
-        del record["created_at"]
-        record["vaccine_name"] = booking_slot["vaccine"]["name"]
-        record["slot_date"] = booking_slot["datetime"]
-        record["polyclinic"] = booking_slot["polyclinic"]["name"]
-        if (
-            datetime.fromisoformat(record["slot_date"]).replace(tzinfo=pytz.UTC)
-            >= datetime.fromisoformat(f"{wrapper.context.context.date}").replace(
-                tzinfo=pytz.UTC
-            )
-            and record["vaccine_name"] == requested_vaccine
-        ):
-            augmented_records.append(record)
+    augmented_records = await get_augmented_records(wrapper)
+    if isinstance(augmented_records, str):
+        return augmented_records
 
-    return augmented_records
+    current_date = datetime.fromisoformat(f"{wrapper.context.context.date}").replace(
+        tzinfo=pytz.UTC
+    )
+    return [
+        record
+        for record in augmented_records
+        if datetime.fromisoformat(record["slot_date"]).replace(tzinfo=pytz.UTC)
+        >= current_date
+        and record["vaccine_name"] == requested_vaccine
+    ]
 
 
 @function_tool
@@ -216,49 +275,74 @@ async def recommend_vaccines_tool(wrapper: RunContextWrapper[UserInfo]) -> str:
     """
     Get vaccine recommendations for user based on their demographic.
     """
-    async with httpx.AsyncClient(timeout=10.0) as httpclient:
-        try:
-            recommendations = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/vaccines/recommendations",
-                headers=wrapper.context.context.auth_header,
-            )
-            if recommendations.status_code == 404:
-                return "Unable to get recommendations for user."
-        except Exception as e:
-            print(f"Error making request: {e}")
+    try:
+        recommendations = await cached_backend_get(
+            wrapper, "recommendations", "/vaccines/recommendations"
+        )
+        if recommendations.status_code == 404:
+            return "Unable to get recommendations for user."
+    except Exception as e:
+        print(f"Error making request: {e}")
     recommendations = json.loads(recommendations.text)
     return json.dumps(recommendations)
 
 
 @function_tool
-async def standardised_vaccine_name_tool(standardised_vaccine_name: str) -> str:
+async def standardised_vaccine_name_tool(
+    wrapper: RunContextWrapper[UserInfo], standardised_vaccine_name: str
+) -> str:
     """
     Structured output for standardised vaccine name.
     """
+    wrapper.context.context.standardised_vaccine_name = standardised_vaccine_name
     response_dict = {
         "standardised_vaccine_name": standardised_vaccine_name,
     }
     return response_dict
 
 
-async def get_location_info(location_name: str) -> dict | None:
+def get_nearest_clinics_from_index(
+    wrapper: RunContextWrapper[UserInfo],
+    clinic_type: str,
+    latitude: float,
+    longitude: float,
+    clinic_limit: int,
+) -> list | None:
     """
-    OneMap Search API to get the postal code, address, latitude, and longitude of a location.
+    Helper function to look up the nearest clinics in the in-process clinic_index, refreshing it in the background when stale.
+    Returns None if the clinic type is not indexed yet, in which case the caller should ask the backend.
     """
-    url = f"https://www.onemap.gov.sg/api/common/elastic/search?searchVal={location_name}&returnGeom=Y&getAddrDetails=Y&pageNum=1"
-    response = requests.get(url)
+    clinic_index.maybe_refresh(
+        clinic_type, get_backend_client(wrapper), wrapper.context.context.auth_header
+    )
+    return clinic_index.nearest(clinic_type, latitude, longitude, clinic_limit)
 
-    if response.status_code == 200:
-        data = response.json()
-        if data["found"] > 0:
-            result = data["results"][0]
-            return {
-                "postal_code": result["POSTAL"],
-                "address": result["ADDRESS"],
-                "latitude": result["LATITUDE"],
-                "longitude": result["LONGITUDE"],
-            }
-    return None
+
+async def get_home_coordinates(
+    wrapper: RunContextWrapper[UserInfo],
+) -> tuple[float, float] | None:
+    """
+    Helper function to get the latitude and longitude of the user's home address from their profile.
+    """
+    try:
+        user_profile = await cached_backend_get(wrapper, "user_profile", "/users")
+        if user_profile.status_code != 200:
+            return None
+        address = json.loads(user_profile.text)["address"]
+        return float(address["latitude"]), float(address["longitude"])
+    except Exception as e:
+        print(f"Error getting home coordinates: {e}")
+        return None
+
+
+async def get_location_info(
+    location_name: str, backend_client: BackendClient | None = None
+) -> dict | None:
+    """
+    Get the postal code, address, latitude, and longitude of a location, without blocking the event loop.
+    Results are cached by the geocoder, see app.services.openai.geocoder.
+    """
+    return await geocoder.geocode(location_name, backend_client)
 
 
 @function_tool
@@ -273,22 +357,32 @@ async def get_clinics_near_location_tool(
         location_name: Takes the location specified by the user
     """
     # Retrieve address information
-    location_result = await get_location_info(location_name)
+    location_result = await get_location_info(
+        location_name, get_backend_client(wrapper)
+    )
+    if location_result is None:
+        return f"Unable to find the location: {location_name}."
     latitude = float(location_result["latitude"])
     longitude = float(location_result["longitude"])
 
+    recommended_polyclinics = get_nearest_clinics_from_index(
+        wrapper, "polyclinic", latitude, longitude, 3
+    )
+    if recommended_polyclinics is not None:
+        return json.dumps(recommended_polyclinics)
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            get_recommended_polyclinic = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-location",
-                headers=wrapper.context.context.auth_header,
-                params={
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "clinic_type": "polyclinic",
-                    "clinic_limit": 3,
-                },
-            )
+        httpclient = get_backend_client(wrapper)
+        get_recommended_polyclinic = await httpclient.get(
+            url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-location",
+            headers=wrapper.context.context.auth_header,
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "clinic_type": "polyclinic",
+                "clinic_limit": 3,
+            },
+        )
     except Exception as e:
         print(f"Error making request: {e}")
 
@@ -304,10 +398,14 @@ async def get_clinic_name_response_helper_tool(
     Use this tool when polyclinic name is foud in chat history.
 
     Args:
-        clinic_name: Takes the clinic name found in chat history (e.g. "Toa Payoh Polyclinic")
+        clinic_name: Takes the clinic name found in chat history, in any language (e.g. "Toa Payoh Polyclinic", "大巴窑综合诊疗所")
     """
+    english_clinic_name = resolve_polyclinic_name(clinic_name)
+    if english_clinic_name is None:
+        return f"Unable to find the polyclinic: {clinic_name}. Known polyclinics: {', '.join(polyclinic_english_names())}"
+
     response_dict = {
-        "clinic": clinic_name,
+        "clinic": english_clinic_name,
     }
 
     return response_dict
@@ -322,16 +420,24 @@ async def get_clinics_near_home_tool(
     Returns polyclinics closest to the user's home address.
     """
     # Recommend polyclinics near home
+    home_coordinates = await get_home_coordinates(wrapper)
+    if home_coordinates is not None:
+        recommended_polyclinics = get_nearest_clinics_from_index(
+            wrapper, "polyclinic", *home_coordinates, 3
+        )
+        if recommended_polyclinics is not None:
+            return json.dumps(recommended_polyclinics)
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            get_recommended_polyclinic = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-home",
-                headers=wrapper.context.context.auth_header,
-                params={
-                    "clinic_type": "polyclinic",
-                    "clinic_limit": 3,
-                },
-            )
+        httpclient = get_backend_client(wrapper)
+        get_recommended_polyclinic = await httpclient.get(
+            url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-home",
+            headers=wrapper.context.context.auth_header,
+            params={
+                "clinic_type": "polyclinic",
+                "clinic_limit": 3,
+            },
+        )
     except Exception as e:
         print(f"Error making request: {e}")
 
@@ -352,30 +458,31 @@ async def get_available_slots_tool(
 
     Args:
         vaccine_name: Official name of vaccine type
-        clinic: The official name of clinic, must be in **English**
+        clinic: Name of the polyclinic, in any language (e.g. "Outram Polyclinic", "欧南综合诊疗所")
         start_date: Optional parameter. Include only if start date is provided by user. (Date in ISO format)
         end_date: Optional parameter. Include only if end date is provided by user. (Date in ISO format)
     """
+    clinic = resolve_polyclinic_name(clinic) or clinic
     if not start_date:
         start_date = wrapper.context.context.date
     if not end_date:
         end_date = (datetime.fromisoformat(start_date) + timedelta(days=3)).isoformat()
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            get_slots = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/bookings/available",
-                headers=wrapper.context.context.auth_header,
-                params={
-                    "vaccine_name": vaccine_name,
-                    "polyclinic_name": clinic,
-                    "start_datetime": start_date,
-                    "end_datetime": end_date,
-                    "timeslot_limit": 3,
-                },
-            )
-            if get_slots.status_code == 404:
-                return "No avaialable slots for current date range or clinic."
+        httpclient = get_backend_client(wrapper)
+        get_slots = await httpclient.get(
+            url=f"{BACKEND_MAIN_API_URL}/bookings/available",
+            headers=wrapper.context.context.auth_header,
+            params={
+                "vaccine_name": vaccine_name,
+                "polyclinic_name": clinic,
+                "start_datetime": start_date,
+                "end_datetime": end_date,
+                "timeslot_limit": 3,
+            },
+        )
+        if get_slots.status_code == 404:
+            return "No avaialable slots for current date range or clinic."
     except Exception as e:
         print(f"Error making request: {e}")
     result = json.loads(get_slots.text)
@@ -388,16 +495,24 @@ async def recommend_gps_tool(wrapper: RunContextWrapper[UserInfo]) -> str:
     Get nearest GPs to user's home address, if there are no available slots found at selected polyclinic.
     """
     # Get nearest 3 GPs to user's postal code
+    home_coordinates = await get_home_coordinates(wrapper)
+    if home_coordinates is not None:
+        recommended_gps = get_nearest_clinics_from_index(
+            wrapper, "gp", *home_coordinates, 3
+        )
+        if recommended_gps is not None:
+            return json.dumps(recommended_gps)
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            get_recommended_gp = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-home",
-                headers=wrapper.context.context.auth_header,
-                params={
-                    "clinic_type": "gp",
-                    "clinic_limit": 3,
-                },
-            )
+        httpclient = get_backend_client(wrapper)
+        get_recommended_gp = await httpclient.get(
+            url=f"{BACKEND_MAIN_API_URL}/clinics/nearest-by-home",
+            headers=wrapper.context.context.auth_header,
+            params={
+                "clinic_type": "gp",
+                "clinic_limit": 3,
+            },
+        )
     except Exception as e:
         print(f"Error making request: {e}")
 
@@ -418,14 +533,10 @@ async def construct_google_maps_url(
         travel_mode: The mode of travel to be used in the Google Maps URL
     """
     # Get user's postal code
-    async with httpx.AsyncClient(timeout=10.0) as httpclient:
-        try:
-            user_profile = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/users",
-                headers=wrapper.context.context.auth_header,
-            )
-        except Exception as e:
-            print(f"Error making request: {e}")
+    try:
+        user_profile = await cached_backend_get(wrapper, "user_profile", "/users")
+    except Exception as e:
+        print(f"Error making request: {e}")
 
     user_profile = json.loads(user_profile.text)
     origin_postal_code = user_profile["address"]["postal_code"]
@@ -452,11 +563,7 @@ async def new_appointment_tool(
         slot_id: The 'id' field for slot to be booked
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            slot = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/bookings/{slot_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        slot = await cached_backend_get(wrapper, "booking_slot", f"/bookings/{slot_id}")
     except Exception as e:
         return f"Error making request: {e}"
 
@@ -464,6 +571,8 @@ async def new_appointment_tool(
     dt_object = datetime.fromisoformat(slot["datetime"].replace("Z", "+00:00"))
 
     wrapper.context.context.data_type = "booking_details"
+    # The client confirms the appointment after this turn, so the user's records change before the next one
+    backend_cache.expect_change(wrapper.context.context.auth_header, "records")
     response_dict = {
         "booking_slot_id": slot_id,
         "vaccine": slot["vaccine"]["name"],
@@ -496,11 +605,9 @@ async def change_appointment_tool(
     # Get old appointment details
     # ---------------------------
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            old_vaccination_record = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/records/{record_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        old_vaccination_record = await cached_backend_get(
+            wrapper, "records", f"/records/{record_id}"
+        )
     except Exception as e:
         return f"Error making request: {e}"
     old_vaccination_record = json.loads(old_vaccination_record.text)
@@ -508,11 +615,9 @@ async def change_appointment_tool(
     # Update the cancelled slot with respective vaccine names and date taken
     old_booking_slot_id = old_vaccination_record["booking_slot_id"]
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            old_booking_slot = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/bookings/{old_booking_slot_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        old_booking_slot = await cached_backend_get(
+            wrapper, "booking_slot", f"/bookings/{old_booking_slot_id}"
+        )
     except Exception as e:
         return f"Error making request: {e}"
 
@@ -525,11 +630,9 @@ async def change_appointment_tool(
     # Get new appointment details
     # ---------------------------
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            new_slot = await httpclient.get(
-                url=f"{BACKEND_MAIN_API_URL}/bookings/{new_slot_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        new_slot = await cached_backend_get(
+            wrapper, "booking_slot", f"/bookings/{new_slot_id}"
+        )
     except Exception as e:
         return f"Error making request: {e}"
 
@@ -537,6 +640,8 @@ async def change_appointment_tool(
     new_dt_object = datetime.fromisoformat(new_slot["datetime"].replace("Z", "+00:00"))
 
     wrapper.context.context.data_type = "reschedule_details"
+    # The client confirms the appointment after this turn, so the user's records change before the next one
+    backend_cache.expect_change(wrapper.context.context.auth_header, "records")
 
     response_dict = {
         "record_id": record_id,
@@ -567,11 +672,9 @@ async def cancel_appointment_tool(wrapper: RunContextWrapper[UserInfo], record_i
     """
     # Get the record_id from user, to get confirmation to cancel the appointment
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            vaccination_record = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/records/{record_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        vaccination_record = await cached_backend_get(
+            wrapper, "records", f"/records/{record_id}"
+        )
     except Exception as e:
         return f"Error making request: {e}"
     vaccination_record = json.loads(vaccination_record.text)
@@ -579,11 +682,9 @@ async def cancel_appointment_tool(wrapper: RunContextWrapper[UserInfo], record_i
     # Update the cancelled slot with respective vaccine names and date taken
     booking_slot_id = vaccination_record["booking_slot_id"]
     try:
-        async with httpx.AsyncClient(timeout=10.0) as httpclient:
-            booking_slot = await httpclient.get(
-                f"{BACKEND_MAIN_API_URL}/bookings/{booking_slot_id}",
-                headers=wrapper.context.context.auth_header,
-            )
+        booking_slot = await cached_backend_get(
+            wrapper, "booking_slot", f"/bookings/{booking_slot_id}"
+        )
     except Exception as e:
         return f"Error making request: {e}"
 
@@ -591,6 +692,8 @@ async def cancel_appointment_tool(wrapper: RunContextWrapper[UserInfo], record_i
     dt_object = datetime.fromisoformat(booking_slot["datetime"].replace("Z", "+00:00"))
 
     wrapper.context.context.data_type = "cancel_details"
+    # The client confirms the appointment after this turn, so the user's records change before the next one
+    backend_cache.expect_change(wrapper.context.context.auth_header, "records")
 
     response_dict = {
         "record_id": record_id,
@@ -653,33 +756,33 @@ async def healthhub_ai_tool(
         }
 
         response_text = ""
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            async with client.stream(
-                "POST",
-                AZURE_HHAI_CHAT_ENDPOINT,
-                headers=headers,
-                json=data,
-            ) as response:
-                async for chunk in response.aiter_text():
-                    for line in chunk.splitlines():
-                        if not line.strip():
-                            continue
-
-                        buffer = line.strip()
-                        while buffer:
-                            try:
-                                # Parse ONE JSON object from the buffer
-                                obj, idx = json.JSONDecoder().raw_decode(buffer)
-                                buffer = buffer[idx:].lstrip()  # Remove parsed data
-
-                                # Extract message
-                                msg = obj.get("response_message", "")
-                                if msg:
-                                    response_text += msg
-
-                            except json.JSONDecodeError as e:
-                                print(f"[Partial JSON]: {buffer[:50]}... (error: {e})")
-                                break  # Incomplete JSON; wait for next chunk
+        httpclient = get_backend_client(wrapper)
+        async with httpclient.stream(
+            "POST",
+            AZURE_HHAI_CHAT_ENDPOINT,
+            headers=headers,
+            json=data,
+        ) as response:
+            async for chunk in response.aiter_text():
+                for line in chunk.splitlines():
+                    if not line.strip():
+                        continue
+
+                    buffer = line.strip()
+                    while buffer:
+                        try:
+                            # Parse ONE JSON object from the buffer
+                            obj, idx = json.JSONDecoder().raw_decode(buffer)
+                            buffer = buffer[idx:].lstrip()  # Remove parsed data
+
+                            # Extract message
+                            msg = obj.get("response_message", "")
+                            if msg:
+                                response_text += msg
+
+                        except json.JSONDecodeError as e:
+                            print(f"[Partial JSON]: {buffer[:50]}... (error: {e})")
+                            break  # Incomplete JSON; wait for next chunk
 
         return response_text
 
@@ -0,0 +1,385 @@
+import os
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Optional
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Matches below this confidence are left to handle_vaccine_names_agent
+VACCINE_NAME_CONFIDENCE_THRESHOLD = float(
+    os.getenv("VACCINE_NAME_CONFIDENCE_THRESHOLD", "0.8")
+)
+
+# Canonical vaccine names, as used by the backend
+VACCINE_NAMES = [
+    "Inactivated poliovirus (IPV)",
+    "Haemophilus influenzae type b (Hib)",
+    "Diphtheria, tetanus and acellular pertussis (DTaP)",
+    "Hepatitis B (HepB)",
+    "Influenza (INF)",
+    "Measles, mumps and rubella (MMR)",
+    "Varicella (VAR)",
+    "Human papillomavirus (HPV)",
+    "Pneumococcal polysaccharide (PPSV23)",
+    "Pneumococcal conjugate vaccine (PCV)",
+    "Tetanus, reduced diphtheria and acellular pertussis (Tdap)",
+    "Bacillus Calmette-Guérin (BCG)",
+]
+
+# Aliases in English, Chinese, Malay and Tamil, plus common abbreviations and brand names.
+# Terms shared by several vaccines (e.g. "tetanus", "pneumococcal") are deliberately left out, so they go to the LLM.
+VACCINE_NAME_ALIASES = {
+    "Inactivated poliovirus (IPV)": [
+        "inactivated poliovirus",
+        "ipv",
+        "polio",
+        "poliovirus",
+        "脊髓灰质炎",
+        "小儿麻痹",
+        "vaksin polio",
+        "போலியோ",
+    ],
+    "Haemophilus influenzae type b (Hib)": [
+        "haemophilus influenzae type b",
+        "hemophilus influenzae type b",
+        "haemophilus",
+        "hib",
+        "b型流感嗜血杆菌",
+        "乙型流感嗜血杆菌",
+        "ஹிப்",
+    ],
+    "Diphtheria, tetanus and acellular pertussis (DTaP)": [
+        "diphtheria tetanus and acellular pertussis",
+        "diphtheria tetanus acellular pertussis",
+        "dtap",
+        "百白破",
+        "difteria tetanus dan pertusis",
+    ],
+    "Hepatitis B (HepB)": [
+        "hepatitis b",
+        "hep b",
+        "hepb",
+        "hbv",
+        "乙肝",
+        "乙型肝炎",
+        "vaksin hepatitis b",
+        "ஹெபடைடிஸ் பி",
+    ],
+    "Influenza (INF)": [
+        "influenza",
+        "flu",
+        "flu shot",
+        "flu jab",
+        "inf",
+        "流感",
+        "流行性感冒",
+        "selesema",
+        "vaksin selesema",
+        "vaksin influenza",
+        "இன்ஃப்ளூயன்ஸா",
+        "ஃப்ளூ",
+    ],
+    "Measles, mumps and rubella (MMR)": [
+        "measles mumps and rubella",
+        "measles mumps rubella",
+        "mmr",
+        "measles",
+        "mumps",
+        "rubella",
+        "麻疹",
+        "腮腺炎",
+        "风疹",
+        "麻腮风",
+        "campak",
+        "beguk",
+        "rubela",
+        "தட்டம்மை",
+        "புட்டாளம்மை",
+        "ருபெல்லா",
+    ],
+    "Varicella (VAR)": [
+        "varicella",
+        "chickenpox",
+        "chicken pox",
+        "var",
+        "水痘",
+        "cacar air",
+        "சின்னம்மை",
+        "வெரிசெல்லா",
+    ],
+    "Human papillomavirus (HPV)": [
+        "human papillomavirus",
+        "human papilloma virus",
+        "hpv",
+        "cervical cancer vaccine",
+        "gardasil",
+        "人乳头瘤病毒",
+        "宫颈癌疫苗",
+        "vaksin hpv",
+        "ஹெச்பிவி",
+    ],
+    "Pneumococcal polysaccharide (PPSV23)": [
+        "pneumococcal polysaccharide",
+        "ppsv23",
+        "ppsv",
+        "ppv23",
+        "pneumovax",
+        "肺炎球菌多糖",
+        "pneumokokal polisakarida",
+    ],
+    "Pneumococcal conjugate vaccine (PCV)": [
+        "pneumococcal conjugate",
+        "pcv",
+        "pcv13",
+        "pcv15",
+        "pcv20",
+        "prevnar",
+        "肺炎球菌结合",
+        "pneumokokal konjugat",
+    ],
+    "Tetanus, reduced diphtheria and acellular pertussis (Tdap)": [
+        "tetanus reduced diphtheria and acellular pertussis",
+        "tdap",
+        "boostrix",
+        "adacel",
+    ],
+    "Bacillus Calmette-Guérin (BCG)": [
+        "bacillus calmette guerin",
+        "bacillus calmette guérin",
+        "bcg",
+        "tuberculosis",
+        "tb vaccine",
+        "卡介苗",
+        "结核",
+        "tuberkulosis",
+        "batuk kering",
+        "காசநோய்",
+        "பிசிஜி",
+    ],
+}
+
+# Filler words stripped before matching, e.g. "flu vaccine" -> "flu"
+FILLER_WORDS = {
+    "vaccine",
+    "vaccines",
+    "vaccination",
+    "jab",
+    "shot",
+    "dose",
+    "booster",
+    "the",
+    "a",
+    "my",
+    "vaksin",
+    "suntikan",
+    "疫苗",
+    "针",
+    "தடுப்பூசி",
+}
+
+
+# Terms naming a disease or group of vaccines without saying which vaccine, e.g. "tetanus" (DTaP or Tdap)
+AMBIGUOUS_VACCINE_TERMS = [
+    "tetanus",
+    "diphtheria",
+    "pertussis",
+    "whooping cough",
+    "pneumococcal",
+    "pneumonia",
+    "hepatitis",
+    "hep",
+    "covid",
+    "covid 19",
+    "shingles",
+    "dengue",
+    "rabies",
+    "typhoid",
+    "cholera",
+    "yellow fever",
+    "破伤风",
+    "白喉",
+    "百日咳",
+    "肺炎",
+    "肝炎",
+    "新冠",
+    "带状疱疹",
+    "登革热",
+    "狂犬",
+    "伤寒",
+    "kayu tiga",
+    "radang paru paru",
+    "ரணஜன்னி",
+]
+
+# Words that say nothing about which vaccine, when in front of a vaccine noun: "a vaccine", "my booster"
+GENERIC_VACCINE_QUALIFIERS = FILLER_WORDS | {
+    "an",
+    "our",
+    "his",
+    "her",
+    "their",
+    "this",
+    "that",
+    "next",
+    "first",
+    "second",
+    "third",
+    "another",
+    "any",
+    "some",
+    "for",
+    "get",
+    "take",
+    "book",
+    "schedule",
+}
+# English vaccine nouns follow the vaccine's name ("tetanus shot"), Malay ones precede it ("suntikan kayu")
+VACCINE_NOUNS_AFTER_NAME = {"vaccine", "vaccines", "jab", "shot", "dose", "booster"}
+VACCINE_NOUNS_BEFORE_NAME = {"vaksin", "suntikan"}
+
+
+@dataclass
+class VaccineNameMatch:
+    name: Optional[str]
+    confidence: float
+    alias: Optional[str] = None
+
+    @property
+    def is_confident(self) -> bool:
+        return (
+            self.name is not None
+            and self.confidence >= VACCINE_NAME_CONFIDENCE_THRESHOLD
+        )
+
+
+def normalize_vaccine_query(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", text.casefold())
+    return " ".join(text.split())
+
+
+def strip_filler_words(text: str) -> str:
+    for filler in FILLER_WORDS:
+        if not filler.isascii():
+            text = text.replace(filler, " ")
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+
+def _build_alias_index() -> dict[str, str]:
+    alias_index = {}
+    for name in VACCINE_NAMES:
+        alias_index[normalize_vaccine_query(name)] = name
+        for alias in VACCINE_NAME_ALIASES[name]:
+            alias_index[normalize_vaccine_query(alias)] = name
+    return alias_index
+
+
+ALIAS_INDEX = _build_alias_index()
+# Longest aliases first, so "hepatitis b" wins over shorter overlapping aliases
+ALIASES_BY_LENGTH = sorted(ALIAS_INDEX, key=len, reverse=True)
+
+
+def _contains_alias(query: str, alias: str) -> bool:
+    if alias.isascii():
+        return f" {alias} " in f" {query} "
+    # Chinese has no word boundaries and Tamil inflects by suffixing, so match anywhere
+    return alias in query
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether one insertion, deletion or substitution turns `a` into `b`, i.e. a typo."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1 :] == b[i + 1 :]
+    return a[i:] == b[i + 1 :]
+
+
+def match_vaccine_name(text: str) -> VaccineNameMatch:
+    """
+    Map free text such as "flu vaccine" or "水痘疫苗" onto one of the canonical VACCINE_NAMES, with a confidence score.
+    - 1.0: the text is exactly a name or alias
+    - 0.95: exactly one vaccine's alias is mentioned in the text
+    - 0.85: the text is a typo of an alias, e.g. "chikenpox"
+    - 0.5: aliases of several different vaccines are mentioned, or an AMBIGUOUS_VACCINE_TERMS term besides the
+      aliases, e.g. "hepatitis a"
+    - otherwise: fuzzy similarity to the closest alias, kept below VACCINE_NAME_CONFIDENCE_THRESHOLD
+    """
+    query = normalize_vaccine_query(text)
+    stripped_query = strip_filler_words(query)
+
+    for candidate in (query, stripped_query):
+        if candidate in ALIAS_INDEX:
+            return VaccineNameMatch(ALIAS_INDEX[candidate], 1.0, candidate)
+
+    mentioned = {}
+    # The query without the aliases found, padded so ASCII aliases are removed as whole words only
+    remainder = f" {query} "
+    for alias in ALIASES_BY_LENGTH:
+        if _contains_alias(remainder, alias):
+            mentioned.setdefault(ALIAS_INDEX[alias], alias)
+            remainder = remainder.replace(
+                f" {alias} " if alias.isascii() else alias, "  "
+            )
+    # "hepatitis" is HepB or hepatitis A, "tetanus" DTaP or Tdap: leave those to the LLM
+    ambiguous = any(
+        _contains_alias(remainder, term) for term in AMBIGUOUS_VACCINE_TERMS
+    )
+    if len(mentioned) == 1 and not ambiguous:
+        name, alias = next(iter(mentioned.items()))
+        return VaccineNameMatch(name, 0.95, alias)
+    if mentioned:
+        name, alias = next(iter(mentioned.items()))
+        return VaccineNameMatch(name, 0.5, alias)
+    if ambiguous:
+        return VaccineNameMatch(None, 0.5)
+
+    if not stripped_query:
+        return VaccineNameMatch(None, 0.0)
+
+    for alias in ALIAS_INDEX:
+        if (
+            len(alias) >= 5
+            and alias.isascii()
+            and _within_one_edit(stripped_query, alias)
+        ):
+            return VaccineNameMatch(ALIAS_INDEX[alias], 0.85, alias)
+
+    best_alias, best_ratio = None, 0.0
+    for alias in ALIAS_INDEX:
+        ratio = SequenceMatcher(None, stripped_query, alias).ratio()
+        if ratio > best_ratio:
+            best_alias, best_ratio = alias, ratio
+    if best_alias is None:
+        return VaccineNameMatch(None, 0.0)
+    # A similar alias is a hint for the LLM, never enough to pick the vaccine
+    confidence = min(0.9 * best_ratio, VACCINE_NAME_CONFIDENCE_THRESHOLD - 0.05)
+    return VaccineNameMatch(ALIAS_INDEX[best_alias], confidence, best_alias)
+
+
+def mentions_vaccine(text: str) -> bool:
+    """
+    Whether the text names some vaccine, known or not: "book a tetanus shot" does, "book a vaccine appointment" does
+    not. Tells a vaccine match_vaccine_name could not resolve apart from no vaccine at all.
+    """
+    query = normalize_vaccine_query(text)
+    if any(_contains_alias(query, term) for term in AMBIGUOUS_VACCINE_TERMS):
+        return True
+
+    words = query.split()
+    for i, word in enumerate(words):
+        if word in VACCINE_NOUNS_AFTER_NAME:
+            qualifier = words[i - 1] if i > 0 else None
+        elif word in VACCINE_NOUNS_BEFORE_NAME:
+            qualifier = words[i + 1] if i + 1 < len(words) else None
+        else:
+            continue
+        if qualifier is not None and qualifier not in GENERIC_VACCINE_QUALIFIERS:
+            return True
+    return False
@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+TTS_AUDIO_CACHE_SIZE = int(os.getenv("TTS_AUDIO_CACHE_SIZE", "512"))
+# Directory of the on-disk tier, kept across restarts; unset keeps the cache in memory only
+TTS_AUDIO_CACHE_DIR = os.getenv("TTS_AUDIO_CACHE_DIR")
+# Size of the on-disk tier, the least recently used audio is dropped beyond it
+TTS_AUDIO_CACHE_DISK_BYTES = int(
+    os.getenv("TTS_AUDIO_CACHE_DISK_BYTES", str(256 * 1024 * 1024))
+)
+# Sentences are written to disk once synthesized or served this many times while in memory, besides the warm-up
+# phrases. One-off sentences, e.g. with the user's appointment details, stay in memory only.
+TTS_AUDIO_CACHE_PERSIST_AFTER = int(os.getenv("TTS_AUDIO_CACHE_PERSIST_AFTER", "3"))
+# Share of TTS_AUDIO_CACHE_DISK_BYTES kept when the on-disk tier is compacted
+DISK_COMPACTION_RATIO = 0.75
+
+
+class DiskAudioStore:
+    """
+    Append-only audio file with a JSON lines index of (key, offset, length), read through a memory map so a hit
+    costs a copy out of the page cache rather than a file read. An entry is indexed only once its audio is written,
+    so audio left unindexed by a crash is ignored.
+    Once the audio file grows past `max_bytes`, both files are rewritten with the most recently used entries only.
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = TTS_AUDIO_CACHE_DISK_BYTES
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.audio_path = os.path.join(directory, "audio.bin")
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._open_files()
+        # Least recently used first
+        self.index: OrderedDict[str, tuple[int, int]] = self._load_index()
+        self._map: Optional[mmap.mmap] = None
+        self.compactions = 0
+
+    def _open_files(self) -> None:
+        self.audio_file = open(self.audio_path, "ab")
+        self.index_file = open(self.index_path, "a", encoding="utf-8")
+
+    def _load_index(self) -> OrderedDict[str, tuple[int, int]]:
+        size = os.path.getsize(self.audio_path)
+        index = OrderedDict()
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Ignoring unreadable audio cache index entry")
+                    continue
+                if entry["offset"] + entry["length"] <= size:
+                    index[entry["key"]] = (entry["offset"], entry["length"])
+        return index
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def size(self) -> int:
+        return self.audio_file.tell()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        self.index.move_to_end(key)
+        return self._read(*entry)
+
+    def put(self, key: str, audio: bytes) -> None:
+        if key in self.index:
+            return
+        offset = self.audio_file.tell()
+        self.audio_file.write(audio)
+        self.audio_file.flush()
+        self.index_file.write(
+            json.dumps({"key": key, "offset": offset, "length": len(audio)}) + "\n"
+        )
+        self.index_file.flush()
+        self.index[key] = (offset, len(audio))
+        if self.size > self.max_bytes:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the audio file and index with the most recently used entries that fit the compacted size."""
+        budget = int(self.max_bytes * DISK_COMPACTION_RATIO)
+        kept = []
+        for key, (offset, length) in reversed(self.index.items()):
+            if length > budget:
+                break
+            budget -= length
+            kept.append((key, self._read(offset, length)))
+        kept.reverse()
+
+        compacted = OrderedDict()
+        with (
+            open(f"{self.audio_path}.tmp", "wb") as audio_file,
+            open(f"{self.index_path}.tmp", "w", encoding="utf-8") as index_file,
+        ):
+            for key, audio in kept:
+                compacted[key] = (audio_file.tell(), len(audio))
+                audio_file.write(audio)
+                index_file.write(
+                    json.dumps(
+                        {"key": key, "offset": compacted[key][0], "length": len(audio)}
+                    )
+                    + "\n"
+                )
+
+        self._close_map()
+        self.audio_file.close()
+        self.index_file.close()
+        # The index is emptied first, so a crash in between leaves an empty cache rather than offsets into other audio
+        open(self.index_path, "w").close()
+        os.replace(f"{self.audio_path}.tmp", self.audio_path)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        self._open_files()
+        self.index = compacted
+        self.compactions += 1
+
+    def _read(self, offset: int, length: int) -> bytes:
+        # Map again once the file has grown past the current map
+        if self._map is None or offset + length > len(self._map):
+            self._close_map()
+            with open(self.audio_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset : offset + length]
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def close(self) -> None:
+        self._close_map()
+        self.audio_file.close()
+        self.index_file.close()
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized audio, keyed by a hash of the sanitized text, voice and output format.
+    Recently used audio is kept in memory. If TTS_AUDIO_CACHE_DIR is set, recurring sentences and the warm-up phrases
+    are also kept on disk, see TTS_AUDIO_CACHE_PERSIST_AFTER.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = TTS_AUDIO_CACHE_SIZE,
+        directory: Optional[str] = TTS_AUDIO_CACHE_DIR,
+        persist_after: int = TTS_AUDIO_CACHE_PERSIST_AFTER,
+        max_disk_bytes: int = TTS_AUDIO_CACHE_DISK_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.directory = directory
+        self.persist_after = persist_after
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: OrderedDict[str, bytes] = OrderedDict()
+        # Times each sentence in memory was synthesized or served
+        self.uses: dict[str, int] = {}
+        self.disk: Optional[DiskAudioStore] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Disk reads and writes are serialized, as a write can compact the files under the memory map
+        self._disk_lock = asyncio.Lock()
+        self._persist_tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def key(text: str, voice_name: str, output_format: str) -> str:
+        return hashlib.sha256(
+            f"{output_format}\n{voice_name}\n{text}".encode("utf-8")
+        ).hexdigest()
+
+    def open(self) -> None:
+        if self.directory and self.disk is None:
+            self.disk = DiskAudioStore(self.directory, self.max_disk_bytes)
+
+    def close(self) -> None:
+        for task in self._persist_tasks:
+            task.cancel()
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.memory or (self.disk is not None and key in self.disk)
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        self.memory[key] = audio
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            evicted, _ = self.memory.popitem(last=False)
+            self.uses.pop(evicted, None)
+
+    def _count_use(self, key: str) -> bool:
+        """Count a use of a sentence in memory, and tell whether it is due to be written to disk."""
+        if key not in self.memory:
+            return False
+        self.uses[key] = self.uses.get(key, 0) + 1
+        return (
+            self.disk is not None
+            and self.uses[key] >= self.persist_after
+            and key not in self.disk
+        )
+
+    async def _persist(self, key: str, audio: bytes) -> None:
+        async with self._disk_lock:
+            if self.disk is not None:
+                await asyncio.to_thread(self.disk.put, key, audio)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            audio = self.memory[key]
+            if self._count_use(key):
+                # In the background, the hit is served meanwhile
+                task = asyncio.create_task(self._persist(key, audio))
+                self._persist_tasks.add(task)
+                task.add_done_callback(self._persist_tasks.discard)
+            return audio
+        audio = None
+        if self.disk is not None:
+            async with self._disk_lock:
+                audio = self.disk.get(key)
+        if audio is not None:
+            self._remember(key, audio)
+            self.disk_hits += 1
+            return audio
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes, persist: bool = False) -> None:
+        """Cache newly synthesized audio, on disk too if `persist` or once it recurs."""
+        self._remember(key, audio)
+        if (self._count_use(key) or persist) and self.disk is not None:
+            await self._persist(key, audio)
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_bytes": self.disk.size if self.disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / (hits + self.misses) if hits + self.misses else 0.0,
+        }
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from azure.core.credentials import AccessToken
+from azure.identity.aio import DefaultAzureCredential
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+AZURE_SPEECH_SERVICE_ID = os.getenv("AZURE_SPEECH_SERVICE_ID")
+# Seconds before expiry at which the background task refreshes the token
+AZURE_TOKEN_REFRESH_MARGIN = float(os.getenv("AZURE_TOKEN_REFRESH_MARGIN", "300"))
+# Seconds between attempts while refreshing fails, and the shortest wait between two refreshes
+AZURE_TOKEN_RETRY_DELAY = float(os.getenv("AZURE_TOKEN_RETRY_DELAY", "10"))
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+class AzureTokenManager:
+    """
+    One Azure AD token for the speech services, shared by TextToSpeech and SpeechToText.
+    - A background task refreshes it AZURE_TOKEN_REFRESH_MARGIN seconds before it expires and pushes the new
+      token to every subscriber (speech configs, synthesizers, recognizers), so requests never wait for a token.
+    - Concurrent refreshes share a single get_token call, e.g. requests finding the token expired because the
+      background refresh kept failing.
+    """
+
+    def __init__(
+        self,
+        resource_id: Optional[str] = AZURE_SPEECH_SERVICE_ID,
+        credential=None,
+    ) -> None:
+        self.resource_id = resource_id
+        self.credential = credential or DefaultAzureCredential()
+        self.access_token: Optional[AccessToken] = None
+        self.refreshes = 0
+        self._subscribers: list[Callable[[str], None]] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
+
+    @property
+    def auth_token(self) -> str:
+        return "aad#" + self.resource_id + "#" + self.access_token.token
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Call `callback` with every new auth token."""
+        self._subscribers.append(callback)
+
+    async def start(self):
+        await self.refresh()
+        if self._background_task is None:
+            self._background_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._background_task is not None:
+            self._background_task.cancel()
+            self._background_task = None
+        await self.credential.close()
+
+    async def get_auth_token(self) -> str:
+        """The current auth token, only fetched here if there is none yet or it has expired."""
+        if self.access_token is None or self.access_token.expires_on <= time.time():
+            await self.refresh()
+        return self.auth_token
+
+    async def refresh(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._fetch())
+        # Shielded, so a cancelled request does not cancel the refresh others are waiting on
+        await asyncio.shield(self._refresh_task)
+
+    async def _fetch(self):
+        try:
+            self.access_token = await self.credential.get_token(
+                COGNITIVE_SERVICES_SCOPE
+            )
+            self.refreshes += 1
+            auth_token = self.auth_token
+            for callback in self._subscribers:
+                callback(auth_token)
+        finally:
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            delay = (
+                self.access_token.expires_on - AZURE_TOKEN_REFRESH_MARGIN - time.time()
+            )
+            await asyncio.sleep(max(delay, AZURE_TOKEN_RETRY_DELAY))
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(
+                    f"Azure token refresh failed, retrying in {AZURE_TOKEN_RETRY_DELAY}s: {e}"
+                )
@@ -0,0 +1,57 @@
+import asyncio
+import os
+from collections import deque
+from typing import AsyncGenerator, Optional
+
+from app.services.speech.text_to_speech import TextToSpeech
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Sentences of one answer synthesized at the same time
+TTS_PIPELINE_CONCURRENCY = int(os.getenv("TTS_PIPELINE_CONCURRENCY", "3"))
+
+
+class SpeechPipeline:
+    """
+    Synthesizes the sentences of a voice answer in the background, so its text keeps streaming meanwhile.
+    Up to `max_concurrency` sentences are synthesized at once, and their audio is handed back in sentence order.
+    With `raw_audio`, the audio is MP3 bytes for the event's audio_bytes field, else base64 for its audio_data field.
+    """
+
+    def __init__(
+        self,
+        speech_client: TextToSpeech,
+        max_concurrency: int = TTS_PIPELINE_CONCURRENCY,
+        raw_audio: bool = False,
+    ) -> None:
+        self.speech_client = speech_client
+        self.read = speech_client.read_audio if raw_audio else speech_client.read_text
+        self.audio_field = "audio_bytes" if raw_audio else "audio_data"
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.pending: deque[asyncio.Task[str | bytes]] = deque()
+
+    async def _synthesize(self, text: str) -> str | bytes:
+        async with self.semaphore:
+            return await self.read(text)
+
+    def submit(self, text: str) -> None:
+        if text.strip():
+            self.pending.append(asyncio.create_task(self._synthesize(text)))
+
+    def ready_audio(self) -> Optional[str | bytes]:
+        """Audio of the next sentence if it is synthesized already, one sentence per call to keep one per event."""
+        if self.pending and self.pending[0].done():
+            return self.pending.popleft().result()
+        return None
+
+    async def drain(self) -> AsyncGenerator[str | bytes, None]:
+        """Audio of every sentence still pending, in order, each as soon as it is synthesized."""
+        while self.pending:
+            yield await self.pending[0]
+            self.pending.popleft()
+
+    def cancel(self) -> None:
+        for task in self.pending:
+            task.cancel()
+        self.pending.clear()
@@ -1,37 +1,135 @@
-import io
+import asyncio
 import os
-import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, AsyncIterable, Optional
 
 import azure.cognitiveservices.speech as speechsdk
-from azure.core.credentials import AccessToken
-from azure.identity.aio import DefaultAzureCredential
 from dotenv import load_dotenv
 
 from app.schemas.voice import TranscriptionResponse
+from app.services.speech.azure_token import AzureTokenManager
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../../../../.env"))
 
 
+# --------------------------
+# Load environment variables
+# --------------------------
+# Uploads transcribed at once, each holds a worker thread while the service recognizes it
+STT_MAX_WORKERS = int(os.getenv("STT_MAX_WORKERS", "8"))
+
+# Languages recognized, the service identifies which one at the start of the audio
+RECOGNITION_LANGUAGES = ["en-SG", "zh-CN", "ta-IN", "ms-MY"]
+
+
+class RecognitionStream:
+    """
+    Continuous recognition of audio pushed in chunks as it arrives, e.g. from a microphone over a WebSocket.
+    The audio is 16 kHz 16-bit mono PCM. The Speech SDK calls back on its own threads, the callbacks hand the
+    results over to the event loop, and the blocking start and stop calls run in the default executor.
+    """
+
+    def __init__(
+        self,
+        speech_config: speechsdk.SpeechConfig,
+        auto_detect_source_language_config: speechsdk.languageconfig.AutoDetectSourceLanguageConfig,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self.loop = loop
+        self.push_stream = speechsdk.audio.PushAudioInputStream()
+        self.recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=self.push_stream),
+            auto_detect_source_language_config=auto_detect_source_language_config,
+        )
+        # ("partial" | "final" | "error", text), then None once the recognition stopped
+        self.results: asyncio.Queue[Optional[tuple[str, str]]] = asyncio.Queue()
+        self.recognizer.recognizing.connect(self._on_recognizing)
+        self.recognizer.recognized.connect(self._on_recognized)
+        self.recognizer.canceled.connect(self._on_canceled)
+        self.recognizer.session_stopped.connect(self._on_session_stopped)
+        self._stopped = False
+
+    def _put(self, result: Optional[tuple[str, str]]):
+        self.loop.call_soon_threadsafe(self.results.put_nowait, result)
+
+    def _on_recognizing(self, evt: speechsdk.SpeechRecognitionEventArgs):
+        if evt.result.text:
+            self._put(("partial", evt.result.text))
+
+    def _on_recognized(self, evt: speechsdk.SpeechRecognitionEventArgs):
+        if (
+            evt.result.reason == speechsdk.ResultReason.RecognizedSpeech
+            and evt.result.text
+        ):
+            self._put(("final", evt.result.text))
+
+    def _on_canceled(self, evt: speechsdk.SpeechRecognitionCanceledEventArgs):
+        if evt.cancellation_details.reason == speechsdk.CancellationReason.Error:
+            self._put(("error", evt.cancellation_details.error_details))
+        self._put(None)
+
+    def _on_session_stopped(self, evt: speechsdk.SessionEventArgs):
+        self._put(None)
+
+    async def start(self):
+        await self.loop.run_in_executor(
+            None, self.recognizer.start_continuous_recognition
+        )
+
+    def write(self, chunk: bytes):
+        """Queue an audio chunk, the SDK copies it into its buffer without waiting on the service."""
+        self.push_stream.write(chunk)
+
+    def end_audio(self):
+        """No more audio: the last phrase is recognized, then the session stops."""
+        self.push_stream.close()
+
+    async def __aiter__(self) -> AsyncGenerator[tuple[str, str], None]:
+        while (result := await self.results.get()) is not None:
+            yield result
+
+    async def stop(self):
+        if not self._stopped:
+            self._stopped = True
+            await self.loop.run_in_executor(
+                None, self.recognizer.stop_continuous_recognition
+            )
+
+
 class SpeechToText:
     """
     This class creates a speech config object and it is created only once when the app starts.
+    The language config and the transcription worker pool are shared by all requests too. Recognizers are bound to
+    the audio stream they are created with, so each upload still gets its own.
+    The token manager pushes new tokens to the speech config and the live recognitions, so requests never fetch one.
     """
 
-    def __init__(self):
+    def __init__(
+        self, token_manager: AzureTokenManager, max_workers: int = STT_MAX_WORKERS
+    ):
         # Set up config variables
-        self.resource_id = os.getenv("AZURE_SPEECH_SERVICE_ID")
         self.region = os.getenv("AZURE_SPEECH_SERVICE_LOCATION")
-        self.credential = DefaultAzureCredential()
-        self.access_token = None
+        self.token_manager = token_manager
         self.speech_config = None
+        # Continuous recognitions can outlive a token, unlike single uploads
+        self.recognitions: weakref.WeakSet[RecognitionStream] = weakref.WeakSet()
+        self.auto_detect_source_language_config = (
+            speechsdk.languageconfig.AutoDetectSourceLanguageConfig(
+                languages=RECOGNITION_LANGUAGES
+            )
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speech-to-text"
+        )
+        # Uploads beyond the pool wait here, before their audio is buffered
+        self.transcription_slots = asyncio.Semaphore(max_workers)
 
     async def initialize(self):
         """Asynchronous initialization to set up access token and speech config."""
-        self.access_token = await self.credential.get_token(
-            "https://cognitiveservices.azure.com/.default"
-        )
         self.speech_config = speechsdk.SpeechConfig(
-            auth_token=self.get_auth_token(self.resource_id, self.access_token),
+            auth_token=await self.token_manager.get_auth_token(),
             region=self.region,
         )
         self.speech_config.set_properties(
@@ -40,49 +138,58 @@ class SpeechToText:
             }
         )
 
-    def get_auth_token(self, resource_id, token: AccessToken):
-        return "aad#" + resource_id + "#" + token.token
-
-    async def reset_token(self):
-        if self.access_token.expires_on < time.time() + 60:
-            self.access_token = await self.credential.get_token(
-                "https://cognitiveservices.azure.com/.default"
-            )
-            self.speech_config.authorization_token = self.get_auth_token(
-                self.resource_id, self.access_token
-            )
-
-    async def transcribe(self, audio_file):
-        await self.reset_token()
-
-        # Read the audio file into a BytesIO stream
-        audio_stream = io.BytesIO(await audio_file.read())
+        self.token_manager.subscribe(self.set_auth_token)
 
-        stream = speechsdk.audio.PushAudioInputStream(stream_format=None)
-        stream.write(audio_stream.getvalue())
-        stream.close()
+    def set_auth_token(self, auth_token: str):
+        self.speech_config.authorization_token = auth_token
+        for recognition in list(self.recognitions):
+            recognition.recognizer.authorization_token = auth_token
 
-        audio_config = speechsdk.audio.AudioConfig(stream=stream)
-        auto_detect_source_language_config = (
-            speechsdk.languageconfig.AutoDetectSourceLanguageConfig(
-                languages=["en-SG", "zh-CN", "ta-IN", "ms-MY"]
-            )
+    async def start_recognition(self) -> RecognitionStream:
+        """Start continuous recognition of audio to be pushed in chunks."""
+        recognition = RecognitionStream(
+            self.speech_config,
+            self.auto_detect_source_language_config,
+            asyncio.get_running_loop(),
         )
+        self.recognitions.add(recognition)
+        await recognition.start()
+        return recognition
 
+    async def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def recognize_once(
+        self, stream: speechsdk.audio.PushAudioInputStream
+    ) -> speechsdk.SpeechRecognitionResult:
+        """Blocking, run on the worker pool: recognize the first utterance of the audio pushed into the stream."""
         speech_recognizer = speechsdk.SpeechRecognizer(
             speech_config=self.speech_config,
-            audio_config=audio_config,
-            auto_detect_source_language_config=auto_detect_source_language_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=stream),
+            auto_detect_source_language_config=self.auto_detect_source_language_config,
         )
-
-        # Perform the transcription
-        result = speech_recognizer.recognize_once_async().get()
+        return speech_recognizer.recognize_once()
+
+    async def transcribe(self, audio_chunks: AsyncIterable[bytes]):
+        """Transcribe 16 kHz 16-bit mono PCM audio, recognized while its chunks are still arriving."""
+        async with self.transcription_slots:
+            stream = speechsdk.audio.PushAudioInputStream(stream_format=None)
+            recognition = asyncio.get_running_loop().run_in_executor(
+                self.executor, self.recognize_once, stream
+            )
+            try:
+                async for chunk in audio_chunks:
+                    if chunk:
+                        stream.write(chunk)
+            finally:
+                stream.close()
+            result = await recognition
 
         # Return the transcription result
         if result.reason == speechsdk.ResultReason.RecognizedSpeech:
             response = TranscriptionResponse(text=result.text)
             return response.model_dump(), 200
-        elif result.reason == result.reason == speechsdk.ResultReason.NoMatch:
+        elif result.reason == speechsdk.ResultReason.NoMatch:
             return (
                 {
                     "error": "No spoken words were detected, please try saying your query again. Thank you!"
@@ -1,76 +1,186 @@
+import asyncio
 import base64
+import json
+import logging
 import os
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 from azure.cognitiveservices.speech import (
+    Connection,
     ResultReason,
     SpeechConfig,
     SpeechSynthesisOutputFormat,
     SpeechSynthesisResult,
     SpeechSynthesizer,
 )
-from azure.core.credentials import AccessToken
-from azure.identity.aio import DefaultAzureCredential
+from app.services.speech.audio_cache import AudioCache
+from app.services.speech.azure_token import AzureTokenManager
+
+logger = logging.getLogger("uvicorn.error")
+
+# --------------------------
+# Load environment variables
+# --------------------------
+# Warm synthesizers kept per voice, i.e. how many sentences of that voice are synthesized at once
+TTS_SYNTHESIZERS_PER_VOICE = int(os.getenv("TTS_SYNTHESIZERS_PER_VOICE", "4"))
+# Threads waiting on the Speech SDK, shared by all voices
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "8"))
+# JSON list of canned sentences cached at startup, split the way the voice stream splits answers; empty to skip
+TTS_WARMUP_PHRASES_PATH = os.getenv(
+    "TTS_WARMUP_PHRASES_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "tts_warmup_phrases.json"),
+)
+
+# Force output language to be English for /voice endpoint
+DEFAULT_VOICE_NAME = "en-US-EmmaNeural"
+OUTPUT_FORMAT = SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
 
 
 class TextToSpeech:
+    """
+    Synthesis runs on a dedicated thread pool, as the Speech SDK blocks until the audio is ready, so the event loop
+    keeps serving other requests meanwhile. Synthesizers are created once per voice, with their connection to the
+    service already open, and borrowed for one sentence at a time. Recurring sentences are served from an AudioCache.
+    The token manager pushes new tokens to the speech config and every synthesizer, so requests never fetch one.
+    """
 
-    def __init__(self) -> None:
-        self.resource_id = os.getenv("AZURE_SPEECH_SERVICE_ID")
+    def __init__(self, token_manager: AzureTokenManager) -> None:
         self.region = os.getenv("AZURE_SPEECH_SERVICE_LOCATION")
-        self.credential = DefaultAzureCredential()
-        self.access_token = None
+        self.token_manager = token_manager
         self.speech_config = None
-        self.speech_synthesizer = None
+        self.synthesizers: dict[str, asyncio.Queue[SpeechSynthesizer]] = {}
+        # Every synthesizer created, including those borrowed by a request, to hand them new tokens
+        self.created_synthesizers: list[SpeechSynthesizer] = []
+        self.executor = ThreadPoolExecutor(
+            max_workers=TTS_MAX_WORKERS, thread_name_prefix="text-to-speech"
+        )
+        self.audio_cache = AudioCache()
+        self._warmup_task = None
 
     async def initialize(self):
-        """Asynchronous initialization to set up access token and speech config."""
-        self.access_token = await self.credential.get_token(
-            "https://cognitiveservices.azure.com/.default"
-        )
+        """Asynchronous initialization to set up access token, speech config and the default voice's synthesizers."""
         self.speech_config = SpeechConfig(
-            auth_token=self.get_auth_token(self.access_token),
+            auth_token=await self.token_manager.get_auth_token(),
             region=self.region,
         )
-        self.speech_config.set_speech_synthesis_output_format(
-            SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
-        )
-        self.speech_synthesizer = SpeechSynthesizer(
-            speech_config=self.speech_config, audio_config=None
-        )
+        self.speech_config.set_speech_synthesis_output_format(OUTPUT_FORMAT)
+        self.token_manager.subscribe(self.set_auth_token)
+        await self.warm_up(DEFAULT_VOICE_NAME)
 
-    def get_auth_token(self, token: AccessToken):
-        return "aad#" + self.resource_id + "#" + token.token
+        self.audio_cache.open()
+        if TTS_WARMUP_PHRASES_PATH:
+            with open(TTS_WARMUP_PHRASES_PATH, encoding="utf-8") as f:
+                phrases = json.load(f)
+            # In the background, the app can serve requests meanwhile
+            self._warmup_task = asyncio.create_task(self.cache_phrases(phrases))
 
-    async def refresh_token(self):
-        if self.access_token.expires_on < time.time() + 60:
-            self.access_token = await self.credential.get_token(
-                "https://cognitiveservices.azure.com/.default"
-            )
-            self.speech_config.authorization_token = self.get_auth_token(
-                self.access_token
-            )
+    async def close(self):
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        self.audio_cache.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-    async def read_text(self, text: str) -> str:
-        await self.refresh_token()
+    def set_auth_token(self, auth_token: str):
+        # Synthesizers keep the token they were created with, so they are updated along with the config
+        self.speech_config.authorization_token = auth_token
+        for synthesizer in self.created_synthesizers:
+            synthesizer.authorization_token = auth_token
 
-        # Force output language to be English for /voice endpoint
-        self.speech_config.speech_synthesis_voice_name = "en-US-EmmaNeural"
-        self.speech_synthesizer = SpeechSynthesizer(
-            speech_config=self.speech_config, audio_config=None
+    @staticmethod
+    def open_connection(synthesizer: SpeechSynthesizer):
+        try:
+            Connection.from_speech_synthesizer(synthesizer).open(True)
+        except Exception as e:
+            # Not fatal, the synthesizer connects on its first sentence instead
+            logger.warning(f"Could not pre-connect speech synthesizer: {e}")
+
+    async def warm_up(self, voice_name: str):
+        """Create the voice's synthesizers and open their connections, once per voice."""
+        if voice_name in self.synthesizers:
+            return
+        # Registered before any await, so concurrent first requests for the voice wait on the same queue
+        synthesizers = asyncio.Queue()
+        self.synthesizers[voice_name] = synthesizers
+
+        # A synthesizer copies the config's voice when it is created
+        self.speech_config.speech_synthesis_voice_name = voice_name
+        created = [
+            SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
+            for _ in range(TTS_SYNTHESIZERS_PER_VOICE)
+        ]
+        self.created_synthesizers.extend(created)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self.executor, self.open_connection, synthesizer)
+                for synthesizer in created
+            )
         )
+        for synthesizer in created:
+            synthesizers.put_nowait(synthesizer)
 
+    @staticmethod
+    def clean_text(text: str) -> str:
         text = re.sub(r"[*#]", "", text)  # remove * and # from markdown
         text = re.sub(
             r"-{2,}", "", text
         )  # remove 2 or more consecutive `-` from markdown
         text = re.sub(r"\[[^\]]*\]\([^\)]*\)", "", text)  # remove links from markdown
         text = re.sub(r"<br>", "", text)  # remove line breaks
-        result: SpeechSynthesisResult = self.speech_synthesizer.speak_text_async(
-            text
-        ).get()
+        # Whitespace does not change the audio, so it must not change the cache key
+        return " ".join(text.split())
+
+    async def synthesize(self, text: str, voice_name: str) -> bytes:
+        await self.warm_up(voice_name)
+        synthesizers = self.synthesizers[voice_name]
+        synthesizer = await synthesizers.get()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(synthesizer.speak_text, text)
+        except BaseException:
+            synthesizers.put_nowait(synthesizer)
+            raise
+        # Back to the pool once the SDK is done with it, which is later than this request if the request is cancelled
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(synthesizers.put_nowait, synthesizer)
+        )
+        result: SpeechSynthesisResult = await asyncio.wrap_future(future)
+
         if result.reason == ResultReason.SynthesizingAudioCompleted:
-            return base64.b64encode(result.audio_data).decode("utf-8")
+            return result.audio_data
         else:
             raise Exception("Speech synthesis failed.")
+
+    async def read_audio(
+        self, text: str, voice_name: str = DEFAULT_VOICE_NAME
+    ) -> bytes:
+        """MP3 audio of the text, for transports sending raw bytes."""
+        text = self.clean_text(text)
+        key = AudioCache.key(text, voice_name, OUTPUT_FORMAT.name)
+        audio = await self.audio_cache.get(key)
+        if audio is None:
+            audio = await self.synthesize(text, voice_name)
+            await self.audio_cache.put(key, audio)
+        return audio
+
+    async def read_text(self, text: str, voice_name: str = DEFAULT_VOICE_NAME) -> str:
+        """Base64 encoded MP3 audio of the text, for the audio_data field of NDJSON events."""
+        audio = await self.read_audio(text, voice_name)
+        return base64.b64encode(audio).decode("utf-8")
+
+    async def cache_phrases(
+        self, phrases: list[str], voice_name: str = DEFAULT_VOICE_NAME
+    ):
+        """Synthesize the phrases missing from the audio cache, one at a time to leave synthesizers for requests."""
+        for phrase in phrases:
+            text = self.clean_text(phrase)
+            key = AudioCache.key(text, voice_name, OUTPUT_FORMAT.name)
+            if key in self.audio_cache:
+                continue
+            try:
+                await self.audio_cache.put(
+                    key, await self.synthesize(text, voice_name), persist=True
+                )
+            except Exception as e:
+                print(f"Error caching speech for {phrase!r}: {e}")
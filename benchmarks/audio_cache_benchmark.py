@@ -0,0 +1,105 @@
+"""
+Benchmark for the TextToSpeech audio cache on a replay of voice answers mixing canned and one-off sentences.
+
+Each answer has `--sentences` sentences, half of them from the warm-up phrases (the agents' templated replies)
+and half unique to the answer. A stand-in for the Speech SDK takes `--synthesis-ms` per synthesized sentence.
+The replay runs three times:
+- no cache: every sentence is synthesized, as before
+- warmed up: the warm-up phrases are cached in memory and on disk at startup, the memory tier fills up during the
+  replay. The one-off sentences stay off the disk.
+- restarted: the same replay on a new TextToSpeech over the same cache directory, without warm-up, so the disk tier
+  serves the hits
+
+Usage:
+    python -m benchmarks.audio_cache_benchmark --answers 10 --sentences 6 --synthesis-ms 100
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+
+from app.services.speech import text_to_speech
+from app.services.speech.audio_cache import AudioCache
+from benchmarks.text_to_speech_benchmark import (
+    benchmark_token_manager,
+    use_stand_in_speech_sdk,
+)
+
+
+def replay_sentences(args: argparse.Namespace, phrases: list[str]) -> list[str]:
+    rng = random.Random(0)
+    sentences = []
+    for answer in range(args.answers):
+        for index in range(args.sentences):
+            if index % 2:
+                sentences.append(
+                    f"Your appointment {answer}-{index} is at Bukit Batok Polyclinic. "
+                )
+            else:
+                sentences.append(f"{rng.choice(phrases)} ")
+    return sentences
+
+
+async def replay(
+    sentences: list[str], audio_cache: AudioCache, warm_up: list[str] | None
+) -> tuple[list[float], dict]:
+    speech_client = text_to_speech.TextToSpeech(benchmark_token_manager())
+    speech_client.region = "southeastasia"
+    speech_client.audio_cache = audio_cache
+    await speech_client.initialize()
+    if warm_up:
+        await speech_client.cache_phrases(warm_up)
+
+    timings = []
+    for sentence in sentences:
+        start = time.perf_counter()
+        await speech_client.read_text(sentence)
+        timings.append((time.perf_counter() - start) * 1000)
+    stats = speech_client.audio_cache.stats()
+    await speech_client.close()
+    return timings, stats
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=10)
+    parser.add_argument("--sentences", type=int, default=6)
+    parser.add_argument("--synthesis-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    warmup_phrases_path = text_to_speech.TTS_WARMUP_PHRASES_PATH
+    use_stand_in_speech_sdk(args.synthesis_ms)
+    # Warm-up is awaited below, so it is done before the replay starts
+    text_to_speech.TTS_WARMUP_PHRASES_PATH = ""
+    with open(warmup_phrases_path, encoding="utf-8") as f:
+        phrases = json.load(f)
+    sentences = replay_sentences(args, phrases)
+
+    print(
+        f"{len(sentences)} sentences, half canned, {args.synthesis_ms:.0f} ms per synthesis"
+    )
+    print(
+        f"{'run':<12} | {'mean':>8} {'median':>8} | {'hit rate':>8} {'memory':>6} {'disk':>5} {'misses':>6} | "
+        f"{'on disk':>7} {'disk KiB':>8}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        runs = {
+            "no cache": (AudioCache(max_entries=0, directory=None), None),
+            "warmed up": (AudioCache(directory=directory), phrases),
+            "restarted": (AudioCache(directory=directory), None),
+        }
+        for name, (audio_cache, warm_up) in runs.items():
+            timings, stats = await replay(sentences, audio_cache, warm_up)
+            print(
+                f"{name:<12} | {statistics.mean(timings):6.1f} ms {statistics.median(timings):5.1f} ms | "
+                f"{stats['hit_rate']:>8.0%} {stats['memory_hits']:>6} {stats['disk_hits']:>5} {stats['misses']:>6} | "
+                f"{stats['disk_entries']:>7} {stats['disk_bytes'] / 1024:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
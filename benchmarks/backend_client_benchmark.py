@@ -0,0 +1,139 @@
+"""
+Benchmark for the shared BackendClient against the previous per-call httpx.AsyncClient.
+
+Runs a local keep-alive HTTP/1.1 stub of the backend that counts accepted TCP connections (handshakes),
+then replays a get_past_records-like tool call (1 x /records + N x /bookings/{id}) many times.
+
+Usage:
+    python -m benchmarks.backend_client_benchmark --calls 200 --records 6 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from app.services.backend.backend_client import BackendClient
+
+
+class StubBackend:
+    """Minimal asyncio HTTP/1.1 server with keep-alive, returning canned JSON."""
+
+    def __init__(self, records: int, latency: float = 0.0) -> None:
+        self.records = records
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.server: asyncio.AbstractServer | None = None
+        self.port: int | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def body_for(self, target: str) -> bytes:
+        path = target.split("?")[0]
+        if path == "/records":
+            payload = [
+                {"id": str(i), "booking_slot_id": str(i), "created_at": "x"}
+                for i in range(self.records)
+            ]
+        else:
+            payload = {
+                "datetime": "2024-01-01T09:00:00",
+                "vaccine": {"name": "Influenza (INF)"},
+                "polyclinic": {"name": "Tampines Polyclinic"},
+            }
+        return json.dumps(payload).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                target = head.split(b" ", 2)[1].decode()
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                body = self.body_for(target)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def tool_call_per_call_client(url: str, records: int):
+    """Previous behaviour: a fresh AsyncClient per request."""
+    async with httpx.AsyncClient(timeout=10.0) as httpclient:
+        await httpclient.get(f"{url}/records")
+    for i in range(records):
+        async with httpx.AsyncClient(timeout=10.0) as httpclient:
+            await httpclient.get(f"{url}/bookings/{i}")
+
+
+async def tool_call_shared_client(url: str, records: int, client: BackendClient):
+    await client.get(f"{url}/records")
+    for i in range(records):
+        await client.get(f"{url}/bookings/{i}")
+
+
+async def run(name: str, calls: int, records: int, concurrency: int, latency: float):
+    stub = StubBackend(records, latency)
+    await stub.start()
+    client = BackendClient() if name == "shared" else None
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            if client:
+                await tool_call_shared_client(stub.url, records, client)
+            else:
+                await tool_call_per_call_client(stub.url, records)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    if client:
+        await client.close()
+    await stub.stop()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:>9} | handshakes {stub.connections:>5} | requests {stub.requests:>5} "
+        f"| p50 {statistics.median(latencies):7.2f} ms | p99 {p99:7.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--records", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    for name in ("per-call", "shared"):
+        await run(name, args.calls, args.records, args.concurrency, args.latency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark for the in-process clinic_index against the remote /clinics/nearest-by-location call.
+
+The remote side is the local keep-alive stub backend answering k-nearest queries by brute force,
+so the numbers are a lower bound for the real backend (no TLS, no database, no network hops).
+
+Usage:
+    python -m benchmarks.clinic_index_benchmark --clinics 2000 --queries 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from app.services.backend.backend_client import BackendClient
+from benchmarks.backend_client_benchmark import StubBackend
+from app.services.openai.clinic_index import ClinicSpatialIndex, haversine_km
+
+# Bounding box of mainland Singapore
+LATITUDES = (1.25, 1.45)
+LONGITUDES = (103.65, 104.0)
+
+
+def random_point() -> tuple[float, float]:
+    return random.uniform(*LATITUDES), random.uniform(*LONGITUDES)
+
+
+class ClinicStubBackend(StubBackend):
+    def __init__(self, clinics: list[dict], latency: float = 0.0) -> None:
+        super().__init__(records=0, latency=latency)
+        self.clinics = clinics
+
+    def body_for(self, target: str) -> bytes:
+        params = parse_qs(urlsplit(target).query)
+        latitude = float(params["latitude"][0])
+        longitude = float(params["longitude"][0])
+        clinic_limit = int(params["clinic_limit"][0])
+        nearest_clinics = sorted(
+            self.clinics,
+            key=lambda clinic: haversine_km(
+                latitude,
+                longitude,
+                clinic["address"]["latitude"],
+                clinic["address"]["longitude"],
+            ),
+        )[:clinic_limit]
+        return json.dumps(nearest_clinics).encode()
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {statistics.median(samples):10.1f} us | p99 {p99:10.1f} us"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clinics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    random.seed(0)
+    clinics = []
+    for i in range(args.clinics):
+        latitude, longitude = random_point()
+        clinics.append(
+            {
+                "name": f"Clinic {i}",
+                "type": "gp",
+                "address": {
+                    "postal_code": f"{i:06d}",
+                    "address": f"{i} Stub Street",
+                    "latitude": latitude,
+                    "longitude": longitude,
+                },
+            }
+        )
+    queries = [random_point() for _ in range(args.queries)]
+
+    stub = ClinicStubBackend(clinics, args.latency)
+    await stub.start()
+    client = BackendClient()
+
+    remote = []
+    for latitude, longitude in queries:
+        start = time.perf_counter()
+        response = await client.get(
+            f"{stub.url}/clinics/nearest-by-location",
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "clinic_type": "gp",
+                "clinic_limit": 3,
+            },
+        )
+        json.loads(response.text)
+        remote.append((time.perf_counter() - start) * 1e6)
+
+    index = ClinicSpatialIndex()
+    start = time.perf_counter()
+    index.load("gp", clinics)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    local = []
+    for latitude, longitude in queries:
+        start = time.perf_counter()
+        index.nearest("gp", latitude, longitude, 3)
+        local.append((time.perf_counter() - start) * 1e6)
+
+    await client.close()
+    await stub.stop()
+
+    print(f"{args.clinics} clinics, {args.queries} k=3 queries")
+    print(f"  remote | {percentiles(remote)}")
+    print(f"   index | {percentiles(local)} | build {build_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark for history compaction: tokens sent to the model per turn of a growing conversation, with and without compaction.
+
+Each simulated turn is a user message, a tool call with a bulky JSON output (a slot list, as returned by
+get_available_slots_tool) and an assistant answer, the shape result.to_input_list() returns.
+The compacted history is carried over to the next turn, as main() does.
+
+Usage:
+    python -m benchmarks.history_compaction_benchmark --turns 20 --budget 4000
+"""
+
+import argparse
+import json
+import time
+
+from app.services.openai.history_compaction import (
+    HISTORY_KEEP_EXCHANGES,
+    HistoryTokenCounter,
+    compact_history,
+)
+
+
+def slot_list(turn: int) -> str:
+    return json.dumps(
+        [
+            {
+                "id": f"slot-{turn}-{index}",
+                "clinic": "Bukit Batok Polyclinic",
+                "datetime": f"2026-01-{index % 28 + 1:02d}T{9 + index % 8:02d}:00:00+08:00",
+                "vaccine": "Influenza (INF)",
+            }
+            for index in range(40)
+        ]
+    )
+
+
+def turn_items(turn: int) -> list[dict]:
+    return [
+        {"content": f"Show me flu vaccine slots, attempt {turn}", "role": "user"},
+        {
+            "type": "function_call",
+            "call_id": f"call_{turn}",
+            "name": "get_available_slots_tool",
+            "arguments": json.dumps({"clinic": "Bukit Batok Polyclinic"}),
+        },
+        {
+            "type": "function_call_output",
+            "call_id": f"call_{turn}",
+            "output": slot_list(turn),
+        },
+        {
+            "role": "assistant",
+            "type": "message",
+            "content": [
+                {
+                    "type": "output_text",
+                    "text": "Here are the available slots at Bukit Batok Polyclinic. "
+                    * 3,
+                    "annotations": [],
+                }
+            ],
+        },
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--keep-exchanges", type=int, default=HISTORY_KEEP_EXCHANGES)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    counter = HistoryTokenCounter(model=args.model)
+    full_history = []
+    total_full, total_compacted, total_ms = 0, 0, 0.0
+    print(f"{'turn':>4} | {'full':>7} | {'compacted':>9} | {'saved':>7} | {'ms':>6}")
+    for turn in range(1, args.turns + 1):
+        items = turn_items(turn)
+        full_history += items
+
+        # The full history is kept, each turn compacts the copy sent to the model
+        start = time.perf_counter()
+        result = compact_history(
+            full_history, args.budget, args.keep_exchanges, counter
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        full_tokens = sum(counter.count(item) for item in full_history)
+        compacted_tokens = sum(counter.count(item) for item in result.history)
+        total_full += full_tokens
+        total_compacted += compacted_tokens
+        total_ms += elapsed_ms
+        print(
+            f"{turn:>4} | {full_tokens:>7} | {compacted_tokens:>9} "
+            f"| {full_tokens - compacted_tokens:>7} | {elapsed_ms:6.2f}"
+        )
+
+    print(
+        f"Total input tokens over {args.turns} turns: {total_full} without compaction, "
+        f"{total_compacted} with ({1 - total_compacted / total_full:.0%} saved), "
+        f"compaction took {total_ms / args.turns:.2f} ms per turn"
+    )
+
+
+if __name__ == "__main__":
+    main()
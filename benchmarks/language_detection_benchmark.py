@@ -0,0 +1,82 @@
+"""
+Accuracy and latency benchmark for the local language detector, on the labelled messages in
+tests/data/language_samples.jsonl (none of them are in the training corpus).
+
+Reports accuracy per language, the confusions, how many messages the local detector is not confident about
+(with LANGUAGE_DETECTORS="local,remote" those go to the translate endpoint), and the time per detection.
+
+Usage:
+    python -m benchmarks.language_detection_benchmark --repeat 100
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from app.services.openai.language_detection import (
+    LANGUAGE_DETECTOR_CONFIDENCE_THRESHOLD,
+    LocalLanguageDetector,
+)
+
+SAMPLES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "data", "language_samples.jsonl"
+)
+
+
+def load_samples(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", default=SAMPLES_PATH)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument(
+        "--threshold", type=float, default=LANGUAGE_DETECTOR_CONFIDENCE_THRESHOLD
+    )
+    args = parser.parse_args()
+
+    detector = LocalLanguageDetector()
+    samples = load_samples(args.samples)
+
+    correct = Counter()
+    total = Counter()
+    confusions = Counter()
+    not_confident = Counter()
+    for sample in samples:
+        guess = detector.detect_sync(sample["text"])
+        language, confidence = guess or (None, 0.0)
+        total[sample["language"]] += 1
+        if language == sample["language"]:
+            correct[sample["language"]] += 1
+        else:
+            confusions[(sample["language"], language)] += 1
+        if confidence < args.threshold:
+            not_confident[sample["language"]] += 1
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            detector.detect_sync(sample["text"])
+    per_call = (time.perf_counter() - start) / (args.repeat * len(samples))
+
+    print(f"{'language':<10} {'accuracy':>9} {'below threshold':>16}")
+    for language in total:
+        print(
+            f"{language:<10} {correct[language] / total[language]:>9.1%} "
+            f"{not_confident[language]:>8}/{total[language]}"
+        )
+    print(
+        f"{'overall':<10} {sum(correct.values()) / len(samples):>9.1%} "
+        f"{sum(not_confident.values()):>8}/{len(samples)}"
+    )
+    for (expected, detected), count in confusions.most_common():
+        print(f"{expected} detected as {detected}: {count}")
+    print(f"{per_call * 1e6:.1f} µs per detection, {len(samples)} samples")
+
+
+if __name__ == "__main__":
+    main()
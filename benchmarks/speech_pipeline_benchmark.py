@@ -0,0 +1,95 @@
+"""
+End-to-end latency benchmark for a multi-sentence voice answer.
+
+Drives one voice request through openai_agents_stream.main with a scripted runner streaming a token every
+`--token-ms` (every tenth token ends a sentence) and a speech client taking `--synthesis-ms` per sentence.
+Reports when the last text delta, the first audio and the last audio reach the client, and checks the audio
+arrives in sentence order.
+
+Usage:
+    python -m benchmarks.speech_pipeline_benchmark --sentences 8 --token-ms 20 --synthesis-ms 300
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.schemas.chat import EventType, RequestType
+from app.services.openai import openai_agents_stream
+from benchmarks.stream_benchmark import detect_english
+from benchmarks.text_to_speech_benchmark import SentenceScriptedRun
+
+
+class PacedSentenceScriptedRun(SentenceScriptedRun):
+    def __init__(self, tokens: int, token_seconds: float) -> None:
+        super().__init__(tokens)
+        self.token_seconds = token_seconds
+
+    async def stream_events(self):
+        async for event in super().stream_events():
+            await asyncio.sleep(self.token_seconds)
+            yield event
+
+
+class BenchmarkSpeechClient:
+    def __init__(self, synthesis_seconds: float) -> None:
+        self.synthesis_seconds = synthesis_seconds
+
+    async def read_text(self, text: str) -> str:
+        await asyncio.sleep(self.synthesis_seconds)
+        return text
+
+
+async def voice_answer(args: argparse.Namespace) -> dict[str, float]:
+    timings = {}
+    spoken = []
+    start = time.perf_counter()
+    async for chunk in openai_agents_stream.main(
+        request_type=RequestType.VOICE_REQUEST,
+        user_msg="Tell me about vaccines",
+        history=None,
+        current_agent=None,
+        auth_token="benchmark-token",
+        speech_client=BenchmarkSpeechClient(args.synthesis_ms / 1000),
+        backend_client=SimpleNamespace(),
+    ):
+        elapsed = (time.perf_counter() - start) * 1000
+        if chunk.event_type == EventType.DELTA_TEXT_EVENT and chunk.delta_message:
+            timings["last text"] = elapsed
+        if chunk.audio_data:
+            timings.setdefault("first audio", elapsed)
+            timings["last audio"] = elapsed
+            spoken.append(chunk.audio_data)
+    if "".join(spoken).replace(".", "").split() != ["word"] * (args.sentences * 10):
+        raise RuntimeError("Audio missing or out of order")
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--synthesis-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    openai_agents_stream.get_user_input_language = detect_english
+    openai_agents_stream.Runner = SimpleNamespace(
+        run_streamed=lambda *a, **kw: PacedSentenceScriptedRun(
+            args.sentences * 10, args.token_ms / 1000
+        )
+    )
+
+    runs = [await voice_answer(args) for _ in range(args.repeat)]
+    print(
+        f"{args.sentences} sentences, a token every {args.token_ms:.0f} ms, "
+        f"{args.synthesis_ms:.0f} ms synthesis per sentence"
+    )
+    for name in ("last text", "first audio", "last audio"):
+        print(f"{name:<12} {statistics.median(run[name] for run in runs):8.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
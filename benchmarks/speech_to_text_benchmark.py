@@ -0,0 +1,146 @@
+"""
+Concurrency benchmark for SpeechToText.transcribe against a local stand-in for the Speech SDK.
+
+`--requests` uploads arrive at once, each streaming `--chunks` chunks of PCM audio `--chunk-ms` apart like a
+network upload. The stand-in recognizer blocks its thread until the audio stream is closed, then for
+`--recognition-ms` more, like recognize_once waiting on the service. Reports throughput and event loop lag per
+worker pool size, and for recognition on the event loop as before.
+
+Usage:
+    python -m benchmarks.speech_to_text_benchmark --requests 32 --workers 1 2 4 8 16
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import azure.cognitiveservices.speech as speechsdk
+
+from app.services.speech import speech_to_text
+from benchmarks.text_to_speech_benchmark import benchmark_token_manager, probe
+
+CHUNK = bytes(3200)  # 100 ms of 16 kHz 16-bit mono PCM
+
+
+class StandInPushAudioInputStream:
+    def __init__(self, stream_format=None) -> None:
+        self.received = 0
+        self.closed = threading.Event()
+
+    def write(self, buffer: bytes):
+        self.received += len(buffer)
+
+    def close(self):
+        self.closed.set()
+
+
+class StandInSpeechRecognizer:
+    recognition_seconds = 0.2
+
+    def __init__(
+        self, speech_config, audio_config, auto_detect_source_language_config
+    ) -> None:
+        self.stream = audio_config
+
+    def recognize_once(self):
+        self.stream.closed.wait()
+        time.sleep(self.recognition_seconds)
+        return SimpleNamespace(
+            reason=speechsdk.ResultReason.RecognizedSpeech,
+            text=f"{self.stream.received} bytes",
+        )
+
+    def recognize_once_async(self):
+        return SimpleNamespace(get=self.recognize_once)
+
+
+class OnEventLoopSpeechToText(speech_to_text.SpeechToText):
+    """Buffers the whole upload, then recognizes it on the event loop, as transcribe did before."""
+
+    async def transcribe(self, audio_chunks):
+        await self.token_manager.get_auth_token()
+        audio = b"".join([chunk async for chunk in audio_chunks])
+        stream = speech_to_text.speechsdk.audio.PushAudioInputStream(stream_format=None)
+        stream.write(audio)
+        stream.close()
+        speech_recognizer = speech_to_text.speechsdk.SpeechRecognizer(
+            speech_config=self.speech_config,
+            audio_config=stream,
+            auto_detect_source_language_config=self.auto_detect_source_language_config,
+        )
+        result = speech_recognizer.recognize_once_async().get()
+        return {"text": result.text}, 200
+
+
+def use_stand_in_speech_sdk(recognition_ms: float) -> None:
+    StandInSpeechRecognizer.recognition_seconds = recognition_ms / 1000
+    speech_to_text.speechsdk = SimpleNamespace(
+        audio=SimpleNamespace(
+            PushAudioInputStream=StandInPushAudioInputStream,
+            AudioConfig=lambda stream: stream,
+        ),
+        languageconfig=speechsdk.languageconfig,
+        ResultReason=speechsdk.ResultReason,
+        SpeechRecognizer=StandInSpeechRecognizer,
+    )
+
+
+async def upload(args: argparse.Namespace):
+    for _ in range(args.chunks):
+        await asyncio.sleep(args.chunk_ms / 1000)
+        yield CHUNK
+
+
+async def run(
+    stt: speech_to_text.SpeechToText, args: argparse.Namespace
+) -> tuple[float, list[float]]:
+    stt.speech_config = SimpleNamespace()
+
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(stt.transcribe(upload(args)) for _ in range(args.requests))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    expected = {"text": f"{args.chunks * len(CHUNK)} bytes"}
+    if any(result != (expected, 200) for result in results):
+        raise RuntimeError(f"Unexpected transcription: {results[0]}")
+    return elapsed, lags or [0.0]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--chunk-ms", type=float, default=20)
+    parser.add_argument("--recognition-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    use_stand_in_speech_sdk(args.recognition_ms)
+    print(
+        f"{args.requests} uploads of {args.chunks} chunks {args.chunk_ms:.0f} ms apart, "
+        f"{args.recognition_ms:.0f} ms recognition"
+    )
+    print(f"{'mode':<16} | {'throughput':>12} | {'loop lag max':>12}")
+    runs = [("on event loop", OnEventLoopSpeechToText(benchmark_token_manager()))] + [
+        (
+            f"{workers} workers",
+            speech_to_text.SpeechToText(benchmark_token_manager(), max_workers=workers),
+        )
+        for workers in args.workers
+    ]
+    for name, stt in runs:
+        elapsed, lags = await run(stt, args)
+        await stt.close()
+        print(f"{name:<16} | {args.requests / elapsed:>8.1f} /s | {max(lags):>9.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
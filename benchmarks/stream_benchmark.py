@@ -0,0 +1,118 @@
+"""
+Benchmark for the NDJSON answer stream, full vs delta stream mode.
+
+Drives openai_agents_stream.main with a scripted runner that emits one long answer as token deltas (no LLM calls),
+and encodes every event with encode_event, the way the /chat/stream router does. Reports bytes sent and server CPU time per answer.
+
+Usage:
+    python -m benchmarks.stream_benchmark --tokens 200 1000 4000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from openai.types.responses import (
+    ResponseContentPartDoneEvent,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from agents import AgentUpdatedStreamEvent, RawResponsesStreamEvent
+from app.schemas.chat import RequestType, StreamMode
+from app.services.openai import openai_agents_stream
+from app.services.openai.agents import general_questions_agent
+from app.services.openai.event_encoder import encode_event
+
+# Average token of an English answer is ~4 characters plus a space
+TOKEN = "word "
+
+
+class ScriptedRun:
+    def __init__(self, tokens: int) -> None:
+        self.tokens = tokens
+        self.current_agent = general_questions_agent
+
+    async def stream_events(self):
+        yield AgentUpdatedStreamEvent(new_agent=general_questions_agent)
+        for sequence_number in range(self.tokens):
+            yield RawResponsesStreamEvent(
+                data=ResponseTextDeltaEvent(
+                    content_index=0,
+                    delta=TOKEN,
+                    item_id="msg",
+                    logprobs=[],
+                    output_index=0,
+                    sequence_number=sequence_number,
+                    type="response.output_text.delta",
+                )
+            )
+        yield RawResponsesStreamEvent(
+            data=ResponseContentPartDoneEvent(
+                content_index=0,
+                item_id="msg",
+                output_index=0,
+                part=ResponseOutputText(
+                    annotations=[], text=TOKEN * self.tokens, type="output_text"
+                ),
+                sequence_number=self.tokens,
+                type="response.content_part.done",
+            )
+        )
+
+    @property
+    def new_items(self) -> list:
+        message = {
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": TOKEN * self.tokens}],
+        }
+        return [SimpleNamespace(to_input_item=lambda: message)]
+
+
+async def detect_english(user_msg: str, backend_client=None) -> str:
+    return "English"
+
+
+async def run(tokens: int, stream_mode: StreamMode) -> tuple[int, int, float]:
+    openai_agents_stream.Runner = SimpleNamespace(
+        run_streamed=lambda *args, **kwargs: ScriptedRun(tokens)
+    )
+    openai_agents_stream.get_user_input_language = detect_english
+
+    sent_bytes = 0
+    events = 0
+    start = time.process_time()
+    async for chunk in openai_agents_stream.main(
+        request_type=RequestType.CHAT_REQUEST,
+        user_msg="Tell me about vaccines",
+        history=None,
+        current_agent="triage_agent",
+        auth_token="benchmark-token",
+        backend_client=SimpleNamespace(),
+        stream_mode=stream_mode,
+    ):
+        sent_bytes += len(encode_event(chunk).encode())
+        events += 1
+    return events, sent_bytes, time.process_time() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[200, 1000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for tokens in args.tokens:
+        for stream_mode in StreamMode:
+            results = [await run(tokens, stream_mode) for _ in range(args.repeat)]
+            events, sent_bytes, _ = results[0]
+            cpu_ms = min(cpu for _, _, cpu in results) * 1000
+            print(
+                f"{tokens:>5} tokens | {stream_mode:>5} | events {events:>5} "
+                f"| {sent_bytes / 1024:9.1f} KiB | cpu {cpu_ms:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
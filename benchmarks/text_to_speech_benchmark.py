@@ -0,0 +1,174 @@
+"""
+Event loop lag benchmark for TextToSpeech under concurrent voice streams.
+
+Drives `--streams` voice requests through openai_agents_stream.main at once, with a scripted runner (no LLM calls)
+and a stand-in for the Speech SDK synthesizer that blocks its calling thread for `--synthesis-ms` per sentence,
+like the SDK does while the service renders audio. Meanwhile a probe task measures how late the event loop
+wakes it up, compared with synthesizing on the event loop as read_text did before.
+
+Usage:
+    python -m benchmarks.text_to_speech_benchmark --streams 1 5 20 --synthesis-ms 80
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from azure.cognitiveservices.speech import ResultReason
+from azure.core.credentials import AccessToken
+
+from app.schemas.chat import RequestType
+from app.services.openai import openai_agents_stream
+from benchmarks.stream_benchmark import ScriptedRun, detect_english
+from app.services.speech import text_to_speech
+from app.services.speech.audio_cache import AudioCache
+from app.services.speech.azure_token import AzureTokenManager
+
+PROBE_INTERVAL = 0.005
+
+
+class SentenceScriptedRun(ScriptedRun):
+    """Scripted answer whose every tenth token ends a sentence, so the voice stream synthesizes it."""
+
+    async def stream_events(self):
+        index = 0
+        async for event in super().stream_events():
+            delta = getattr(getattr(event, "data", None), "delta", None)
+            if delta is not None:
+                index += 1
+                if index % 10 == 0:
+                    event.data.delta = "word. "
+            yield event
+
+
+class BlockingSynthesizer:
+    synthesis_seconds = 0.08
+
+    def __init__(self, speech_config, audio_config) -> None:
+        self.authorization_token = None
+
+    def speak_text(self, text: str):
+        time.sleep(self.synthesis_seconds)
+        return SimpleNamespace(
+            reason=ResultReason.SynthesizingAudioCompleted, audio_data=bytes(4000)
+        )
+
+
+class BenchmarkCredential:
+    async def get_token(self, *scopes):
+        return AccessToken("benchmark-token", int(time.time()) + 3600)
+
+    async def close(self):
+        pass
+
+
+def benchmark_token_manager() -> AzureTokenManager:
+    return AzureTokenManager(resource_id="benchmark", credential=BenchmarkCredential())
+
+
+class OnEventLoopTextToSpeech(text_to_speech.TextToSpeech):
+    """Synthesizes on the event loop, as read_text did before."""
+
+    async def read_text(
+        self, text: str, voice_name: str = text_to_speech.DEFAULT_VOICE_NAME
+    ) -> str:
+        await self.token_manager.get_auth_token()
+        await self.warm_up(voice_name)
+        synthesizer = BlockingSynthesizer(self.speech_config, None)
+        result = synthesizer.speak_text(text)
+        if result.reason == ResultReason.SynthesizingAudioCompleted:
+            return "audio"
+        raise Exception("Speech synthesis failed.")
+
+
+def use_stand_in_speech_sdk(synthesis_ms: float) -> None:
+    """Replace the Speech SDK synthesizer used by text_to_speech with a stand-in."""
+    BlockingSynthesizer.synthesis_seconds = synthesis_ms / 1000
+    text_to_speech.SpeechSynthesizer = BlockingSynthesizer
+    text_to_speech.Connection = SimpleNamespace(
+        from_speech_synthesizer=lambda synthesizer: SimpleNamespace(
+            open=lambda for_continuous_recognition: None
+        )
+    )
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def voice_stream(speech_client: text_to_speech.TextToSpeech) -> None:
+    async for _ in openai_agents_stream.main(
+        request_type=RequestType.VOICE_REQUEST,
+        user_msg="Tell me about vaccines",
+        history=None,
+        current_agent=None,
+        auth_token="benchmark-token",
+        speech_client=speech_client,
+        backend_client=SimpleNamespace(),
+    ):
+        pass
+
+
+async def run(
+    tts_class: type[text_to_speech.TextToSpeech], streams: int
+) -> tuple[list[float], float]:
+    speech_client = tts_class(benchmark_token_manager())
+    speech_client.region = "southeastasia"
+    # Every answer is the same, measure synthesis rather than the audio cache
+    speech_client.audio_cache = AudioCache(max_entries=0, directory=None)
+    await speech_client.initialize()
+
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(voice_stream(speech_client) for _ in range(streams)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    await speech_client.close()
+    return lags, elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--synthesis-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    use_stand_in_speech_sdk(args.synthesis_ms)
+    # Only the streams synthesize, no canned phrases in the background
+    text_to_speech.TTS_WARMUP_PHRASES_PATH = ""
+    openai_agents_stream.get_user_input_language = detect_english
+    openai_agents_stream.Runner = SimpleNamespace(
+        run_streamed=lambda *a, **kw: SentenceScriptedRun(args.tokens)
+    )
+
+    print(
+        f"{args.tokens // 10 + 1} sentences per answer, {args.synthesis_ms:.0f} ms per sentence, "
+        f"{text_to_speech.TTS_SYNTHESIZERS_PER_VOICE} synthesizers, {text_to_speech.TTS_MAX_WORKERS} threads"
+    )
+    print(
+        f"{'mode':<14} {'streams':>7} | {'loop lag p50':>12} {'p99':>8} {'max':>8} | {'wall':>8}"
+    )
+    for streams in args.streams:
+        for name, tts_class in (
+            ("on event loop", OnEventLoopTextToSpeech),
+            ("thread pool", text_to_speech.TextToSpeech),
+        ):
+            lags, elapsed = await run(tts_class, streams)
+            lags.sort()
+            print(
+                f"{name:<14} {streams:>7} | {statistics.median(lags):>9.1f} ms "
+                f"{lags[int(len(lags) * 0.99)]:>5.1f} ms {lags[-1]:>5.1f} ms | {elapsed:>6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Time-to-first-token benchmark for openai_agents_stream.main, focused on input language detection.
+
+Drives main() with a scripted runner whose first token arrives `--model-ms` after the run starts, and a stubbed
+/translate/get_language call taking `--detect-ms`. A conversation history of `--history-turns` earlier turns
+(with bulky tool outputs) is loaded from a session, so the request setup work (history compaction) is realistic.
+
+Scenarios:
+- no session: every message is detected, as for clients without a session_id
+- first message: a new session, nothing cached yet
+- follow-up, same script: the session's language is reused
+- follow-up, new script: the message switches from English to Chinese, so it is detected again
+
+Usage:
+    python -m benchmarks.ttft_benchmark --detect-ms 150 --model-ms 300
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.schemas.chat import EventType, RequestType
+from app.services.openai import openai_agents_stream
+from benchmarks.history_compaction_benchmark import turn_items
+from app.services.openai.session_store import ConversationSession
+from benchmarks.stream_benchmark import ScriptedRun
+
+
+class DelayedScriptedRun(ScriptedRun):
+    def __init__(self, tokens: int, delay: float) -> None:
+        super().__init__(tokens)
+        self.delay = delay
+
+    async def stream_events(self):
+        await asyncio.sleep(self.delay)
+        async for event in super().stream_events():
+            yield event
+
+
+async def time_to_first_token(
+    user_msg: str, session: ConversationSession | None, args: argparse.Namespace
+) -> float:
+    start = time.perf_counter()
+    async for chunk in openai_agents_stream.main(
+        request_type=RequestType.CHAT_REQUEST,
+        user_msg=user_msg,
+        history=None,
+        current_agent=None,
+        auth_token="benchmark-token",
+        backend_client=SimpleNamespace(),
+        session=session,
+    ):
+        if chunk.event_type == EventType.DELTA_TEXT_EVENT:
+            return (time.perf_counter() - start) * 1000
+    raise RuntimeError("No delta event streamed")
+
+
+def new_session(args: argparse.Namespace, language: str | None) -> ConversationSession:
+    history = [item for turn in range(args.history_turns) for item in turn_items(turn)]
+    return ConversationSession(
+        session_id="benchmark", history=history, user_input_language=language
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--detect-ms", type=float, default=150)
+    parser.add_argument("--model-ms", type=float, default=300)
+    parser.add_argument("--history-turns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    async def detect_language(user_msg: str, backend_client=None) -> str:
+        await asyncio.sleep(args.detect_ms / 1000)
+        return "Chinese" if "疫苗" in user_msg else "English"
+
+    openai_agents_stream.get_user_input_language = detect_language
+    openai_agents_stream.Runner = SimpleNamespace(
+        run_streamed=lambda *a, **kw: DelayedScriptedRun(5, args.model_ms / 1000)
+    )
+
+    scenarios = {
+        "no session": lambda: ("Which vaccines are due?", None),
+        "first message": lambda: ("Which vaccines are due?", new_session(args, None)),
+        "follow-up, same script": lambda: (
+            "Which vaccines are due?",
+            new_session(args, "English"),
+        ),
+        "follow-up, new script": lambda: (
+            "我应该打什么疫苗？",
+            new_session(args, "English"),
+        ),
+    }
+    print(
+        f"detect {args.detect_ms:.0f} ms, model first token {args.model_ms:.0f} ms, "
+        f"{args.history_turns} turns of history"
+    )
+    for name, scenario in scenarios.items():
+        timings = []
+        for _ in range(args.repeat):
+            user_msg, session = scenario()
+            timings.append(await time_to_first_token(user_msg, session, args))
+        print(f"{name:<24} | TTFT median {statistics.median(timings):7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+Bytes and CPU per voice turn: base64 audio inside NDJSON (/voice/stream) vs binary WebSocket frames (/voice/ws).
+
+Drives openai_agents_stream.main with a scripted runner (no LLM calls) and a speech client returning MP3-sized
+audio instantly (32 kbit/s, at 15 characters of text per second of speech), so only the transport work is measured.
+Each turn is encoded the way each route does it. WebSocket frame headers are counted, HTTP chunk headers are not.
+Client CPU is the cost of decoding the turn: parsing every JSON event, and the base64 audio on NDJSON.
+
+Usage:
+    python -m benchmarks.voice_transport_benchmark --sentences 8 --turns 50
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from app.schemas.chat import RequestType
+from app.services.openai import openai_agents_stream
+from app.services.openai.event_encoder import encode_audio_frame, encode_event
+from benchmarks.stream_benchmark import detect_english
+from benchmarks.text_to_speech_benchmark import SentenceScriptedRun
+
+MP3_BYTES_PER_SECOND = 32_000 // 8
+CHARACTERS_PER_SECOND = 15
+
+
+class InstantSpeechClient:
+    def __init__(self) -> None:
+        self.rng = random.Random(0)
+
+    async def read_audio(self, text: str) -> bytes:
+        return self.rng.randbytes(
+            len(text) * MP3_BYTES_PER_SECOND // CHARACTERS_PER_SECOND
+        )
+
+    async def read_text(self, text: str) -> str:
+        return base64.b64encode(await self.read_audio(text)).decode("utf-8")
+
+
+def websocket_frame_size(payload_length: int) -> int:
+    """Payload plus the header of an unmasked server frame."""
+    if payload_length < 126:
+        return payload_length + 2
+    if payload_length < 65536:
+        return payload_length + 4
+    return payload_length + 10
+
+
+async def ndjson_turn() -> tuple[list[bytes], float]:
+    lines = []
+    start = time.process_time()
+    async for chunk in openai_agents_stream.main(
+        request_type=RequestType.VOICE_REQUEST,
+        user_msg="Tell me about vaccines",
+        history=None,
+        current_agent=None,
+        auth_token="benchmark-token",
+        speech_client=InstantSpeechClient(),
+        backend_client=SimpleNamespace(),
+    ):
+        lines.append(encode_event(chunk).encode())
+    return lines, time.process_time() - start
+
+
+async def websocket_turn() -> tuple[list[bytes | str], float]:
+    messages = []
+    audio_sequence = 0
+    start = time.process_time()
+    async for chunk in openai_agents_stream.main(
+        request_type=RequestType.VOICE_REQUEST,
+        user_msg="Tell me about vaccines",
+        history=None,
+        current_agent=None,
+        auth_token="benchmark-token",
+        speech_client=InstantSpeechClient(),
+        backend_client=SimpleNamespace(),
+        binary_audio=True,
+    ):
+        if chunk.audio_bytes:
+            audio_sequence += 1
+            messages.append(encode_audio_frame(audio_sequence, chunk.audio_bytes))
+            chunk.audio_sequence = audio_sequence
+        messages.append(encode_event(chunk))
+    return messages, time.process_time() - start
+
+
+def decode_ndjson(lines: list[bytes]) -> float:
+    start = time.process_time()
+    for line in lines:
+        event = json.loads(line)
+        if event["audio_data"]:
+            base64.b64decode(event["audio_data"])
+    return time.process_time() - start
+
+
+def decode_websocket(messages: list[bytes | str]) -> float:
+    start = time.process_time()
+    for message in messages:
+        if isinstance(message, bytes):
+            audio_sequence, audio = int.from_bytes(message[:4], "big"), message[4:]
+        else:
+            json.loads(message)
+    return time.process_time() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    openai_agents_stream.get_user_input_language = detect_english
+    openai_agents_stream.Runner = SimpleNamespace(
+        run_streamed=lambda *a, **kw: SentenceScriptedRun(args.sentences * 10)
+    )
+
+    results = {}
+    for name, turn, decode, size in (
+        ("NDJSON + base64", ndjson_turn, decode_ndjson, len),
+        (
+            "WebSocket binary",
+            websocket_turn,
+            decode_websocket,
+            lambda message: websocket_frame_size(
+                len(message if isinstance(message, bytes) else message.encode())
+            ),
+        ),
+    ):
+        sent = server_cpu = client_cpu = 0
+        for _ in range(args.turns):
+            messages, cpu = await turn()
+            server_cpu += cpu
+            client_cpu += decode(messages)
+            sent += sum(map(size, messages))
+        results[name] = (
+            sent / args.turns,
+            server_cpu / args.turns * 1000,
+            client_cpu / args.turns * 1000,
+        )
+
+    print(f"{args.sentences} sentences per turn, mean over {args.turns} turns")
+    print(f"{'transport':<18} | {'bytes':>9} | {'server CPU':>10} | {'client CPU':>10}")
+    for name, (sent, server_cpu, client_cpu) in results.items():
+        print(
+            f"{name:<18} | {sent:>9,.0f} | {server_cpu:>7.2f} ms | {client_cpu:>7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseContentPartDoneEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from agents.models.interface import Model
+from agents.models.multi_provider import MultiProvider
+
+# The tools read their Azure and backend settings at import. The tests never reach those services, so placeholders do.
+for name, value in {
+    "OPENAI_API_KEY": "test",
+    "AZURE_OPENAI_CHATGPT_MODEL": "gpt-4o",
+    "AZURE_OPENAI_SERVICE": "test",
+    "AZURE_OPENAI_CHATGPT_DEPLOYMENT": "test",
+    "AZURE_HHAI_CHAT_ENDPOINT": "http://127.0.0.1:9",
+    "AZURE_HHAI_CHAT_SESSION_ID": "test",
+    "BACKEND_MAIN_API_URL": "http://127.0.0.1:9",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+def text_message(text: str) -> ResponseOutputMessage:
+    return ResponseOutputMessage(
+        id="msg_test",
+        type="message",
+        role="assistant",
+        status="completed",
+        content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+    )
+
+
+def function_call(name: str, arguments: dict | None = None) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        id="fc_test",
+        type="function_call",
+        call_id=f"call_{name}",
+        name=name,
+        arguments=json.dumps(arguments or {}),
+    )
+
+
+class FakeModel(Model):
+    """
+    Stands in for every LLM of the agent graphs: each model call takes the next queued output, and once the queue is
+    empty the model answers with a plain message. Messages are streamed word by word, as text deltas.
+    Records the instructions, input and handoff tools of every call.
+    """
+
+    def __init__(self) -> None:
+        self.outputs: list[list] = []
+        self.calls: list[SimpleNamespace] = []
+
+    def reply(self, text: str) -> None:
+        self.outputs.append([text_message(text)])
+
+    def call(self, name: str, arguments: dict | None = None) -> None:
+        """Queue a call of a tool or handoff, the run then continues with the next model call."""
+        self.outputs.append([function_call(name, arguments)])
+
+    async def get_response(self, *args, **kwargs):
+        raise NotImplementedError("The agent graphs only run streamed")
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+    ):
+        self.calls.append(
+            SimpleNamespace(
+                instructions=system_instructions,
+                input=input,
+                handoffs=[handoff.tool_name for handoff in handoffs],
+            )
+        )
+        output = self.outputs.pop(0) if self.outputs else [text_message("OK")]
+        for item in output:
+            if isinstance(item, ResponseOutputMessage):
+                part = item.content[0]
+                for word in part.text.split(" "):
+                    yield ResponseTextDeltaEvent(
+                        type="response.output_text.delta",
+                        content_index=0,
+                        delta=f"{word} ",
+                        item_id=item.id,
+                        logprobs=[],
+                        output_index=0,
+                        sequence_number=0,
+                    )
+                yield ResponseContentPartDoneEvent(
+                    type="response.content_part.done",
+                    content_index=0,
+                    item_id=item.id,
+                    output_index=0,
+                    part=part,
+                    sequence_number=0,
+                )
+        yield ResponseCompletedEvent(
+            type="response.completed",
+            sequence_number=0,
+            response=Response(
+                id="resp_test",
+                created_at=0,
+                model="test",
+                object="response",
+                output=output,
+                tool_choice="auto",
+                tools=[],
+                parallel_tool_calls=False,
+            ),
+        )
+
+
+@pytest.fixture
+def fake_model(monkeypatch) -> FakeModel:
+    model = FakeModel()
+    monkeypatch.setattr(MultiProvider, "get_model", lambda self, model_name: model)
+
+    from app.services.openai import openai_agents_stream
+
+    async def get_user_input_language(user_msg, backend_client=None):
+        return "English"
+
+    monkeypatch.setattr(
+        openai_agents_stream, "get_user_input_language", get_user_input_language
+    )
+    return model
+
+
+@pytest.fixture(autouse=True)
+def estimated_history_tokens(monkeypatch):
+    """Count history tokens from their length, tiktoken would download its encoding on first use."""
+    from app.services.openai import history_compaction
+
+    monkeypatch.setattr(
+        history_compaction,
+        "token_counter",
+        history_compaction.HistoryTokenCounter(
+            count_message=history_compaction.estimate_tokens
+        ),
+    )
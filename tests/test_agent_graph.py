@@ -0,0 +1,199 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+from agents import Agent, Handoff
+from app.schemas.chat import EventType, RequestType
+from app.services.openai import agents as agent_definitions
+from app.services.openai import openai_agents_stream, openai_agents_stream_mcp
+
+TURNS = 1000
+CONVERSATION_TURNS = 5
+
+# Handoffs of the agents in agents.py, as they are defined there
+MAIN_GRAPH_HANDOFFS = {
+    "general_questions_agent": [],
+    "vaccination_records_agent": [],
+    "recommender_agent": [],
+    "check_available_slots_agent": [
+        "transfer_to_manage_appointment_agent",
+        "transfer_to_triage_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "identify_clinic_agent": [
+        "transfer_to_check_available_slots_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "vaccination_history_check_agent": [
+        "transfer_to_identify_clinic_agent",
+        "transfer_to_triage_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "recommended_vaccine_check_agent": [
+        "transfer_to_vaccination_history_check_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "double_booking_check_agent": [
+        "transfer_to_recommended_vaccine_check_agent",
+        "transfer_to_identify_clinic_agent",
+        "transfer_to_manage_appointment_agent",
+        "transfer_to_triage_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "handle_vaccine_names_agent": [
+        "transfer_to_double_booking_check_agent",
+        "transfer_to_recommender_agent",
+    ],
+    "manage_appointment_agent": [],
+    "modify_existing_appointment_agent": [
+        "transfer_to_identify_clinic_agent",
+        "transfer_to_manage_appointment_agent",
+        "transfer_to_interrupt_handler_agent",
+    ],
+    "appointments_agent": [
+        "transfer_to_handle_vaccine_names_agent",
+        "transfer_to_modify_existing_appointment_agent",
+    ],
+    "triage_agent": [
+        "transfer_to_appointments_agent",
+        "transfer_to_recommender_agent",
+        "transfer_to_vaccination_records_agent",
+        "transfer_to_general_questions_agent",
+    ],
+    "interrupt_handler_agent": [
+        "transfer_to_triage_agent",
+        "transfer_back_to_interrupted_agent",
+    ],
+}
+
+
+def handoff_tool_names(agent: Agent) -> list[str]:
+    return [
+        item.tool_name if isinstance(item, Handoff) else Handoff.default_tool_name(item)
+        for item in agent.handoffs
+    ]
+
+
+def module_agents(module) -> list[Agent]:
+    return [value for value in vars(module).values() if isinstance(value, Agent)]
+
+
+def mcp_graph_agents() -> list[Agent]:
+    """Agents reachable in the MCP graph, from its entry points and through handoffs."""
+    pending = [
+        *openai_agents_stream_mcp.current_agent_mapping.values(),
+        *openai_agents_stream_mcp.intent_agent_mapping.values(),
+    ]
+    reachable = {}
+    while pending:
+        agent = pending.pop()
+        if id(agent) not in reachable:
+            reachable[id(agent)] = agent
+            pending.extend(item for item in agent.handoffs if isinstance(item, Agent))
+    return list(reachable.values())
+
+
+def snapshot() -> dict[int, tuple[list[str], int]]:
+    return {
+        id(agent): (handoff_tool_names(agent), len(agent.tools))
+        for module in (agent_definitions, openai_agents_stream_mcp)
+        for agent in module_agents(module)
+    }
+
+
+def test_main_graph_is_not_changed_by_the_mcp_graph():
+    handoffs = {
+        agent.name: handoff_tool_names(agent)
+        for agent in module_agents(agent_definitions)
+    }
+    assert handoffs == MAIN_GRAPH_HANDOFFS
+
+
+def test_mcp_graph_only_hands_off_within_itself():
+    main_graph_returns = {
+        Handoff.default_tool_name(agent_definitions.triage_agent),
+        Handoff.default_tool_name(agent_definitions.interrupt_handler_agent),
+    }
+    for agent in mcp_graph_agents():
+        assert not main_graph_returns & set(handoff_tool_names(agent)), agent.name
+
+
+async def stream_turn(stream, **kwargs):
+    async for chunk in stream(
+        request_type=RequestType.CHAT_REQUEST,
+        auth_token="test-token",
+        backend_client=SimpleNamespace(),
+        **kwargs,
+    ):
+        if chunk.event_type == EventType.TERMINATING_EVENT:
+            return chunk
+
+
+def test_graphs_do_not_change_with_requests(fake_model, monkeypatch):
+    """
+    Drives a thousand turns through both graphs, each with a random handoff of the agent it starts at, interrupts
+    and returns included. Conversations carry on over a few turns, as clients without a session send them.
+    """
+
+    async def list_tools():
+        return []
+
+    monkeypatch.setattr(
+        openai_agents_stream_mcp.hhai_mcp_pool, "list_tools", list_tools
+    )
+    graphs = [
+        (
+            openai_agents_stream.main,
+            agent_definitions.current_agent_mapping,
+        ),
+        (
+            openai_agents_stream_mcp.main_mcp,
+            openai_agents_stream_mcp.current_agent_mapping,
+        ),
+    ]
+    rng = random.Random(0)
+    before = snapshot()
+    handoffs_made = set()
+
+    async def run():
+        turns = 0
+        while turns < TURNS:
+            stream, agent_mapping = rng.choice(graphs)
+            # Conversations resume at any agent a client may send back as agent_name
+            conversation = {
+                "history": None,
+                "current_agent": rng.choice(list(agent_mapping)),
+                "user_info": None,
+            }
+            for _ in range(CONVERSATION_TURNS):
+                agent_name = conversation["current_agent"]
+                tool_names = handoff_tool_names(agent_mapping[agent_name])
+                if tool_names and rng.random() < 0.8:
+                    tool_name = rng.choice(tool_names)
+                    fake_model.call(tool_name, {"requested_vaccine": "flu"})
+                    handoffs_made.add(tool_name)
+                fake_model.reply("OK")
+                terminating_event = await stream_turn(
+                    stream, user_msg="OK", **conversation
+                )
+                turns += 1
+                # The streams only resume at the agents of their mapping, a run ending at a routing agent such as
+                # appointments_agent is over
+                if terminating_event.agent_name not in agent_mapping:
+                    break
+                conversation = {
+                    "history": terminating_event.history,
+                    "current_agent": terminating_event.agent_name,
+                    "user_info": terminating_event.user_info,
+                }
+
+    asyncio.run(run())
+    assert snapshot() == before
+    # Every queued handoff was taken
+    assert not fake_model.outputs
+    # The turns went through the interrupt handlers and back
+    assert {
+        "transfer_to_interrupt_handler_agent",
+        "transfer_to_interrupt_handler_agent_mcp",
+        "transfer_back_to_interrupted_agent",
+    } <= handoffs_made
@@ -0,0 +1,59 @@
+import asyncio
+
+from app.services.speech.audio_cache import AudioCache, DiskAudioStore
+
+
+def test_disk_store_stays_within_its_byte_cap(tmp_path):
+    store = DiskAudioStore(str(tmp_path), max_bytes=1000)
+    for index in range(30):
+        store.put(f"key-{index}", bytes([index]) * 100)
+        # Recently used entries survive compaction
+        store.get("key-0")
+    assert store.size <= 1000
+    assert store.compactions > 0
+    assert "key-0" in store and "key-29" in store
+    assert "key-1" not in store
+    store.close()
+
+    reopened = DiskAudioStore(str(tmp_path), max_bytes=1000)
+    assert set(reopened.index) == set(store.index)
+    assert reopened.get("key-0") == bytes([0]) * 100
+    assert reopened.get("key-29") == bytes([29]) * 100
+    reopened.close()
+
+
+def test_only_recurring_sentences_and_warm_up_phrases_are_persisted(tmp_path):
+    async def run():
+        audio_cache = AudioCache(directory=str(tmp_path), persist_after=3)
+        audio_cache.open()
+        await audio_cache.put("warm-up", b"warm-up audio", persist=True)
+        await audio_cache.put("one-off", b"one-off audio")
+        await audio_cache.put("recurring", b"recurring audio")
+        for _ in range(2):
+            assert await audio_cache.get("recurring") == b"recurring audio"
+        # Written in the background
+        await asyncio.gather(*audio_cache._persist_tasks)
+        on_disk = set(audio_cache.disk.index)
+        audio_cache.close()
+        return on_disk
+
+    assert asyncio.run(run()) == {"warm-up", "recurring"}
+
+
+def test_disk_hits_after_restart(tmp_path):
+    async def run():
+        audio_cache = AudioCache(directory=str(tmp_path))
+        audio_cache.open()
+        await audio_cache.put("warm-up", b"warm-up audio", persist=True)
+        audio_cache.close()
+
+        restarted = AudioCache(directory=str(tmp_path))
+        restarted.open()
+        audio = await restarted.get("warm-up")
+        stats = restarted.stats()
+        restarted.close()
+        return audio, stats
+
+    audio, stats = asyncio.run(run())
+    assert audio == b"warm-up audio"
+    assert stats["disk_hits"] == 1
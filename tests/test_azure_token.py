@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from azure.core.credentials import AccessToken
+
+from app.services.speech import azure_token
+
+FETCH_SECONDS = 0.05
+
+
+class SlowCredential:
+    """Takes `fetch_seconds` per token, like a call to Azure AD."""
+
+    def __init__(self, fetch_seconds: float, lifetime: float) -> None:
+        self.fetch_seconds = fetch_seconds
+        self.lifetime = lifetime
+        self.fetches = 0
+
+    async def get_token(self, *scopes):
+        self.fetches += 1
+        await asyncio.sleep(self.fetch_seconds)
+        return AccessToken(f"token-{self.fetches}", time.time() + self.lifetime)
+
+    async def close(self):
+        pass
+
+
+def test_expiry_burst_fetches_one_token():
+    credential = SlowCredential(FETCH_SECONDS, 3600)
+    token_manager = azure_token.AzureTokenManager(
+        resource_id="test", credential=credential
+    )
+    token_manager.access_token = AccessToken("expired", 0)
+
+    async def run():
+        return await asyncio.gather(
+            *(token_manager.get_auth_token() for _ in range(200))
+        )
+
+    tokens = asyncio.run(run())
+    assert credential.fetches == 1
+    assert set(tokens) == {"aad#test#token-1"}
+
+
+def test_background_refresh_pushes_tokens_before_requests_wait(monkeypatch):
+    lifetime = 0.5
+    # Refresh half way through each token's lifetime
+    monkeypatch.setattr(azure_token, "AZURE_TOKEN_REFRESH_MARGIN", lifetime / 2)
+    monkeypatch.setattr(azure_token, "AZURE_TOKEN_RETRY_DELAY", 0.05)
+    credential = SlowCredential(FETCH_SECONDS, lifetime)
+    token_manager = azure_token.AzureTokenManager(
+        resource_id="test", credential=credential
+    )
+    pushed = []
+    token_manager.subscribe(pushed.append)
+
+    async def run():
+        await token_manager.start()
+        slowest = 0.0
+        deadline = time.perf_counter() + lifetime * 3
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            auth_token = await token_manager.get_auth_token()
+            slowest = max(slowest, time.perf_counter() - start)
+            assert auth_token == pushed[-1]
+            await asyncio.sleep(0.005)
+        await token_manager.close()
+        return slowest
+
+    slowest = asyncio.run(run())
+    assert token_manager.refreshes >= 3
+    assert len(pushed) == token_manager.refreshes
+    assert slowest < FETCH_SECONDS / 2
@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from agents import RunContextWrapper
+from app.schemas.chat import UserInfo
+from app.services.backend.backend_client import BackendClient
+from app.services.openai import backend_cache, tools
+from app.services.openai.backend_cache import RESOURCE_TTLS, BackendResponseCache
+
+USER_A = {"Authorization": "Bearer user-a"}
+USER_B = {"Authorization": "Bearer user-b"}
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    """Stands in for time.monotonic in the cache, advanced by hand."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        backend_cache, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+@pytest.fixture
+def cache(monkeypatch) -> BackendResponseCache:
+    """A fresh cache in place of the app's, for cached_backend_get."""
+    cache = BackendResponseCache()
+    monkeypatch.setattr(tools, "backend_cache", cache)
+    return cache
+
+
+class Backend:
+    """Answers every GET with `status_code` and a body naming the user, and counts the requests."""
+
+    def __init__(self, status_code: int = 200) -> None:
+        self.status_code = status_code
+        self.requests: list[httpx.Request] = []
+        self.client = BackendClient(transport=httpx.MockTransport(self.handle))
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(
+            self.status_code,
+            text=f"{request.url.path} of {request.headers.get('Authorization')}",
+        )
+
+    def wrapper(self, auth_header: dict) -> RunContextWrapper:
+        context = UserInfo(auth_header=auth_header, backend_client=self.client)
+        return RunContextWrapper(context=RunContextWrapper(context=context))
+
+
+@pytest.mark.parametrize(
+    "resource_type", [name for name, ttl in RESOURCE_TTLS.items() if ttl is not None]
+)
+def test_entries_expire_after_the_ttl_of_their_resource_type(clock, resource_type):
+    ttl = RESOURCE_TTLS[resource_type]
+    cache = BackendResponseCache()
+    cache.set(USER_A, resource_type, "/resource", "body")
+
+    clock.now += ttl - 1
+    assert cache.get(USER_A, resource_type, "/resource") == "body"
+    clock.now += 2
+    assert cache.get(USER_A, resource_type, "/resource") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_booking_slots_never_expire(clock):
+    cache = BackendResponseCache()
+    cache.set(USER_A, "booking_slot", "/bookings/1", "slot")
+
+    clock.now += 10 * 365 * 24 * 3600
+    assert cache.get(USER_A, "booking_slot", "/bookings/1") == "slot"
+
+
+def test_users_do_not_share_entries(cache):
+    backend = Backend()
+
+    async def run():
+        responses = []
+        for auth_header in [USER_A, USER_B, USER_A, USER_B]:
+            response = await tools.cached_backend_get(
+                backend.wrapper(auth_header), "user_profile", "/users"
+            )
+            responses.append(response.text)
+        return responses
+
+    assert asyncio.run(run()) == [
+        "/users of Bearer user-a",
+        "/users of Bearer user-b",
+        "/users of Bearer user-a",
+        "/users of Bearer user-b",
+    ]
+    # One request per user, the second of each was cached
+    assert len(backend.requests) == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_expected_changes_drop_the_user_entries_at_the_next_turn(cache):
+    for auth_header in [USER_A, USER_B]:
+        cache.set(auth_header, "records", "/records", "records")
+        cache.set(auth_header, "records", "/records/1", "record")
+        cache.set(auth_header, "user_profile", "/users", "profile")
+
+    cache.expect_change(USER_A, "records")
+    # Nothing is dropped until the user's next turn
+    assert cache.get(USER_A, "records", "/records") == "records"
+
+    assert cache.apply_expected_changes(USER_A) == 2
+    assert cache.get(USER_A, "records", "/records") is None
+    assert cache.get(USER_A, "records", "/records/1") is None
+    assert cache.get(USER_A, "user_profile", "/users") == "profile"
+    assert cache.get(USER_B, "records", "/records") == "records"
+    # The change is applied once
+    cache.set(USER_A, "records", "/records", "records")
+    assert cache.apply_expected_changes(USER_A) == 0
+    assert cache.get(USER_A, "records", "/records") == "records"
+
+
+@pytest.mark.parametrize("status_code", [404, 500, 503])
+def test_unsuccessful_responses_are_not_cached(cache, status_code):
+    backend = Backend(status_code)
+
+    async def run():
+        wrapper = backend.wrapper(USER_A)
+        return [
+            (await tools.cached_backend_get(wrapper, "records", "/records")).status_code
+            for _ in range(2)
+        ]
+
+    assert asyncio.run(run()) == [status_code, status_code]
+    assert len(backend.requests) == 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,127 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from agents import RunContextWrapper
+from app.schemas.chat import UserInfo
+from app.services.backend.backend_client import BackendClient
+from app.services.openai import tools
+from app.services.openai.backend_cache import BackendResponseCache
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch) -> BackendResponseCache:
+    """A fresh cache in place of the app's, so that every slot reaches the backend."""
+    cache = BackendResponseCache()
+    monkeypatch.setattr(tools, "backend_cache", cache)
+    return cache
+
+
+def booking_slot(slot_id: str) -> dict:
+    return {
+        "id": slot_id,
+        "vaccine": {"name": f"Vaccine {slot_id}"},
+        "datetime": "2025-01-01T09:00:00",
+        "polyclinic": {"name": "Bedok Polyclinic"},
+    }
+
+
+class Backend:
+    """
+    Serves /records and /bookings/{id}, slower than a request round trip so that requests overlap.
+    Slots in `missing` get a 404 and slots in `failing` fail the connection.
+    """
+
+    def __init__(
+        self,
+        records: list[dict] | None = None,
+        missing: set[str] = frozenset(),
+        failing: set[str] = frozenset(),
+    ) -> None:
+        self.records = records or []
+        self.missing = missing
+        self.failing = failing
+        self.slot_requests: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client = BackendClient(transport=httpx.MockTransport(self.handle))
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/records":
+            return httpx.Response(200, json=self.records)
+
+        slot_id = request.url.path.rsplit("/", 1)[-1]
+        self.slot_requests[slot_id] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if slot_id in self.failing:
+            raise httpx.ConnectError("backend unreachable", request=request)
+        if slot_id in self.missing:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json=booking_slot(slot_id))
+
+    def wrapper(self) -> RunContextWrapper:
+        context = UserInfo(
+            auth_header={"Authorization": "Bearer test"}, backend_client=self.client
+        )
+        return RunContextWrapper(context=RunContextWrapper(context=context))
+
+
+def record(record_id: str, slot_id: str) -> dict:
+    return {
+        "id": record_id,
+        "booking_slot_id": slot_id,
+        "created_at": "2024-12-01T00:00:00",
+    }
+
+
+def test_duplicate_slots_are_fetched_once():
+    backend = Backend()
+    slot_ids = ["1", "2", "1", "3", "2", "1"]
+
+    booking_slots = asyncio.run(tools.get_booking_slots(backend.wrapper(), slot_ids))
+    assert list(booking_slots) == ["1", "2", "3"]
+    assert booking_slots["2"] == booking_slot("2")
+    assert backend.slot_requests == Counter({"1": 1, "2": 1, "3": 1})
+
+
+def test_requests_in_flight_are_capped(monkeypatch):
+    monkeypatch.setattr(tools, "BOOKING_SLOT_CONCURRENCY", 4)
+    backend = Backend()
+    slot_ids = [str(i) for i in range(20)]
+
+    booking_slots = asyncio.run(tools.get_booking_slots(backend.wrapper(), slot_ids))
+    assert len(booking_slots) == 20
+    assert backend.max_in_flight == 4
+
+
+def test_a_missing_or_failed_slot_only_drops_its_own_record():
+    backend = Backend(
+        records=[record(f"r{i}", str(i)) for i in range(5)],
+        missing={"1"},
+        failing={"3"},
+    )
+
+    async def run():
+        wrapper = backend.wrapper()
+        booking_slots = await tools.get_booking_slots(
+            wrapper, ["0", "1", "2", "3", "4"]
+        )
+        return booking_slots, await tools.get_augmented_records(wrapper)
+
+    booking_slots, augmented_records = asyncio.run(run())
+    assert booking_slots["1"] is None and booking_slots["3"] is None
+    assert [record["id"] for record in augmented_records] == ["r0", "r2", "r4"]
+    assert augmented_records[1] == {
+        "id": "r2",
+        "booking_slot_id": "2",
+        "vaccine_name": "Vaccine 2",
+        "slot_date": "2025-01-01T09:00:00",
+        "polyclinic": "Bedok Polyclinic",
+    }
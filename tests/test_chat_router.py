@@ -0,0 +1,108 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import chat
+from app.schemas.chat import STREAM_MODE_HEADER, EventType
+from app.services.openai import openai_agents_stream_mcp
+
+ANSWER = "The flu vaccine is recommended every year."
+PATHS = ["/chat/stream", "/chat/stream_mcp"]
+
+
+@pytest.fixture
+def client(fake_model, monkeypatch) -> TestClient:
+    async def list_tools():
+        return []
+
+    monkeypatch.setattr(
+        openai_agents_stream_mcp.hhai_mcp_pool, "list_tools", list_tools
+    )
+    fake_model.reply(ANSWER)
+
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.state.session_store = None
+    app.state.backend_client = SimpleNamespace()
+    return TestClient(app)
+
+
+def post_chat(
+    client: TestClient, path: str, stream_mode: str, header: str | None = None
+) -> tuple[str, list[dict]]:
+    """The negotiated stream mode header and the NDJSON events of one turn."""
+    response = client.post(
+        path,
+        json={
+            "message": "How often should I get the flu vaccine?",
+            "auth_token": "test-token",
+            "stream_mode": stream_mode,
+        },
+        headers={STREAM_MODE_HEADER: header} if header else {},
+    )
+    assert response.status_code == 200
+    assert response.text.endswith("\n")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    return response.headers[STREAM_MODE_HEADER], events
+
+
+def events_of(events: list[dict], event_type: EventType) -> list[dict]:
+    return [event for event in events if event["event_type"] == event_type]
+
+
+def assert_delta_mode(events: list[dict]):
+    deltas = events_of(events, EventType.DELTA_TEXT_EVENT)
+    new_agents = events_of(events, EventType.NEW_AGENT_EVENT)
+    [completed] = events_of(events, EventType.COMPLETED_TEXT_EVENT)
+    assert deltas and new_agents
+    assert all(event["message"] is None for event in deltas + new_agents)
+    # The full text only arrives once, with the completed text event
+    text = "".join(event["delta_message"] for event in deltas)
+    assert completed["message"] == text + "\n"
+    assert ANSWER in completed["message"]
+
+
+def assert_full_mode(events: list[dict]):
+    deltas = events_of(events, EventType.DELTA_TEXT_EVENT)
+    [completed] = events_of(events, EventType.COMPLETED_TEXT_EVENT)
+    text = ""
+    for event in deltas:
+        text += event["delta_message"]
+        assert event["message"] == text
+    assert completed["message"] == text + "\n"
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_delta_mode_sends_the_full_text_once(client, path):
+    stream_mode, events = post_chat(client, path, "delta")
+    assert stream_mode == "delta"
+    assert_delta_mode(events)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_full_mode_accumulates_the_text_on_every_delta(client, path):
+    stream_mode, events = post_chat(client, path, "full")
+    assert stream_mode == "full"
+    assert_full_mode(events)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_header_overrides_the_stream_mode_field(client, path):
+    stream_mode, events = post_chat(client, path, "full", header="delta")
+    assert stream_mode == "delta"
+    assert_delta_mode(events)
+
+
+def test_header_is_case_insensitive(client):
+    stream_mode, events = post_chat(client, "/chat/stream", "delta", header=" FULL ")
+    assert stream_mode == "full"
+    assert_full_mode(events)
+
+
+def test_unknown_header_falls_back_to_the_field(client):
+    stream_mode, events = post_chat(client, "/chat/stream", "delta", header="gzip")
+    assert stream_mode == "delta"
+    assert_delta_mode(events)
@@ -0,0 +1,119 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.services.backend.backend_client import BackendClient
+from app.services.openai.clinic_index import (
+    ClinicSpatialIndex,
+    KDTree,
+    clinic_coordinates,
+    haversine_km,
+    to_unit_vector,
+)
+
+CLINIC_COUNT = 300
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    return rng.uniform(1.25, 1.45), rng.uniform(103.65, 104.0)
+
+
+def make_clinics(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    clinics = []
+    for i in range(count):
+        latitude, longitude = random_point(rng)
+        clinics.append(
+            {
+                "name": f"Clinic {i}",
+                "address": {"latitude": latitude, "longitude": longitude},
+                "distance": 0.0,
+            }
+        )
+    return clinics
+
+
+def brute_force_nearest(clinics: list[dict], latitude: float, longitude: float, k: int):
+    return sorted(
+        clinics,
+        key=lambda clinic: haversine_km(
+            latitude, longitude, *clinic_coordinates(clinic)
+        ),
+    )[:k]
+
+
+def clinic_backend(clinics: list[dict], max_limit: int | None = None) -> BackendClient:
+    """/clinics/nearest-by-location over `clinics`, returning at most `max_limit` of them if set."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        limit = int(params["clinic_limit"])
+        if max_limit is not None:
+            limit = min(limit, max_limit)
+        nearest = brute_force_nearest(
+            clinics, float(params["latitude"]), float(params["longitude"]), limit
+        )
+        return httpx.Response(200, json=nearest)
+
+    return BackendClient(transport=httpx.MockTransport(handler))
+
+
+def test_kd_tree_matches_brute_force_haversine():
+    rng = random.Random(1)
+    points = [random_point(rng) for _ in range(CLINIC_COUNT)]
+    tree = KDTree([to_unit_vector(*point) for point in points])
+
+    for _ in range(200):
+        target = random_point(rng)
+        k = rng.randint(1, 10)
+        expected = sorted(
+            range(len(points)), key=lambda i: haversine_km(*target, *points[i])
+        )[:k]
+        assert tree.query(to_unit_vector(*target), k) == expected
+
+
+def test_nearest_returns_brute_force_clinics_with_query_distances():
+    clinics = make_clinics(CLINIC_COUNT)
+    index = ClinicSpatialIndex()
+    index.load("gp", clinics)
+
+    rng = random.Random(2)
+    for _ in range(50):
+        latitude, longitude = random_point(rng)
+        nearest = index.nearest("gp", latitude, longitude, 5)
+        expected = brute_force_nearest(clinics, latitude, longitude, 5)
+        assert [clinic["name"] for clinic in nearest] == [
+            clinic["name"] for clinic in expected
+        ]
+        assert nearest[0]["distance"] == round(
+            haversine_km(latitude, longitude, *clinic_coordinates(expected[0])), 3
+        )
+
+
+def test_refresh_indexes_a_complete_response():
+    clinics = make_clinics(CLINIC_COUNT)
+    index = ClinicSpatialIndex(fetch_limit=CLINIC_COUNT + 1)
+
+    asyncio.run(index.refresh("gp", clinic_backend(clinics), None))
+    assert len(index.clinics["gp"]) == CLINIC_COUNT
+
+
+def test_refresh_refuses_a_response_at_the_limit():
+    clinics = make_clinics(CLINIC_COUNT)
+    index = ClinicSpatialIndex(fetch_limit=CLINIC_COUNT)
+
+    with pytest.raises(Exception, match="limit"):
+        asyncio.run(index.refresh("gp", clinic_backend(clinics), None))
+    assert index.nearest("gp", 1.3, 103.8, 5) is None
+
+
+def test_refresh_refuses_a_response_capped_by_the_backend():
+    clinics = make_clinics(CLINIC_COUNT)
+    index = ClinicSpatialIndex(fetch_limit=CLINIC_COUNT + 1)
+
+    # Fewer clinics than the limit, but only those around the centroid
+    with pytest.raises(Exception, match="missing"):
+        asyncio.run(index.refresh("gp", clinic_backend(clinics, max_limit=100), None))
+    assert index.nearest("gp", 1.3, 103.8, 5) is None
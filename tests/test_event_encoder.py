@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from pydantic_core import PydanticSerializationError
+
+from app.schemas.chat import BookingDetails, ChatResponse, DataType, EventType
+from app.schemas.voice import VoiceResponse
+from app.services.openai.event_encoder import build_event, encode_event
+
+HISTORY = [
+    {"content": "我想打流感疫苗", "role": "user"},
+    {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": "好的", "annotations": []}],
+    },
+]
+
+RESPONSE_DICTS = {
+    "delta": {
+        "event_type": EventType.DELTA_TEXT_EVENT,
+        "message": None,
+        "delta_message": "Hello ",
+        "agent_name": "triage_agent",
+        "user_info": None,
+    },
+    "non_ascii": {
+        "event_type": EventType.COMPLETED_TEXT_EVENT,
+        "message": 'Vaksin "selesema" 流感疫苗 — தடுப்பூசி 😀\n\t\\ \x00\x1f\x7f ',
+        "agent_name": "triage_agent",
+    },
+    "tool_output": {
+        "event_type": EventType.TOOL_CALL_OUTPUT_EVENT,
+        "data_type": DataType.BOOKING_DETAILS,
+        "data": BookingDetails(booking_slot_id="s1", vaccine="Influenza"),
+        "agent_name": "manage_appointment_agent",
+        "user_info": {"data_type": "booking_details", "restart": False},
+    },
+    "unusual_data": {
+        "event_type": EventType.TOOL_CALL_OUTPUT_EVENT,
+        "data": {1: float("nan"), "inf": [float("inf"), -0.0, 10**30], "set": {3}},
+        "agent_name": "manage_appointment_agent",
+    },
+    "terminating": {
+        "event_type": EventType.TERMINATING_EVENT,
+        "history": HISTORY,
+        "agent_name": "triage_agent",
+        "user_info": {"current_agent": "triage_agent", "interrupted_agent": None},
+        "response_language": "Chinese",
+    },
+}
+
+
+@pytest.mark.parametrize("model", [ChatResponse, VoiceResponse])
+@pytest.mark.parametrize("response_dict", RESPONSE_DICTS.values(), ids=RESPONSE_DICTS)
+def test_encoding_matches_pydantic(model, response_dict):
+    event = build_event(model, response_dict)
+    line = encode_event(event)
+    assert line == event.model_dump_json() + "\n"
+    json.loads(line)
+
+
+def test_built_event_matches_a_validated_model():
+    response_dict = {**RESPONSE_DICTS["terminating"], "message": None}
+    assert build_event(ChatResponse, response_dict) == ChatResponse(**response_dict)
+
+
+def test_voice_audio_fields():
+    event = build_event(
+        VoiceResponse,
+        {
+            **RESPONSE_DICTS["delta"],
+            "audio_data": "SUQz",
+            "audio_sequence": 7,
+            "audio_bytes": b"ID3\x00\xff",
+        },
+    )
+    line = encode_event(event)
+    assert line == event.model_dump_json() + "\n"
+    # The raw audio goes out in a binary frame of its own, never in the JSON
+    assert "audio_bytes" not in json.loads(line)
+    assert json.loads(line)["audio_sequence"] == 7
+
+
+def test_other_models_fall_back_to_pydantic():
+    class AudioOnlyResponse(VoiceResponse):
+        duration: float = 1.5
+
+    event = build_event(VoiceResponse, RESPONSE_DICTS["delta"])
+    subclass_event = AudioOnlyResponse(**event.model_dump())
+    line = encode_event(subclass_event)
+    assert line == subclass_event.model_dump_json() + "\n"
+    assert json.loads(line)["duration"] == 1.5
+
+
+def test_unserialisable_values_fail_like_pydantic():
+    event = build_event(
+        ChatResponse, {**RESPONSE_DICTS["tool_output"], "data": object()}
+    )
+    with pytest.raises(PydanticSerializationError):
+        event.model_dump_json()
+    with pytest.raises(PydanticSerializationError):
+        encode_event(event)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.openai.geocoder import GazetteerGeocoderBackend, Geocoder
+
+
+class StubGeocoderBackend:
+    """Resolves every location to `location` (or fails with `error`), and records the names it was asked for."""
+
+    def __init__(
+        self, name: str, location: dict | None = None, error: Exception | None = None
+    ) -> None:
+        self.name = name
+        self.location = location
+        self.error = error
+        self.queries: list[str] = []
+
+    async def geocode(self, location_name: str, backend_client) -> dict | None:
+        self.queries.append(location_name)
+        if self.error is not None:
+            raise self.error
+        if self.location is None:
+            return None
+        return {**self.location, "address": location_name}
+
+
+def geocode(geocoder: Geocoder, *location_names: str) -> list[dict | None]:
+    async def run():
+        # The backends never use the client
+        return [await geocoder.geocode(name, object()) for name in location_names]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope="module")
+def gazetteer() -> GazetteerGeocoderBackend:
+    return GazetteerGeocoderBackend()
+
+
+@pytest.mark.parametrize(
+    "location_name, address",
+    [
+        # Exact names, whatever the case and punctuation
+        ("Bedok", "BEDOK"),
+        ("  jurong EAST! ", "JURONG EAST"),
+        # Aliases
+        ("AMK", "ANG MO KIO"),
+        ("Orchard Road", "ORCHARD"),
+        ("淡滨尼", "TAMPINES"),
+        # Known places within the query, the longest name wins
+        ("Tampines MRT station", "TAMPINES"),
+        ("near bukit timah road", "BUKIT TIMAH"),
+        ("Changi Airport Terminal 3", "CHANGI AIRPORT"),
+        ("我住在裕廊西附近", "JURONG WEST"),
+    ],
+)
+def test_gazetteer_resolves_names_aliases_and_contained_names(
+    gazetteer, location_name, address
+):
+    [location] = geocode(Geocoder([gazetteer], disk_cache_path=None), location_name)
+    assert location["address"] == address
+
+
+@pytest.mark.parametrize("location_name", ["Atlantis", "Bedokville", "bukit"])
+def test_gazetteer_does_not_match_part_of_a_word(gazetteer, location_name):
+    assert geocode(Geocoder([gazetteer], disk_cache_path=None), location_name) == [None]
+
+
+def test_queries_share_the_normalised_cache_entry():
+    backend = StubGeocoderBackend("stub", {"latitude": 1.3, "longitude": 103.8})
+    geocoder = Geocoder([backend], disk_cache_path=None)
+
+    locations = geocode(geocoder, "Jurong  East!", "jurong east", "JURONG-EAST")
+    assert backend.queries == ["Jurong  East!"]
+    assert locations[1] is locations[0] and locations[2] is locations[0]
+    assert (geocoder.hits, geocoder.misses) == (2, 1)
+
+
+def test_backends_are_tried_in_order_until_one_resolves():
+    backends = [
+        StubGeocoderBackend("unknown"),
+        StubGeocoderBackend("failing", error=RuntimeError("timeout")),
+        StubGeocoderBackend("first", {"latitude": 1.0, "longitude": 103.0}),
+        StubGeocoderBackend("second", {"latitude": 2.0, "longitude": 104.0}),
+    ]
+    geocoder = Geocoder(backends, disk_cache_path=None)
+
+    [location] = geocode(geocoder, "Tampines")
+    assert location["latitude"] == 1.0
+    assert [len(backend.queries) for backend in backends] == [1, 1, 1, 0]
+
+
+def test_unresolved_locations_are_not_cached():
+    backend = StubGeocoderBackend("unknown")
+    geocoder = Geocoder([backend], disk_cache_path=None)
+
+    assert geocode(geocoder, "Atlantis", "Atlantis") == [None, None]
+    assert len(backend.queries) == 2
+
+
+def test_disk_cache_survives_a_restart(tmp_path):
+    disk_cache_path = str(tmp_path / "geocoder.json")
+    backend = StubGeocoderBackend("stub", {"latitude": 1.3, "longitude": 103.8})
+    [location] = geocode(Geocoder([backend], disk_cache_path=disk_cache_path), "Bishan")
+
+    restarted_backend = StubGeocoderBackend("stub", error=RuntimeError("offline"))
+    restarted = Geocoder([restarted_backend], disk_cache_path=disk_cache_path)
+    assert geocode(restarted, "bishan") == [location]
+    assert restarted_backend.queries == []
+
+
+def test_disk_cache_keeps_the_most_recent_entries(tmp_path):
+    disk_cache_path = str(tmp_path / "geocoder.json")
+    backend = StubGeocoderBackend("stub", {"latitude": 1.3, "longitude": 103.8})
+    geocoder = Geocoder([backend], cache_size=3, disk_cache_path=disk_cache_path)
+
+    geocode(geocoder, "a", "b", "c", "a", "d", "e")
+    with open(disk_cache_path, encoding="utf-8") as f:
+        # "a" was used again before "d" and "e" were added, "b" and "c" were evicted
+        assert list(json.load(f)) == ["a", "d", "e"]
+
+    # A smaller cache size on restart keeps the most recent entries
+    restarted = Geocoder([backend], cache_size=2, disk_cache_path=disk_cache_path)
+    assert list(restarted.disk_cache) == ["d", "e"]
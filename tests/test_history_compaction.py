@@ -0,0 +1,134 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.schemas.chat import EventType, RequestType
+from app.services.openai import history_compaction, openai_agents_stream
+from app.services.openai.history_compaction import (
+    HistoryTokenCounter,
+    compact_history,
+    estimate_tokens,
+)
+
+counter = HistoryTokenCounter(count_message=estimate_tokens)
+
+
+def turn_items(turn: int) -> list[dict]:
+    """A user message, a tool call with a bulky slot list and the answer, as result.to_input_list() returns."""
+    slots = [
+        {"id": f"slot-{turn}-{index}", "clinic": "Bukit Batok Polyclinic"}
+        for index in range(40)
+    ]
+    return [
+        {"content": f"Show me flu vaccine slots, attempt {turn}", "role": "user"},
+        {
+            "type": "function_call",
+            "call_id": f"call_{turn}",
+            "name": "get_available_slots_tool",
+            "arguments": json.dumps({"clinic": "Bukit Batok Polyclinic"}),
+        },
+        {
+            "type": "function_call_output",
+            "call_id": f"call_{turn}",
+            "output": json.dumps(slots),
+        },
+        {
+            "role": "assistant",
+            "type": "message",
+            "content": [
+                {
+                    "type": "output_text",
+                    "text": "Here are the available slots.",
+                    "annotations": [],
+                }
+            ],
+        },
+    ]
+
+
+def call_ids(history: list, item_type: str) -> list[str]:
+    return [item["call_id"] for item in history if item.get("type") == item_type]
+
+
+def test_compaction_keeps_tool_calls_with_their_outputs():
+    history = [item for turn in range(12) for item in turn_items(turn)]
+
+    result = compact_history(history, 2000, 2, counter)
+
+    assert result.tokens_after < result.tokens_before
+    assert result.dropped_items and result.summarized_outputs
+    assert call_ids(result.history, "function_call") == call_ids(
+        result.history, "function_call_output"
+    )
+    # Whole exchanges are dropped, the history still opens with a user message
+    assert result.history[0]["role"] == "user"
+    # The recent exchanges are sent verbatim
+    assert result.history[-8:] == history[-8:]
+
+
+def test_history_within_budget_is_unchanged():
+    history = turn_items(0)
+    result = compact_history(history, 100000, counter=counter)
+    assert result.history is history
+    assert result.tokens_saved == 0
+
+
+def test_history_that_cannot_exceed_the_budget_is_not_tokenized():
+    def count_message(message):
+        raise AssertionError("tokenized")
+
+    history = [{"content": "Book a flu shot", "role": "user"}]
+    result = compact_history(
+        history, 4000, counter=HistoryTokenCounter(count_message=count_message)
+    )
+    assert result.history is history
+    assert not result.counted
+
+
+def test_tokenizer_failure_falls_back_to_estimates(monkeypatch):
+    def count_tokens_for_message(*args, **kwargs):
+        raise ConnectionError("o200k_base cannot be downloaded")
+
+    monkeypatch.setattr(
+        history_compaction, "count_tokens_for_message", count_tokens_for_message
+    )
+    failing_counter = HistoryTokenCounter()
+    history = [item for turn in range(12) for item in turn_items(turn)]
+
+    result = compact_history(history, 3000, 2, failing_counter)
+
+    assert failing_counter.estimating
+    assert result.tokens_after < result.tokens_before
+    assert result.tokens_before == sum(counter.count(item) for item in history)
+
+
+def test_stream_compacts_the_model_input_but_returns_the_full_history(
+    fake_model, monkeypatch
+):
+    monkeypatch.setattr(history_compaction, "HISTORY_TOKEN_BUDGET", 2000)
+    monkeypatch.setattr(history_compaction, "HISTORY_KEEP_EXCHANGES", 2)
+    history = [item for turn in range(12) for item in turn_items(turn)]
+    sent = list(history)
+
+    async def run():
+        async for chunk in openai_agents_stream.main(
+            request_type=RequestType.CHAT_REQUEST,
+            user_msg="Any slots tomorrow?",
+            history=sent,
+            current_agent="check_available_slots_agent",
+            auth_token="test-token",
+            backend_client=SimpleNamespace(),
+        ):
+            if chunk.event_type == EventType.TERMINATING_EVENT:
+                return chunk
+
+    terminating_event = asyncio.run(run())
+
+    model_input = fake_model.calls[0].input
+    assert len(model_input) < len(history) + 1
+    assert terminating_event.history[: len(history)] == history
+    assert terminating_event.history[len(history)] == {
+        "content": "Any slots tomorrow?",
+        "role": "user",
+    }
+    assert terminating_event.history[-1]["content"][0]["text"] == "OK"
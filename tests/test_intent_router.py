@@ -0,0 +1,32 @@
+import pytest
+
+from app.services.openai.intent_router import classify_intent
+
+
+@pytest.mark.parametrize(
+    "user_msg, agent_name",
+    [
+        ("book a flu shot", "double_booking_check_agent"),
+        ("book a vaccine appointment", "recommender_agent"),
+        ("I want to book an appointment for vaccination", "recommender_agent"),
+        ("cancel my appointment", "modify_existing_appointment_agent"),
+        ("show my vaccination records", "vaccination_records_agent"),
+    ],
+)
+def test_confident_routes(user_msg, agent_name):
+    decision = classify_intent(user_msg)
+    assert decision.is_confident
+    assert decision.agent_name == agent_name
+
+
+@pytest.mark.parametrize(
+    "user_msg",
+    [
+        "book a tetanus shot",
+        "book a hepatitis a shot",
+        "预约破伤风疫苗",
+        "tempah suntikan kayu tiga",
+    ],
+)
+def test_unresolved_vaccine_is_left_to_the_llm(user_msg):
+    assert not classify_intent(user_msg).is_confident
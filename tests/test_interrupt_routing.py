@@ -0,0 +1,172 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from agents import Agent, Handoff, RunContextWrapper
+from app.schemas.chat import EventType, RequestType, UserInfo
+from app.services.openai import openai_agents_stream, openai_agents_stream_mcp
+from app.services.openai.agents import current_agent_mapping, interrupt_handler_agent
+
+GRAPHS = [
+    pytest.param(
+        openai_agents_stream.main,
+        current_agent_mapping,
+        interrupt_handler_agent,
+        id="main",
+    ),
+    pytest.param(
+        openai_agents_stream_mcp.main_mcp,
+        openai_agents_stream_mcp.current_agent_mapping,
+        openai_agents_stream_mcp.interrupt_handler_agent_mcp,
+        id="mcp",
+    ),
+]
+
+
+def find_handoff(agent: Agent, agent_name: str) -> Handoff:
+    return next(
+        agent_handoff
+        for agent_handoff in agent.handoffs
+        if isinstance(agent_handoff, Handoff) and agent_handoff.agent_name == agent_name
+    )
+
+
+def function_call_names(history: list) -> list[str]:
+    return [item["name"] for item in history if item.get("type") == "function_call"]
+
+
+async def stream_turn(stream, **kwargs):
+    async for chunk in stream(
+        request_type=RequestType.CHAT_REQUEST,
+        auth_token="test-token",
+        backend_client=SimpleNamespace(),
+        **kwargs,
+    ):
+        if chunk.event_type == EventType.TERMINATING_EVENT:
+            return chunk
+
+
+@pytest.mark.parametrize("stream, agent_mapping, interrupt_handler", GRAPHS)
+def test_transfer_back_without_a_session(
+    fake_model, stream, agent_mapping, interrupt_handler
+):
+    """The client only sends the history and agent_name back, the interrupted agent must be recovered from them."""
+    history = [
+        {"content": "I want to book a flu vaccine", "role": "user"},
+        {
+            "id": "msg_test",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [
+                {
+                    "type": "output_text",
+                    "text": "Which polyclinic would you like to book at?",
+                    "annotations": [],
+                }
+            ],
+        },
+    ]
+
+    async def run():
+        # The interruption happens at the agent the turn started at
+        fake_model.call(f"transfer_to_{interrupt_handler.name}")
+        fake_model.reply("Shall we return to booking your appointment?")
+        interrupted = await stream_turn(
+            stream,
+            user_msg="What are the side effects of the flu vaccine?",
+            history=history,
+            current_agent="identify_clinic_agent",
+        )
+        assert interrupted.agent_name == interrupt_handler.name
+
+        fake_model.call("transfer_back_to_interrupted_agent")
+        fake_model.reply("Which polyclinic would you like to book at?")
+        returned = await stream_turn(
+            stream,
+            user_msg="Yes",
+            history=interrupted.history,
+            current_agent=interrupted.agent_name,
+            user_info=interrupted.user_info,
+        )
+        return interrupted, returned
+
+    interrupted, returned = asyncio.run(run())
+    # The interrupted agent travels in user_info, the history only holds the calls the model made
+    assert interrupted.user_info["interrupted_agent"] == "identify_clinic_agent"
+    assert function_call_names(interrupted.history) == [
+        f"transfer_to_{interrupt_handler.name}"
+    ]
+    assert returned.agent_name == "identify_clinic_agent"
+    # The interrupt handler of the second turn was told who it was returning to
+    assert "**the identify_clinic_agent**" in fake_model.calls[-2].instructions
+
+
+@pytest.mark.parametrize("stream, agent_mapping, interrupt_handler", GRAPHS)
+def test_resolved_vaccine_name_is_carried_without_a_session(
+    fake_model, stream, agent_mapping, interrupt_handler
+):
+    """The intent router resolves the vaccine, the next turn gets it from user_info rather than from the history."""
+
+    async def run():
+        fake_model.reply("Have you had a flu vaccine in the past year?")
+        booking = await stream_turn(
+            stream, user_msg="book a flu shot", history=None, current_agent=None
+        )
+        fake_model.reply("Which polyclinic would you like to book at?")
+        await stream_turn(
+            stream,
+            user_msg="No",
+            history=booking.history,
+            current_agent="check_available_slots_agent",
+            user_info=booking.user_info,
+        )
+        return booking
+
+    booking = asyncio.run(run())
+    assert booking.user_info["standardised_vaccine_name"] == "Influenza (INF)"
+    assert function_call_names(booking.history) == []
+    assert "is: Influenza (INF)." in fake_model.calls[-1].instructions
+
+
+@pytest.mark.parametrize("stream, agent_mapping, interrupt_handler", GRAPHS)
+def test_concurrent_conversations_return_to_their_own_agent(
+    stream, agent_mapping, interrupt_handler
+):
+    """The handoffs into and out of the interrupt handler are invoked as the Runner does, interleaved."""
+    interruptible_agents = [
+        agent
+        for agent in agent_mapping.values()
+        if any(
+            isinstance(agent_handoff, Handoff)
+            and agent_handoff.agent_name == interrupt_handler.name
+            for agent_handoff in agent.handoffs
+        )
+    ]
+    handoffs_before = list(interrupt_handler.handoffs)
+
+    async def interrupted_conversation(interrupted_agent: Agent) -> str:
+        context = UserInfo(current_agent=interrupted_agent.name)
+        # The Runner wraps the RunContextWrapper passed as context in its own wrapper
+        context_wrapper = RunContextWrapper(context=RunContextWrapper(context=context))
+
+        to_interrupt_handler = find_handoff(interrupted_agent, interrupt_handler.name)
+        await to_interrupt_handler.on_invoke_handoff(context_wrapper, "")
+        context.current_agent = interrupt_handler.name
+        await asyncio.sleep(random.uniform(0, 0.005))
+
+        back_to_interrupted_agent = find_handoff(interrupt_handler, "interrupted_agent")
+        agent = await back_to_interrupted_agent.on_invoke_handoff(context_wrapper, "{}")
+        return agent.name
+
+    async def run():
+        return await asyncio.gather(
+            *(interrupted_conversation(agent) for agent in expected)
+        )
+
+    expected = [random.choice(interruptible_agents) for _ in range(200)]
+    returned = asyncio.run(run())
+    assert [agent.name for agent in expected] == returned
+    assert interrupt_handler.handoffs == handoffs_before
@@ -0,0 +1,95 @@
+import asyncio
+
+from mcp import Tool as MCPTool
+
+from agents.mcp import MCPServer
+from app.services.openai import mcp_pool
+from app.services.openai.mcp_pool import MCPServerPool
+
+
+class StandInMCPServer(MCPServer):
+    """Connects at once, and lists one tool unless `list_tools_error` is set."""
+
+    list_tools_error = None
+
+    @property
+    def name(self) -> str:
+        return "stand-in"
+
+    async def connect(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+    async def list_tools(self):
+        if self.list_tools_error is not None:
+            raise self.list_tools_error
+        return [MCPTool(name="get_clinics", inputSchema={"type": "object"})]
+
+    async def call_tool(self, tool_name, arguments):
+        raise NotImplementedError
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class UnreachableMCPServer(StandInMCPServer):
+    async def __aenter__(self):
+        raise ConnectionError("MCP server unreachable")
+
+
+def test_start_does_not_wait_for_an_unreachable_server(monkeypatch):
+    monkeypatch.setattr(mcp_pool, "MCP_CONNECT_TIMEOUT", 0.05)
+    pool = MCPServerPool(UnreachableMCPServer, name="test", size=2)
+
+    async def run():
+        pool.start()
+        # connect() waits for the warm-up, which gives up after MCP_CONNECT_TIMEOUT without raising
+        await pool.connect()
+        stats = pool.stats()
+        await pool.cleanup()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["connected"] == 0
+    assert not stats["tools_cached"]
+
+
+def test_a_failing_tool_list_does_not_fail_connect(monkeypatch):
+    monkeypatch.setattr(
+        StandInMCPServer, "list_tools_error", RuntimeError("transport error")
+    )
+    pool = MCPServerPool(StandInMCPServer, name="test", size=1)
+
+    async def run():
+        await pool.connect()
+        tools_cached = pool.stats()["tools_cached"]
+        # The next request lists the tools again
+        monkeypatch.setattr(StandInMCPServer, "list_tools_error", None)
+        tools = await pool.list_tools()
+        await pool.cleanup()
+        return tools_cached, tools
+
+    tools_cached, tools = asyncio.run(run())
+    assert not tools_cached
+    assert [tool.name for tool in tools] == ["get_clinics"]
+
+
+def test_unconfigured_pool_never_connects():
+    pool = MCPServerPool(UnreachableMCPServer, name="test", configured=False)
+
+    async def run():
+        await pool.connect()
+        try:
+            await pool.list_tools()
+        except RuntimeError as e:
+            return e
+
+    error = asyncio.run(run())
+    assert "not configured" in str(error)
+    assert pool.stats()["connected"] == 0 and not pool._connections
+
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.schemas.chat import UserInfo
+from app.services.openai.session_store import (
+    InMemorySessionStore,
+    SqliteSessionStore,
+    context_fields_from_user_info,
+    load_session,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def session_store(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteSessionStore(path=str(tmp_path / "sessions.sqlite3"))
+    return InMemorySessionStore()
+
+
+def test_session_round_trip(session_store):
+    async def run():
+        await session_store.initialize()
+        try:
+            session = await load_session(session_store, "abc")
+            assert session.history == [] and session.current_agent is None
+
+            history = [{"content": "book a flu shot", "role": "user"}]
+            context = UserInfo(
+                interrupted_agent="identify_clinic_agent",
+                user_input_language="English",
+                standardised_vaccine_name="Influenza (INF)",
+            )
+            session.update(history, "identify_clinic_agent", context)
+            await session_store.save(session)
+
+            loaded = await load_session(session_store, "abc")
+            assert loaded.history == history
+            assert loaded.current_agent == "identify_clinic_agent"
+            assert UserInfo(**loaded.context_fields()) == UserInfo(
+                interrupted_agent="identify_clinic_agent",
+                user_input_language="English",
+                standardised_vaccine_name="Influenza (INF)",
+            )
+        finally:
+            await session_store.close()
+
+    asyncio.run(run())
+
+
+def test_sessions_are_separate_per_agent_graph(session_store):
+    async def run():
+        await session_store.initialize()
+        try:
+            session = await load_session(session_store, "abc")
+            session.update([], "triage_agent", UserInfo())
+            await session_store.save(session)
+
+            mcp_session = await load_session(session_store, "abc", namespace="mcp")
+            assert mcp_session.current_agent is None
+        finally:
+            await session_store.close()
+
+    asyncio.run(run())
+
+
+def test_context_round_trip_without_a_session():
+    """Clients without a session send the user_info of the terminating event back with the next message."""
+    context = UserInfo(
+        auth_header={"Authorization": "Bearer test-token"},
+        interrupted_agent="identify_clinic_agent",
+        standardised_vaccine_name="Influenza (INF)",
+    )
+    restored = UserInfo(**context_fields_from_user_info(context.to_dict()))
+    assert restored.interrupted_agent == "identify_clinic_agent"
+    assert restored.standardised_vaccine_name == "Influenza (INF)"
+    # Only the conversation's context is carried over, not the request's credentials
+    assert restored.auth_header is None
+    assert UserInfo(**context_fields_from_user_info(None)) == UserInfo()
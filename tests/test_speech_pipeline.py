@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.schemas.chat import EventType, RequestType
+from app.services.openai import openai_agents_stream
+
+
+class StalledSpeechClient:
+    """Never finishes a sentence, and counts the sentences started and those still being synthesized."""
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.active = 0
+
+    async def read_text(self, text: str) -> str:
+        self.started += 1
+        self.active += 1
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.active -= 1
+
+
+def test_closing_the_stream_cancels_the_synthesis(fake_model):
+    speech_client = StalledSpeechClient()
+    fake_model.reply(
+        "Flu vaccines are safe. They protect you every year. Book one soon."
+    )
+
+    async def run():
+        stream = openai_agents_stream.main(
+            request_type=RequestType.VOICE_REQUEST,
+            user_msg="Tell me about flu vaccines",
+            history=None,
+            current_agent=None,
+            auth_token="test-token",
+            speech_client=speech_client,
+            backend_client=SimpleNamespace(),
+        )
+        async for chunk in stream:
+            # Sending the event to the client
+            await asyncio.sleep(0)
+            # The client disconnects while the last sentence streams
+            if (
+                chunk.event_type == EventType.DELTA_TEXT_EVENT
+                and chunk.delta_message == "Book "
+            ):
+                break
+        await stream.aclose()
+        # Let the cancelled synthesis tasks finish
+        await asyncio.sleep(0)
+        return speech_client.started, speech_client.active
+
+    started, active = asyncio.run(run())
+    assert started == 2
+    assert active == 0
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from azure.cognitiveservices.speech import ResultReason
+from azure.core.credentials import AccessToken
+
+from app.services.speech import text_to_speech
+from app.services.speech.audio_cache import AudioCache
+from app.services.speech.azure_token import AzureTokenManager
+
+
+class StandInSynthesizer:
+    """Blocks its calling thread like the Speech SDK does, until `release` is set."""
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def __init__(self, speech_config, audio_config) -> None:
+        self.authorization_token = None
+
+    def speak_text(self, text: str):
+        self.started.set()
+        self.release.wait()
+        return SimpleNamespace(
+            reason=ResultReason.SynthesizingAudioCompleted, audio_data=text.encode()
+        )
+
+
+class StandInCredential:
+    async def get_token(self, *scopes):
+        return AccessToken("test-token", int(time.time()) + 3600)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def stand_in_speech_sdk(monkeypatch):
+    StandInSynthesizer.release = threading.Event()
+    StandInSynthesizer.started = threading.Event()
+    monkeypatch.setattr(text_to_speech, "SpeechSynthesizer", StandInSynthesizer)
+    monkeypatch.setattr(
+        text_to_speech,
+        "Connection",
+        SimpleNamespace(
+            from_speech_synthesizer=lambda synthesizer: SimpleNamespace(
+                open=lambda for_continuous_recognition: None
+            )
+        ),
+    )
+    monkeypatch.setattr(text_to_speech, "TTS_WARMUP_PHRASES_PATH", "")
+    yield StandInSynthesizer
+    # Unblock the threads of a failed test
+    StandInSynthesizer.release.set()
+
+
+async def create_text_to_speech() -> text_to_speech.TextToSpeech:
+    speech_client = text_to_speech.TextToSpeech(
+        AzureTokenManager(resource_id="test", credential=StandInCredential())
+    )
+    speech_client.region = "southeastasia"
+    speech_client.audio_cache = AudioCache(max_entries=0, directory=None)
+    await speech_client.initialize()
+    return speech_client
+
+
+def test_cancelled_synthesis_keeps_its_synthesizer_until_the_sdk_is_done(
+    stand_in_speech_sdk, monkeypatch
+):
+    monkeypatch.setattr(text_to_speech, "TTS_SYNTHESIZERS_PER_VOICE", 1)
+
+    async def run():
+        speech_client = await create_text_to_speech()
+        synthesizers = speech_client.synthesizers[text_to_speech.DEFAULT_VOICE_NAME]
+
+        task = asyncio.create_task(
+            speech_client.synthesize("Hello.", text_to_speech.DEFAULT_VOICE_NAME)
+        )
+        while not stand_in_speech_sdk.started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The SDK is still speaking with it, another request must not get it
+        busy = synthesizers.qsize()
+
+        stand_in_speech_sdk.release.set()
+        for _ in range(1000):
+            if synthesizers.qsize():
+                break
+            await asyncio.sleep(0.001)
+        await speech_client.close()
+        return busy, synthesizers.qsize()
+
+    busy, returned = asyncio.run(run())
+    assert busy == 0
+    assert returned == 1
+
+
+def test_concurrent_synthesis_keeps_the_event_loop_responsive(
+    stand_in_speech_sdk, monkeypatch
+):
+    synthesis_seconds = 0.1
+
+    def speak_text(self, text: str):
+        time.sleep(synthesis_seconds)
+        return SimpleNamespace(
+            reason=ResultReason.SynthesizingAudioCompleted, audio_data=text.encode()
+        )
+
+    monkeypatch.setattr(stand_in_speech_sdk, "speak_text", speak_text)
+
+    async def run():
+        speech_client = await create_text_to_speech()
+        lags = []
+
+        async def probe():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - start - 0.005)
+
+        probe_task = asyncio.create_task(probe())
+        audio = await asyncio.gather(
+            *(speech_client.read_audio(f"Sentence {i}.") for i in range(8))
+        )
+        probe_task.cancel()
+        await speech_client.close()
+        return audio, max(lags)
+
+    audio, max_lag = asyncio.run(run())
+    assert audio == [f"Sentence {i}.".encode() for i in range(8)]
+    # Synthesizing on the event loop would hold it for a whole sentence at a time
+    assert max_lag < synthesis_seconds / 2
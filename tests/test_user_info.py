@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.schemas.chat import EventType, RequestType, UserInfo
+from app.services.backend.backend_client import BackendClient
+from app.services.openai import openai_agents_stream, tools
+from app.services.openai.backend_cache import BackendResponseCache
+
+
+def test_new_context_is_sent_once():
+    context = UserInfo(current_agent="triage_agent")
+    changes = context.pop_changes()
+    assert changes == context.to_dict()
+    assert changes["current_agent"] == "triage_agent"
+    assert context.pop_changes() is None
+    # Each instance tracks its own changes
+    assert UserInfo().pop_changes() is not None
+
+
+def test_only_changed_values_mark_the_context_dirty():
+    context = UserInfo(current_agent="triage_agent", data_type=None)
+    context.pop_changes()
+
+    context.current_agent = "triage_agent"
+    context.data_type = None
+    assert context.pop_changes() is None
+
+    context.data_type = "booking_details"
+    assert context.pop_changes()["data_type"] == "booking_details"
+    assert context.pop_changes() is None
+
+
+def test_backend_client_is_not_tracked():
+    context = UserInfo()
+    context.pop_changes()
+
+    context.backend_client = object()
+    assert context.pop_changes() is None
+    context.current_agent = "triage_agent"
+    assert "backend_client" not in context.pop_changes()
+
+
+def booking_backend() -> BackendClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/records/r1":
+            return httpx.Response(200, json={"id": "r1", "booking_slot_id": "s1"})
+        return httpx.Response(
+            200,
+            json={
+                "id": "s1",
+                "vaccine": {"name": "Influenza"},
+                "polyclinic": {"name": "Bedok Polyclinic"},
+                "datetime": "2025-01-01T09:00:00Z",
+            },
+        )
+
+    return BackendClient(transport=httpx.MockTransport(handler))
+
+
+def test_user_info_is_only_sent_when_it_changes(fake_model, monkeypatch):
+    monkeypatch.setattr(tools, "backend_cache", BackendResponseCache())
+    fake_model.call(
+        "transfer_to_manage_appointment_agent", {"requested_vaccine": "flu"}
+    )
+    fake_model.call("cancel_appointment_tool", {"record_id": "r1"})
+    fake_model.reply("Shall I cancel your flu vaccination on 1 January?")
+
+    async def run():
+        return [
+            chunk
+            async for chunk in openai_agents_stream.main(
+                request_type=RequestType.CHAT_REQUEST,
+                user_msg="Please cancel it instead",
+                history=None,
+                current_agent="check_available_slots_agent",
+                auth_token="test-token",
+                backend_client=booking_backend(),
+            )
+        ]
+
+    events = asyncio.run(run())
+    first, handoff = [
+        event for event in events if event.event_type == EventType.NEW_AGENT_EVENT
+    ]
+    # The Runner streams the tool call once the tool has run, so it is the first event after data_type was set
+    [tool_call] = [
+        event for event in events if event.event_type == EventType.TOOL_CALL_EVENT
+    ]
+    terminating = events[-1]
+
+    assert events[0] is first
+    assert first.user_info["current_agent"] == "check_available_slots_agent"
+    assert handoff.user_info["current_agent"] == "manage_appointment_agent"
+    assert tool_call.user_info["data_type"] == "cancel_details"
+    assert terminating.event_type == EventType.TERMINATING_EVENT
+    assert terminating.user_info["data_type"] == "cancel_details"
+    # The tool output, the text and anything else that did not change the context leave it out
+    unchanged = [
+        event
+        for event in events
+        if event not in (first, handoff, tool_call, terminating)
+    ]
+    assert {event.event_type for event in unchanged} >= {
+        EventType.TOOL_CALL_OUTPUT_EVENT,
+        EventType.DELTA_TEXT_EVENT,
+        EventType.COMPLETED_TEXT_EVENT,
+    }
+    assert all(event.user_info is None for event in unchanged)
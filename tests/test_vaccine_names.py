@@ -0,0 +1,88 @@
+import pytest
+
+from app.services.openai.vaccine_names import (
+    VACCINE_NAME_CONFIDENCE_THRESHOLD,
+    match_vaccine_name,
+)
+
+
+@pytest.mark.parametrize(
+    "text, name",
+    [
+        ("flu", "Influenza (INF)"),
+        ("Flu vaccine", "Influenza (INF)"),
+        ("MMR", "Measles, mumps and rubella (MMR)"),
+        ("Hepatitis B (HepB)", "Hepatitis B (HepB)"),
+        ("水痘疫苗", "Varicella (VAR)"),
+        ("vaksin selesema", "Influenza (INF)"),
+    ],
+)
+def test_exact_alias(text, name):
+    match = match_vaccine_name(text)
+    assert (match.name, match.confidence) == (name, 1.0)
+
+
+@pytest.mark.parametrize(
+    "text, name",
+    [
+        ("I want to book a flu shot for next week", "Influenza (INF)"),
+        ("book a hepatitis b vaccine", "Hepatitis B (HepB)"),
+        ("can my son get the chicken pox jab?", "Varicella (VAR)"),
+        ("我想预约乙型肝炎疫苗", "Hepatitis B (HepB)"),
+    ],
+)
+def test_alias_in_a_sentence(text, name):
+    match = match_vaccine_name(text)
+    assert match.name == name
+    assert match.is_confident
+
+
+@pytest.mark.parametrize(
+    "text", ["flu and mmr", "book hpv and hepatitis b shots", "流感和水痘疫苗"]
+)
+def test_several_vaccines_are_not_confident(text):
+    assert not match_vaccine_name(text).is_confident
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "hepatitis",
+        "hepatitis a",
+        "book a hepatitis a vaccine",
+        "hep a",
+        "tetanus",
+        "pneumococcal",
+        "肝炎疫苗",
+        "tdap and a tetanus booster",
+        "hepatitis a and hepatitis b",
+    ],
+)
+def test_ambiguous_terms_are_not_confident(text):
+    assert not match_vaccine_name(text).is_confident
+
+
+@pytest.mark.parametrize(
+    "text, name",
+    [
+        ("chikenpox", "Varicella (VAR)"),
+        ("influensa", "Influenza (INF)"),
+        ("varicela vaccine", "Varicella (VAR)"),
+    ],
+)
+def test_typo_of_an_alias(text, name):
+    match = match_vaccine_name(text)
+    assert match.name == name
+    assert match.is_confident
+
+
+@pytest.mark.parametrize("text", ["meningococcal", "hepatitus a", "fluzone high dose"])
+def test_fuzzy_matches_stay_below_the_threshold(text):
+    match = match_vaccine_name(text)
+    assert match.confidence < VACCINE_NAME_CONFIDENCE_THRESHOLD
+    assert not match.is_confident
+
+
+def test_no_vaccine():
+    assert match_vaccine_name("").name is None
+    assert not match_vaccine_name("I want to book an appointment").is_confident
@@ -0,0 +1,182 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.routers import voice
+from app.schemas.chat import EventType
+from app.schemas.voice import LiveVoiceRequest, VoiceRequest, VoiceResponse
+
+
+class FakeWebSocket:
+    """Receives `messages`, by default a LiveVoiceRequest, then keeps the connection open."""
+
+    def __init__(self, messages: list[dict] | None = None) -> None:
+        self.app = SimpleNamespace(
+            state=SimpleNamespace(
+                text_to_speech_service=None, session_store=None, backend_client=None
+            )
+        )
+        self.headers = {}
+        self.messages = (
+            [text_message(LiveVoiceRequest(auth_token="test-token").model_dump_json())]
+            if messages is None
+            else messages
+        )
+        self.sent = []
+        self.closed = False
+        self.close_code = None
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def accept(self) -> None:
+        pass
+
+    async def receive(self) -> dict:
+        if self.messages:
+            return self.messages.pop(0)
+        # The client keeps the microphone open
+        await asyncio.Event().wait()
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.closed = True
+        self.close_code = code
+
+
+def text_message(text: str) -> dict:
+    return {"type": "websocket.receive", "text": text}
+
+
+class FailingRecognition:
+    """Recognizes one phrase, then fails."""
+
+    async def __aiter__(self):
+        yield "final", "What is the flu vaccine?"
+        raise RuntimeError("Recognition connection lost")
+
+    async def stop(self) -> None:
+        pass
+
+
+def test_voice_turn_without_a_terminating_event(monkeypatch):
+    async def empty_stream(**kwargs):
+        return
+        yield
+
+    monkeypatch.setattr(voice.openai_agents_stream, "main", empty_stream)
+    voice_request = VoiceRequest(message="Hello", auth_token="test-token")
+
+    audio_sequence, terminating_event = asyncio.run(
+        voice.send_voice_turn(FakeWebSocket(), voice_request, 3)
+    )
+    assert audio_sequence == 3
+    assert terminating_event is None
+
+
+def test_live_voice_ends_when_the_recognition_fails(monkeypatch):
+    async def answer(**kwargs):
+        yield VoiceResponse(
+            event_type=EventType.TERMINATING_EVENT,
+            message=None,
+            agent_name="triage_agent",
+            history=[],
+        )
+
+    async def start_recognition():
+        return FailingRecognition()
+
+    monkeypatch.setattr(voice.openai_agents_stream, "main", answer)
+    websocket = FakeWebSocket()
+    websocket.app.state.speech_to_text_service = SimpleNamespace(
+        start_recognition=start_recognition
+    )
+
+    # The phrase recognized before the failure is answered, then the connection is closed
+    asyncio.run(asyncio.wait_for(voice.live_voice_websocket(websocket), 5))
+    assert websocket.closed
+    assert len(websocket.sent) == 2
+
+
+class SilentRecognition:
+    """Never recognizes anything."""
+
+    stopped = False
+
+    async def __aiter__(self):
+        await asyncio.Event().wait()
+        yield
+
+    async def stop(self) -> None:
+        self.stopped = True
+
+
+class RecognitionStarter:
+    """speech_to_text_service of the app, keeping the recognitions it started."""
+
+    def __init__(self) -> None:
+        self.recognitions = []
+
+    async def start_recognition(self):
+        self.recognitions.append(SilentRecognition())
+        return self.recognitions[-1]
+
+
+INVALID_MESSAGES = {
+    "binary": ({"type": "websocket.receive", "bytes": b"RIFF"}, 1003),
+    "not_json": (text_message("hello"), 1008),
+    "no_auth_token": (text_message('{"message": "Hello"}'), 1008),
+    "bad_stream_mode": (
+        text_message(
+            '{"message": "Hello", "auth_token": "test-token", "stream_mode": "bogus"}'
+        ),
+        1008,
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "message, close_code", INVALID_MESSAGES.values(), ids=INVALID_MESSAGES
+)
+def test_voice_websocket_closes_on_an_invalid_request(monkeypatch, message, close_code):
+    async def unreachable_stream(**kwargs):
+        raise AssertionError("An invalid request must not be answered")
+        yield
+
+    monkeypatch.setattr(voice.openai_agents_stream, "main", unreachable_stream)
+    websocket = FakeWebSocket([message])
+
+    asyncio.run(asyncio.wait_for(voice.voice_websocket(websocket), 5))
+    assert websocket.close_code == close_code
+    assert websocket.sent == []
+
+
+@pytest.mark.parametrize(
+    "message, close_code", INVALID_MESSAGES.values(), ids=INVALID_MESSAGES
+)
+def test_live_voice_closes_on_an_invalid_request_without_recognizing(
+    message, close_code
+):
+    websocket = FakeWebSocket([message])
+    websocket.app.state.speech_to_text_service = RecognitionStarter()
+
+    asyncio.run(asyncio.wait_for(voice.live_voice_websocket(websocket), 5))
+    assert websocket.close_code == close_code
+    assert websocket.app.state.speech_to_text_service.recognitions == []
+
+
+def test_live_voice_stops_the_recognition_when_the_client_leaves():
+    websocket = FakeWebSocket(
+        [
+            text_message(LiveVoiceRequest(auth_token="test-token").model_dump_json()),
+            {"type": "websocket.disconnect", "code": 1001},
+        ]
+    )
+    websocket.app.state.speech_to_text_service = RecognitionStarter()
+
+    asyncio.run(asyncio.wait_for(voice.live_voice_websocket(websocket), 5))
+    [recognition] = websocket.app.state.speech_to_text_service.recognitions
+    assert recognition.stopped